@@ -0,0 +1,94 @@
+"""Per-hit CPU cost of the cache decorator's JSON mode versus its raw response mode.
+
+JSON mode decodes the cached entry, lets FastAPI validate it against the route's `response_model` and encodes it
+again. Raw response mode decodes the entry and wraps the cached bytes in a `Response` as is. Both go through
+`decode_entry` with the configured codec and compression, so a compressed entry pays its decompression on every hit.
+
+Usage:
+    python -m benchmarks.cache_raw_response [--posts 10] [--text-length 2000] [--number 2000] [--compression none]
+"""
+
+import argparse
+import json
+import timeit
+from datetime import UTC, datetime
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastcrud.paginated import PaginatedListResponse
+from pydantic import TypeAdapter
+
+from src.app.core.utils.cache_codecs import (
+    CachedBody,
+    ETaggedRawCodec,
+    decode_entry,
+    encode_entry,
+    get_codec,
+    get_compressor,
+)
+from src.app.core.utils.etag import compute_etag
+from src.app.models.post import PostRead
+from src.config.settings import get_settings
+
+settings = get_settings()
+
+
+def build_page(posts: int, text_length: int) -> dict:
+    data = [
+        {
+            "id": i,
+            "title": f"Post {i}",
+            "text": "x" * text_length,
+            "media_url": "https://www.postimageurl.com",
+            "created_by_user_id": 1,
+            "created_at": datetime.now(UTC).isoformat(),
+        }
+        for i in range(posts)
+    ]
+    return {"data": data, "total_count": posts, "has_more": False, "page": 1, "items_per_page": posts}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=10)
+    parser.add_argument("--text-length", type=int, default=2000)
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--codec", default=settings.CACHE_CODEC, help="codec of JSON mode entries")
+    parser.add_argument("--compression", default=settings.CACHE_COMPRESSION, help="none, zlib, zstd or lz4")
+    args = parser.parse_args()
+
+    adapter = TypeAdapter(PaginatedListResponse[PostRead])
+    page = build_page(args.posts, args.text_length)
+    compressor = get_compressor(args.compression)
+    threshold = settings.CACHE_COMPRESSION_THRESHOLD
+    body = adapter.dump_json(adapter.validate_python(page))
+    json_entry = encode_entry(jsonable_encoder(page), get_codec(args.codec), compressor, threshold)
+    raw_entry = encode_entry(CachedBody(body, compute_etag(body)), ETaggedRawCodec(), compressor, threshold)
+
+    def json_hit() -> bytes:
+        cached, _ = decode_entry(json_entry)
+        validated = adapter.validate_python(cached)
+        return JSONResponse(content=jsonable_encoder(validated)).body
+
+    def raw_hit() -> bytes:
+        cached, _ = decode_entry(raw_entry)
+        return Response(content=cached.body, media_type="application/json").body
+
+    assert json.loads(json_hit()) == json.loads(raw_hit())
+
+    print(f"payload: {len(body)} bytes ({args.posts} posts, {args.text_length} chars each)")
+    print(
+        f"entries: {len(json_entry)} bytes ({args.codec}), {len(raw_entry)} bytes (raw), compression {args.compression}"
+    )
+    results = {}
+    for name, hit in (("json", json_hit), ("raw", raw_hit)):
+        seconds = min(timeit.repeat(hit, number=args.number, repeat=5)) / args.number
+        results[name] = seconds
+        print(f"{name:>5}: {seconds * 1e6:10.2f} us/hit")
+
+    print(f"saved: {(results['json'] - results['raw']) * 1e6:10.2f} us/hit ({results['json'] / results['raw']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
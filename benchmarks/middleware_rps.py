@@ -0,0 +1,119 @@
+"""Requests per second against the health endpoint with the call_next middlewares versus their pure ASGI rewrites.
+
+The app is driven in process through its ASGI interface, without a server or an HTTP client, so the numbers only
+reflect framework and middleware overhead. Request logs are discarded.
+
+Usage:
+    python -m benchmarks.middleware_rps [--requests 20000] [--concurrency 50]
+"""
+import argparse
+import asyncio
+from time import perf_counter, time
+
+from fastapi import FastAPI, Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+
+from src.app.api.v1.health import router as health_router
+from src.app.middleware.client_cache_middleware import ClientCacheMiddleware
+from src.app.middleware.request_logging_middleware import RequestLoggingMiddleware
+from src.core.logger import log_request, logger
+
+
+class CallNextClientCacheMiddleware(BaseHTTPMiddleware):
+    """`ClientCacheMiddleware` as it was before the ASGI rewrite, without conditional GET support."""
+
+    def __init__(self, app: FastAPI, max_age: int = 60) -> None:
+        super().__init__(app)
+        self.max_age = max_age
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        response: Response = await call_next(request)
+        response.headers["Cache-Control"] = f"public, max-age={self.max_age}"
+        return response
+
+
+def build_call_next_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def log_requests(request: Request, call_next):
+        start_time = time()
+        response = await call_next(request)
+        duration = time() - start_time
+
+        await log_request(request, response.status_code)
+        logger.bind(access=True).debug(f"Request processed in {duration:.2f} seconds")
+
+        return response
+
+    app.add_middleware(CallNextClientCacheMiddleware)
+    app.include_router(health_router)
+    return app
+
+
+def build_asgi_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestLoggingMiddleware)
+    app.add_middleware(ClientCacheMiddleware)
+    app.include_router(health_router)
+    return app
+
+
+async def request(app: FastAPI) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/health",
+        "raw_path": b"/health",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"testserver")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        pass
+
+    await app(scope, receive, send)
+
+
+async def measure(app: FastAPI, requests: int, concurrency: int) -> float:
+    async def worker(count: int) -> None:
+        for _ in range(count):
+            await request(app)
+
+    await worker(100)
+
+    start_time = perf_counter()
+    await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+    return (requests // concurrency * concurrency) / (perf_counter() - start_time)
+
+
+async def run(requests: int, concurrency: int) -> None:
+    logger.remove()
+
+    before = await measure(build_call_next_app(), requests, concurrency)
+    after = await measure(build_asgi_app(), requests, concurrency)
+    print(f"call_next: {before:10.0f} req/s")
+    print(f"     ASGI: {after:10.0f} req/s")
+    print(f"  speedup: {after / before:10.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Health check latency during concurrent logins, with bcrypt on the event loop versus in `PasswordHasher`.
+
+Login requests verify a password in a loop while a probe requests the health endpoint every few milliseconds. With
+bcrypt on the event loop, every probe waits for the logins in progress; with the thread pool, probes only wait for
+the event loop. Half of the logins fit in the pool's queue; the others get a 503 and retry after a short pause. The
+app is driven in process through httpx's ASGI transport.
+
+Usage:
+    python -m benchmarks.password_hashing_latency [--logins 16] [--duration 5] [--rounds 12]
+"""
+import argparse
+import asyncio
+import statistics
+from time import perf_counter
+
+import bcrypt
+import httpx
+from fastapi import FastAPI
+
+from src.app.core.utils.password_hasher import PasswordHasher
+
+PASSWORD = "correct horse battery staple"
+PROBE_INTERVAL = 0.005
+REJECTED_LOGIN_BACKOFF = 0.05
+
+
+def build_app(hashed_password: str, password_hasher: PasswordHasher) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health() -> dict:
+        return {"status": "ok"}
+
+    @app.post("/login/inline")
+    async def login_inline() -> dict:
+        return {"ok": bcrypt.checkpw(PASSWORD.encode(), hashed_password.encode())}
+
+    @app.post("/login")
+    async def login() -> dict:
+        return {"ok": await password_hasher.verify(PASSWORD, hashed_password)}
+
+    return app
+
+
+async def measure(client: httpx.AsyncClient, login_path: str | None, logins: int, duration: float) -> dict:
+    deadline = perf_counter() + duration
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+
+    async def log_in() -> None:
+        while perf_counter() < deadline:
+            response = await client.post(login_path)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code == 503:
+                await asyncio.sleep(REJECTED_LOGIN_BACKOFF)
+
+    async def probe() -> None:
+        while perf_counter() < deadline:
+            # Measured from when the probe was due, so that time spent waiting for a blocked event loop counts
+            due = perf_counter() + PROBE_INTERVAL
+            await asyncio.sleep(PROBE_INTERVAL)
+            await client.get("/health")
+            latencies.append((perf_counter() - due) * 1000)
+
+    workers = [log_in() for _ in range(logins)] if login_path else []
+    await asyncio.gather(probe(), *workers)
+
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99)],
+        "max": latencies[-1],
+        "logins": statuses,
+    }
+
+
+async def run(logins: int, duration: float, rounds: int) -> None:
+    hashed_password = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(rounds)).decode()
+    password_hasher = PasswordHasher(max_workers=2, max_pending=logins // 2)
+    app = build_app(hashed_password, password_hasher)
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for label, login_path in (("idle", None), ("inline bcrypt", "/login/inline"), ("PasswordHasher", "/login")):
+            result = await measure(client, login_path, logins, duration)
+            print(
+                f"{label:>14}: health p50 {result['p50']:7.1f} ms  p99 {result['p99']:7.1f} ms  "
+                f"max {result['max']:7.1f} ms  logins by status {result['logins']}"
+            )
+
+    password_hasher.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=16, help="concurrent login loops")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per scenario")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.logins, args.duration, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
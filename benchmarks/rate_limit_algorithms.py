@@ -0,0 +1,70 @@
+"""Redis commands and latency per rate limit check for each `RateLimitAlgorithm`.
+
+Every check is one EVALSHA round trip whatever the algorithm; what differs is the work the script does inside Redis.
+Commands, including those the scripts issue, are counted from `INFO commandstats` deltas, so run it against a Redis
+nothing else is using. Keys are written under the `ratelimit:bench-<random>:` prefix and expire with their window.
+
+Usage:
+    python -m benchmarks.rate_limit_algorithms [--redis-url redis://localhost:6379/0] [--number 5000]
+"""
+import argparse
+import asyncio
+import uuid
+from time import perf_counter
+
+from redis.asyncio import Redis
+
+from src.app.core.utils import rate_limit
+from src.app.models.rate_limit import RateLimitAlgorithm
+
+LIMIT = 100
+PERIOD = 60
+
+
+async def command_calls(client: Redis) -> dict[str, int]:
+    stats = await client.info("commandstats")
+    return {name.removeprefix("cmdstat_"): values["calls"] for name, values in stats.items()}
+
+
+async def measure(client: Redis, algorithm: RateLimitAlgorithm, number: int) -> tuple[float, dict[str, float]]:
+    user_id = f"bench-{uuid.uuid4().hex}"
+    before = await command_calls(client)
+    start_time = perf_counter()
+    for _ in range(number):
+        await rate_limit.check_rate_limit(user_id, "/api/v1/bench", LIMIT, PERIOD, algorithm)
+
+    elapsed = perf_counter() - start_time
+    after = await command_calls(client)
+    per_check = {
+        name: (calls - before.get(name, 0)) / number
+        for name, calls in after.items()
+        if name != "info" and calls != before.get(name, 0)
+    }
+    return elapsed / number * 1e6, per_check
+
+
+async def run(redis_url: str, number: int) -> None:
+    rate_limit.client = Redis.from_url(redis_url)
+    await rate_limit.load_scripts()
+
+    try:
+        for algorithm in RateLimitAlgorithm:
+            latency, per_check = await measure(rate_limit.client, algorithm, number)
+            commands = ", ".join(f"{name} {calls:.2f}" for name, calls in sorted(per_check.items()))
+            print(f"{algorithm.value:>14}: {latency:8.1f} us/check  {commands}")
+
+    finally:
+        await rate_limit.client.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis-url", default="redis://localhost:6379/0")
+    parser.add_argument("--number", type=int, default=5000)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.redis_url, args.number))
+
+
+if __name__ == "__main__":
+    main()
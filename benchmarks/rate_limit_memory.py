@@ -0,0 +1,85 @@
+"""Redis memory per active user for each `RateLimitLayout`.
+
+Seeds the fixed window counters of synthetic users, each hitting a number of paths in the current window, and
+reports the growth of `used_memory`. Run it against a Redis nothing else is writing to. Seeded keys are deleted
+afterwards, and expire with their window anyway.
+
+Usage:
+    python -m benchmarks.rate_limit_memory [--redis-url redis://localhost:6379/0] [--users 20000] [--paths 8]
+"""
+import argparse
+import asyncio
+import uuid
+from time import time
+
+from redis.asyncio import Redis
+
+from src.app.core.utils import rate_limit
+from src.app.core.utils.rate_limit import RateLimitLayout, _window_counter
+from src.app.models.rate_limit import RateLimitAlgorithm
+
+PERIOD = 60
+BATCH_SIZE = 1000
+
+
+async def used_memory(client: Redis) -> int:
+    return (await client.info("memory"))["used_memory"]
+
+
+async def seed(client: Redis, layout: RateLimitLayout, prefix: str, users: int, paths: int) -> None:
+    script = rate_limit._get_script(RateLimitAlgorithm.FIXED_WINDOW)
+    current_timestamp = int(time())
+    window_start = current_timestamp - (current_timestamp % PERIOD)
+    reset_after = window_start + PERIOD - current_timestamp
+
+    for batch_start in range(0, users, BATCH_SIZE):
+        pipe = client.pipeline(transaction=False)
+        for user in range(batch_start, min(batch_start + BATCH_SIZE, users)):
+            for path in range(paths):
+                key, field = _window_counter(layout, f"{prefix}-{user}", f"api_v1_path_{path}", PERIOD, window_start)
+                await script(keys=[key], args=[reset_after, 1, *field], client=pipe)
+
+        await pipe.execute()
+
+
+async def delete_seeded(client: Redis, prefix: str) -> None:
+    keys = [key async for key in client.scan_iter(match=f"ratelimit:{prefix}-*", count=BATCH_SIZE)]
+    for batch_start in range(0, len(keys), BATCH_SIZE):
+        await client.unlink(*keys[batch_start : batch_start + BATCH_SIZE])
+
+
+async def run(redis_url: str, users: int, paths: int) -> None:
+    rate_limit.client = Redis.from_url(redis_url)
+    await rate_limit.load_scripts()
+
+    try:
+        results = {}
+        for layout in RateLimitLayout:
+            prefix = f"bench-{uuid.uuid4().hex[:8]}"
+            before = await used_memory(rate_limit.client)
+            await seed(rate_limit.client, layout, prefix, users, paths)
+            results[layout] = (await used_memory(rate_limit.client) - before) / users
+            await delete_seeded(rate_limit.client, prefix)
+
+        print(f"{users} users x {paths} paths:")
+        for layout, per_user in results.items():
+            print(f"  {layout.value:>4}: {per_user:8.0f} bytes/user")
+
+        print(f"  hash layout uses {results[RateLimitLayout.HASH] / results[RateLimitLayout.KEYS]:.0%} of the memory")
+
+    finally:
+        await rate_limit.client.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis-url", default="redis://localhost:6379/0")
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--paths", type=int, default=8)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.redis_url, args.users, args.paths))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Latency of a rate limit check with INCR followed by EXPIRE versus the preloaded fixed window script.
+
+The first request of every window costs two round trips with INCR and EXPIRE, and one with the script. Each check
+below uses a fresh key, which is the worst case for INCR and EXPIRE, then the same key, which is the common case.
+Run it against a local Redis; keys are written under the `bench:ratelimit:` prefix and expire after a minute.
+
+Usage:
+    python -m benchmarks.rate_limit_script [--redis-url redis://localhost:6379/0] [--number 5000]
+"""
+import argparse
+import asyncio
+import uuid
+from collections.abc import Awaitable, Callable
+from time import perf_counter
+
+from redis.asyncio import Redis
+
+from src.app.core.utils.rate_limit import FIXED_WINDOW_SCRIPT
+
+PERIOD = 60
+
+
+async def incr_then_expire(client: Redis, key: str) -> int:
+    count = await client.incr(key)
+    if count == 1:
+        await client.expire(key, PERIOD)
+
+    return count
+
+
+async def measure(check: Callable[[str], Awaitable[int]], number: int, fresh_keys: bool) -> float:
+    prefix = f"bench:ratelimit:{uuid.uuid4().hex}"
+    start_time = perf_counter()
+    for i in range(number):
+        await check(f"{prefix}:{i}" if fresh_keys else prefix)
+
+    return (perf_counter() - start_time) / number * 1e6
+
+
+async def run(redis_url: str, number: int) -> None:
+    client = Redis.from_url(redis_url)
+    script = client.register_script(FIXED_WINDOW_SCRIPT)
+    await client.script_load(FIXED_WINDOW_SCRIPT)
+
+    async def check_with_script(key: str) -> int:
+        count, _ = await script(keys=[key], args=[PERIOD])
+        return count
+
+    async def check_with_incr(key: str) -> int:
+        return await incr_then_expire(client, key)
+
+    try:
+        for label, fresh_keys in (("first hit", True), ("later hits", False)):
+            before = await measure(check_with_incr, number, fresh_keys)
+            after = await measure(check_with_script, number, fresh_keys)
+            print(f"{label}:")
+            print(f"  INCR + EXPIRE: {before:8.1f} us/check")
+            print(f"         script: {after:8.1f} us/check")
+
+    finally:
+        await client.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis-url", default="redis://localhost:6379/0")
+    parser.add_argument("--number", type=int, default=5000)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.redis_url, args.number))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Per-request cost of verifying an access token, with and without `VerifiedTokenCache`.
+
+Times the work `verify_token` does after the revocation check: decoding and verifying the JWT and building
+`TokenData`, against a cache hit. Requests cycle through a number of clients, each sending its own token, so the
+cache is sized to hold every one of them.
+
+Usage:
+    python -m benchmarks.token_verification [--clients 1000] [--requests 200000]
+"""
+import argparse
+from datetime import UTC, datetime, timedelta
+from time import perf_counter
+
+from jose import jwt
+
+from src.app.core.schemas import TokenData
+from src.app.core.utils.token_cache import VerifiedTokenCache
+from src.config.settings import get_settings
+
+settings = get_settings()
+
+
+def decode(token: str) -> TokenData:
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    return TokenData(username_or_email=payload["sub"])
+
+
+def decode_cached(cache: VerifiedTokenCache, token: str) -> TokenData:
+    token_data = cache.get(token)
+    if token_data is None:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        token_data = TokenData(username_or_email=payload["sub"])
+        cache.set(token, token_data, payload["exp"])
+
+    return token_data
+
+
+def per_request_us(verify, tokens: list[str], requests: int) -> float:
+    start = perf_counter()
+    for i in range(requests):
+        verify(tokens[i % len(tokens)])
+
+    return (perf_counter() - start) / requests * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=1000, help="distinct tokens")
+    parser.add_argument("--requests", type=int, default=200000, help="verifications per scenario")
+    args = parser.parse_args()
+
+    expire = datetime.now(UTC) + timedelta(hours=1)
+    tokens = [
+        jwt.encode({"sub": f"user{i}", "exp": expire}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        for i in range(args.clients)
+    ]
+    cache = VerifiedTokenCache(max_entries=args.clients)
+
+    before = per_request_us(decode, tokens, args.requests)
+    after = per_request_us(lambda token: decode_cached(cache, token), tokens, args.requests)
+
+    print(f"{args.clients} clients, {args.requests} requests:")
+    print(f"   jwt.decode: {before:6.2f} us/request")
+    print(f"       cached: {after:6.2f} us/request ({cache.stats.hits} hits, {cache.stats.misses} misses)")
+    print(f"      speedup: {before / after:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,12 +8,11 @@
 # from ..core.exceptions.http_exceptions import ForbiddenException, RateLimitException, UnauthorizedException
 # from ..core.logger import logging
 # from ..core.security import oauth2_scheme, verify_token
+# from ..core.utils import principal_cache, rate_limit_rules
 # from ..core.utils.rate_limit import is_rate_limited
-# from ..crud.crud_rate_limit import crud_rate_limits
-# from ..crud.crud_tier import crud_tiers
 # from ..crud.crud_users import crud_users
-# from ..models.user import User
-# from ..models.rate_limit import sanitize_path
+# from ..models.user import User, UserPrincipal
+# from ..models.rate_limit import RateLimitAlgorithm
 #
 # logger = logging.getLogger(__name__)
 #
@@ -24,16 +23,34 @@
 # async def get_current_user(
 #     token: Annotated[str, Depends(oauth2_scheme)], db: Annotated[AsyncSession, Depends(async_get_db)]
 # ) -> dict[str, Any] | None:
+#     """The authenticated user as a `UserPrincipal` dict, read from the claims of self-contained access tokens or
+#     cached per worker for `PRINCIPAL_CACHE_TTL` seconds."""
 #     token_data = await verify_token(token, db)
 #     if token_data is None:
 #         raise UnauthorizedException("User not authenticated.")
 #
-#     if "@" in token_data.username_or_email:
-#         user: dict | None = await crud_users.get(db=db, email=token_data.username_or_email, is_deleted=False)
+#     subject = token_data.username_or_email
+#     if token_data.uid is not None:
+#         return {
+#             "id": token_data.uid,
+#             "username": subject,
+#             "is_superuser": token_data.is_superuser,
+#             "tier_id": token_data.tier_id,
+#         }
+#
+#     user = principal_cache.get(subject)
+#     if user:
+#         return user
+#
+#     if "@" in subject:
+#         user: dict | None = await crud_users.get(
+#             db=db, schema_to_select=UserPrincipal, email=subject, is_deleted=False
+#         )
 #     else:
-#         user = await crud_users.get(db=db, username=token_data.username_or_email, is_deleted=False)
+#         user = await crud_users.get(db=db, schema_to_select=UserPrincipal, username=subject, is_deleted=False)
 #
 #     if user:
+#         principal_cache.store(subject, user)
 #         return user
 #
 #     raise UnauthorizedException("User not authenticated.")
@@ -75,17 +92,21 @@
 # async def rate_limiter(
 #     request: Request, db: Annotated[AsyncSession, Depends(async_get_db)], user: User | None = Depends(get_optional_user)
 # ) -> None:
-#     path = sanitize_path(request.url.path)
+#     # Match and count by route template, so that `/user/alice/posts` and `/user/bob/posts` share their rules
+#     route = request.scope.get("route")
+#     path = getattr(route, "path", request.url.path)
+#     algorithm = RateLimitAlgorithm.FIXED_WINDOW
 #     if user:
 #         user_id = user["id"]
-#         tier = await crud_tiers.get(db, id=user["tier_id"])
-#         if tier:
-#             rate_limit = await crud_rate_limits.get(db=db, tier_id=tier["id"], path=path)
-#             if rate_limit:
-#                 limit, period = rate_limit["limit"], rate_limit["period"]
+#         rules = rate_limit_rules.snapshot
+#         tier_name = rules.tiers.get(user["tier_id"])
+#         if tier_name is not None:
+#             rule = rules.match(user["tier_id"], path)
+#             if rule:
+#                 limit, period, algorithm, path = rule
 #             else:
 #                 logger.warning(
-#                     f"User {user_id} with tier '{tier['name']}' has no specific rate limit for path '{path}'. \
+#                     f"User {user_id} with tier '{tier_name}' has no specific rate limit for path '{path}'. \
 #                         Applying default rate limit."
 #                 )
 #                 limit, period = DEFAULT_LIMIT, DEFAULT_PERIOD
@@ -96,6 +117,8 @@
 #         user_id = request.client.host
 #         limit, period = DEFAULT_LIMIT, DEFAULT_PERIOD
 #
-#     is_limited = await is_rate_limited(db=db, user_id=user_id, path=path, limit=limit, period=period)
+#     is_limited = await is_rate_limited(
+#         db=db, user_id=user_id, path=path, limit=limit, period=period, algorithm=algorithm
+#     )
 #     if is_limited:
 #         raise RateLimitException("Rate limit exceeded.")
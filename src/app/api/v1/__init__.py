@@ -1,7 +1,11 @@
 from fastapi import APIRouter
+from .cache_stats import router as cache_stats_router
 from .health import router as health_router
 
 router = APIRouter()
 
 # Include health check route
 router.include_router(health_router)
+
+# Include cache stats routes, only served with the `CACHE_METRICS_TOKEN` bearer token
+router.include_router(cache_stats_router)
@@ -0,0 +1,62 @@
+import hmac
+from typing import Annotated, Dict
+
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import PlainTextResponse
+
+from src.config.settings import get_settings
+
+from ...core.exceptions.http_exceptions import NotFoundException, UnauthorizedException
+from ...core.utils import cache
+from ...core.utils.cache_metrics import render_prometheus
+from ...middleware.client_cache_middleware import NO_STORE, cache_policy
+
+settings = get_settings()
+
+router = APIRouter(tags=["Cache"])
+
+
+async def verify_metrics_token(authorization: Annotated[str | None, Header()] = None) -> None:
+    """Only let in requests with the `CACHE_METRICS_TOKEN` bearer token, e.g. from a Prometheus `authorization`
+    scrape config. Without a token configured, the endpoints do not exist.
+
+    Raises
+    ------
+    NotFoundException
+        If `CACHE_METRICS_TOKEN` is not set.
+    UnauthorizedException
+        If the request does not carry the token.
+    """
+    if not settings.CACHE_METRICS_TOKEN:
+        raise NotFoundException()
+
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), settings.CACHE_METRICS_TOKEN.encode()):
+        raise UnauthorizedException("Invalid metrics token.")
+
+
+async def _collect_stats() -> Dict:
+    if cache.client is None:
+        return cache.metrics.snapshot()
+
+    await cache.metrics.flush(cache.client)
+    return await cache.metrics.aggregated(cache.client)
+
+
+@router.get("/cache/stats", dependencies=[Depends(verify_metrics_token)], include_in_schema=False)
+@cache_policy(NO_STORE)
+async def read_cache_stats() -> Dict:
+    """Per-prefix cache counters of every worker process, and the local tier of this one."""
+    return {"prefixes": await _collect_stats(), "local": cache.local_cache.info()}
+
+
+@router.get(
+    "/cache/metrics",
+    dependencies=[Depends(verify_metrics_token)],
+    include_in_schema=False,
+    response_class=PlainTextResponse,
+)
+@cache_policy(NO_STORE)
+async def read_cache_metrics() -> str:
+    """Per-prefix cache counters of every worker process in the Prometheus text format."""
+    return render_prometheus(await _collect_stats())
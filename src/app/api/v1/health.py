@@ -1,9 +1,12 @@
 from fastapi import APIRouter
 from typing import Dict
 
+from ...middleware.client_cache_middleware import NO_STORE, cache_policy
+
 router = APIRouter(tags=["Health Check"])
 
 @router.get("/health", summary="Health Check", description="Check if the API is running")
+@cache_policy(NO_STORE)
 async def health_check() -> Dict:
     return {
         "status": "healthy",
@@ -10,12 +10,16 @@
 # from ...core.exceptions.http_exceptions import UnauthorizedException
 # from ...core.schemas import Token
 # from ...core.security import (
+#     ACCESS_TOKEN_CLAIMS,
 #     ACCESS_TOKEN_EXPIRE_MINUTES,
+#     access_token_data,
 #     authenticate_user,
 #     create_access_token,
 #     create_refresh_token,
 #     verify_token,
 # )
+# from ...crud.crud_users import crud_users
+# from ...models.user import UserPrincipal
 #
 # router = APIRouter(tags=["login"])
 #
@@ -31,7 +35,7 @@
 #         raise UnauthorizedException("Wrong username, email or password.")
 #
 #     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-#     access_token = await create_access_token(data={"sub": user["username"]}, expires_delta=access_token_expires)
+#     access_token = await create_access_token(data=access_token_data(user), expires_delta=access_token_expires)
 #
 #     refresh_token = await create_refresh_token(data={"sub": user["username"]})
 #     max_age = settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60
@@ -53,5 +57,20 @@
 #     if not user_data:
 #         raise UnauthorizedException("Invalid refresh token.")
 #
-#     new_access_token = await create_access_token(data={"sub": user_data.username_or_email})
+#     data = {"sub": user_data.username_or_email}
+#     if ACCESS_TOKEN_CLAIMS:
+#         # Read the claims again, this is what bounds their staleness
+#         if "@" in user_data.username_or_email:
+#             user = await crud_users.get(
+#                 db=db, schema_to_select=UserPrincipal, email=user_data.username_or_email, is_deleted=False
+#             )
+#         else:
+#             user = await crud_users.get(
+#                 db=db, schema_to_select=UserPrincipal, username=user_data.username_or_email, is_deleted=False
+#             )
+#         if not user:
+#             raise UnauthorizedException("Invalid refresh token.")
+#         data = access_token_data(user)
+#
+#     new_access_token = await create_access_token(data=data)
 #     return {"access_token": new_access_token, "token_type": "bearer"}
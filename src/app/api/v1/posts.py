@@ -5,13 +5,14 @@ from fastcrud.paginated import PaginatedListResponse, compute_offset, paginated_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...api.dependencies import get_current_superuser, get_current_user
-from ...core.db.database import async_get_db
+from ...core.db.database import async_get_db, local_session
 from ...core.exceptions.http_exceptions import ForbiddenException, NotFoundException
-from ...core.utils.cache import cache
+from ...core.utils.cache import cache, invalidate_tags
 from ...crud.crud_posts import crud_posts
 from ...crud.crud_users import crud_users
+from ...middleware.client_cache_middleware import cache_policy
 from ...models.post import PostCreate, PostCreateInternal, PostRead, PostUpdate
-from ...models.user import UserRead
+from ...models.user import UserPrincipal, UserRead
 
 router = APIRouter(tags=["posts"])
 
@@ -21,7 +22,7 @@ async def write_post(
     request: Request,
     username: str,
     post: PostCreate,
-    current_user: Annotated[UserRead, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipal, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(async_get_db)],
 ) -> PostRead:
     db_user = await crud_users.get(db=db, schema_to_select=UserRead, username=username, is_deleted=False)
@@ -36,14 +37,23 @@ async def write_post(
 
     post_internal = PostCreateInternal(**post_internal_dict)
     created_post: PostRead = await crud_posts.create(db=db, object=post_internal)
+    await invalidate_tags(f"{username}_posts", f"{username}_post_lookups")
     return created_post
 
 
 @router.get("/{username}/posts", response_model=PaginatedListResponse[PostRead])
+@cache_policy(max_age=30, s_maxage=60, stale_while_revalidate=30)
 @cache(
     key_prefix="{username}_posts:page_{page}:items_per_page:{items_per_page}",
     resource_id_name="username",
     expiration=60,
+    single_flight=True,
+    stale_ttl=30,
+    session_factory=local_session,
+    tags=["{username}_posts"],
+    raw_response=True,
+    response_model=PaginatedListResponse[PostRead],
+    not_found_expiration=10,
 )
 async def read_posts(
     request: Request,
@@ -70,7 +80,17 @@ async def read_posts(
 
 
 @router.get("/{username}/post/{id}", response_model=PostRead)
-@cache(key_prefix="{username}_post_cache", resource_id_name="id")
+@cache_policy(max_age=30, s_maxage=300, stale_while_revalidate=30)
+@cache(
+    key_prefix="{username}_post_cache",
+    resource_id_name="id",
+    local_expiration=30,
+    fire_and_forget=True,
+    raw_response=True,
+    response_model=PostRead,
+    not_found_expiration=10,
+    tags=["{username}_post_lookups"],
+)
 async def read_post(
     request: Request, username: str, id: int, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> dict:
@@ -88,13 +108,13 @@ async def read_post(
 
 
 @router.patch("/{username}/post/{id}")
-@cache("{username}_post_cache", resource_id_name="id", pattern_to_invalidate_extra=["{username}_posts:*"])
+@cache("{username}_post_cache", resource_id_name="id", tags_to_invalidate=["{username}_posts"])
 async def patch_post(
     request: Request,
     username: str,
     id: int,
     values: PostUpdate,
-    current_user: Annotated[UserRead, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipal, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(async_get_db)],
 ) -> dict[str, str]:
     db_user = await crud_users.get(db=db, schema_to_select=UserRead, username=username, is_deleted=False)
@@ -113,12 +133,12 @@ async def patch_post(
 
 
 @router.delete("/{username}/post/{id}")
-@cache("{username}_post_cache", resource_id_name="id", to_invalidate_extra={"{username}_posts": "{username}"})
+@cache("{username}_post_cache", resource_id_name="id", tags_to_invalidate=["{username}_posts"])
 async def erase_post(
     request: Request,
     username: str,
     id: int,
-    current_user: Annotated[UserRead, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipal, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(async_get_db)],
 ) -> dict[str, str]:
     db_user = await crud_users.get(db=db, schema_to_select=UserRead, username=username, is_deleted=False)
@@ -138,7 +158,7 @@ async def erase_post(
 
 
 @router.delete("/{username}/db_post/{id}", dependencies=[Depends(get_current_superuser)])
-@cache("{username}_post_cache", resource_id_name="id", to_invalidate_extra={"{username}_posts": "{username}"})
+@cache("{username}_post_cache", resource_id_name="id", tags_to_invalidate=["{username}_posts"])
 async def erase_db_post(
     request: Request, username: str, id: int, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> dict[str, str]:
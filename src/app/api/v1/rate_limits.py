@@ -6,7 +6,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...api.dependencies import get_current_superuser
 from ...core.db.database import async_get_db
-from ...core.exceptions.http_exceptions import DuplicateValueException, NotFoundException, RateLimitException
+from ...core.exceptions.http_exceptions import (
+    DuplicateValueException,
+    NotFoundException,
+    RateLimitException,
+    UnprocessableEntityException,
+)
+from ...core.utils.path_index import check_pattern
+from ...core.utils.rate_limit_rules import notify_rules_changed
 from ...crud.crud_rate_limit import crud_rate_limits
 from ...crud.crud_tier import crud_tiers
 from ...models.rate_limit import RateLimitCreate, RateLimitCreateInternal, RateLimitRead, RateLimitUpdate
@@ -14,10 +21,19 @@ from ...models.rate_limit import RateLimitCreate, RateLimitCreateInternal, RateL
 router = APIRouter(tags=["rate_limits"])
 
 
+def _check_path(path: str) -> None:
+    # Rejected here, rather than skipped with an error when the rules are loaded
+    try:
+        check_pattern(path)
+    except ValueError as e:
+        raise UnprocessableEntityException(str(e))
+
+
 @router.post("/tier/{tier_name}/rate_limit", dependencies=[Depends(get_current_superuser)], status_code=201)
 async def write_rate_limit(
     request: Request, tier_name: str, rate_limit: RateLimitCreate, db: Annotated[AsyncSession, Depends(async_get_db)]
 ) -> RateLimitRead:
+    _check_path(rate_limit.path)
     db_tier = await crud_tiers.get(db=db, name=tier_name)
     if not db_tier:
         raise NotFoundException("Tier not found")
@@ -31,6 +47,7 @@ async def write_rate_limit(
 
     rate_limit_internal = RateLimitCreateInternal(**rate_limit_internal_dict)
     created_rate_limit: RateLimitRead = await crud_rate_limits.create(db=db, object=rate_limit_internal)
+    await notify_rules_changed()
     return created_rate_limit
 
 
@@ -83,6 +100,9 @@ async def patch_rate_limit(
     values: RateLimitUpdate,
     db: Annotated[AsyncSession, Depends(async_get_db)],
 ) -> dict[str, str]:
+    if values.path is not None:
+        _check_path(values.path)
+
     db_tier = await crud_tiers.get(db=db, name=tier_name)
     if db_tier is None:
         raise NotFoundException("Tier not found")
@@ -100,6 +120,7 @@ async def patch_rate_limit(
         raise DuplicateValueException("There is already a rate limit with this name")
 
     await crud_rate_limits.update(db=db, object=values, id=db_rate_limit["id"])
+    await notify_rules_changed()
     return {"message": "Rate Limit updated"}
 
 
@@ -116,4 +137,5 @@ async def erase_rate_limit(
         raise NotFoundException("Rate Limit not found")
 
     await crud_rate_limits.delete(db=db, id=db_rate_limit["id"])
+    await notify_rules_changed()
     return {"message": "Rate Limit deleted"}
@@ -7,7 +7,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from ...api.dependencies import get_current_superuser
 from ...core.db.database import async_get_db
 from ...core.exceptions.http_exceptions import DuplicateValueException, NotFoundException
+from ...core.utils.rate_limit_rules import notify_rules_changed
 from ...crud.crud_tier import crud_tiers
+from ...middleware.client_cache_middleware import cache_policy
 from ...models.tier import TierCreate, TierCreateInternal, TierRead, TierUpdate
 
 router = APIRouter(tags=["tiers"])
@@ -24,10 +26,12 @@ async def write_tier(
 
     tier_internal = TierCreateInternal(**tier_internal_dict)
     created_tier: TierRead = await crud_tiers.create(db=db, object=tier_internal)
+    await notify_rules_changed()
     return created_tier
 
 
 @router.get("/tiers", response_model=PaginatedListResponse[TierRead])
+@cache_policy(max_age=60, s_maxage=600, stale_while_revalidate=60)
 async def read_tiers(
     request: Request, db: Annotated[AsyncSession, Depends(async_get_db)], page: int = 1, items_per_page: int = 10
 ) -> dict:
@@ -40,6 +44,7 @@ async def read_tiers(
 
 
 @router.get("/tier/{name}", response_model=TierRead)
+@cache_policy(max_age=60, s_maxage=600, stale_while_revalidate=60)
 async def read_tier(request: Request, name: str, db: Annotated[AsyncSession, Depends(async_get_db)]) -> dict:
     db_tier: TierRead | None = await crud_tiers.get(db=db, schema_to_select=TierRead, name=name)
     if db_tier is None:
@@ -57,6 +62,7 @@ async def patch_tier(
         raise NotFoundException("Tier not found")
 
     await crud_tiers.update(db=db, object=values, name=name)
+    await notify_rules_changed()
     return {"message": "Tier updated"}
 
 
@@ -67,4 +73,5 @@ async def erase_tier(request: Request, name: str, db: Annotated[AsyncSession, De
         raise NotFoundException("Tier not found")
 
     await crud_tiers.delete(db=db, name=name)
+    await notify_rules_changed()
     return {"message": "Tier deleted"}
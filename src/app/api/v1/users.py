@@ -8,11 +8,13 @@ from ...api.dependencies import get_current_superuser, get_current_user
 from ...core.db.database import async_get_db
 from ...core.exceptions.http_exceptions import DuplicateValueException, ForbiddenException, NotFoundException
 from ...core.security import blacklist_token, get_password_hash, oauth2_scheme
+from ...core.utils import principal_cache
 from ...crud.crud_rate_limit import crud_rate_limits
 from ...crud.crud_tier import crud_tiers
 from ...crud.crud_users import crud_users
+from ...middleware.client_cache_middleware import cache_policy
 from ...models.tier import Tier, TierRead
-from ...models.user import UserCreate, UserCreateInternal, UserRead, UserTierUpdate, UserUpdate
+from ...models.user import UserCreate, UserCreateInternal, UserPrincipal, UserRead, UserTierUpdate, UserUpdate
 
 router = APIRouter(tags=["users"])
 
@@ -30,7 +32,7 @@ async def write_user(
         raise DuplicateValueException("Username not available")
 
     user_internal_dict = user.model_dump()
-    user_internal_dict["hashed_password"] = get_password_hash(password=user_internal_dict["password"])
+    user_internal_dict["hashed_password"] = await get_password_hash(password=user_internal_dict["password"])
     del user_internal_dict["password"]
 
     user_internal = UserCreateInternal(**user_internal_dict)
@@ -55,11 +57,21 @@ async def read_users(
 
 
 @router.get("/user/me/", response_model=UserRead)
-async def read_users_me(request: Request, current_user: Annotated[UserRead, Depends(get_current_user)]) -> UserRead:
-    return current_user
+@cache_policy(private=True, vary=("Authorization",))
+async def read_users_me(
+    request: Request,
+    current_user: Annotated[UserPrincipal, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(async_get_db)],
+) -> dict:
+    db_user = await crud_users.get(db=db, schema_to_select=UserRead, id=current_user["id"], is_deleted=False)
+    if db_user is None:
+        raise NotFoundException("User not found")
+
+    return db_user
 
 
 @router.get("/user/{username}", response_model=UserRead)
+@cache_policy(max_age=30, s_maxage=300, stale_while_revalidate=30)
 async def read_user(request: Request, username: str, db: Annotated[AsyncSession, Depends(async_get_db)]) -> dict:
     db_user: UserRead | None = await crud_users.get(
         db=db, schema_to_select=UserRead, username=username, is_deleted=False
@@ -75,7 +87,7 @@ async def patch_user(
     request: Request,
     values: UserUpdate,
     username: str,
-    current_user: Annotated[UserRead, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipal, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(async_get_db)],
 ) -> dict[str, str]:
     db_user = await crud_users.get(db=db, schema_to_select=UserRead, username=username)
@@ -96,6 +108,7 @@ async def patch_user(
             raise DuplicateValueException("Email is already registered")
 
     await crud_users.update(db=db, object=values, username=username)
+    await principal_cache.evict(username)
     return {"message": "User updated"}
 
 
@@ -103,7 +116,7 @@ async def patch_user(
 async def erase_user(
     request: Request,
     username: str,
-    current_user: Annotated[UserRead, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipal, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(async_get_db)],
     token: str = Depends(oauth2_scheme),
 ) -> dict[str, str]:
@@ -115,6 +128,7 @@ async def erase_user(
         raise ForbiddenException()
 
     await crud_users.delete(db=db, username=username)
+    await principal_cache.evict(username)
     await blacklist_token(token=token, db=db)
     return {"message": "User deleted"}
 
@@ -131,6 +145,7 @@ async def erase_db_user(
         raise NotFoundException("User not found")
 
     await crud_users.db_delete(db=db, username=username)
+    await principal_cache.evict(username)
     await blacklist_token(token=token, db=db)
     return {"message": "User deleted from the database"}
 
@@ -195,4 +210,5 @@ async def patch_user_tier(
         raise NotFoundException("Tier not found")
 
     await crud_users.update(db=db, object=values, username=username)
+    await principal_cache.evict(username)
     return {"message": f"User {db_user['name']} Tier updated"}
@@ -14,3 +14,21 @@ class MissingClientError(Exception):
     def __init__(self, message: str = "Client is None.") -> None:
         self.message = message
         super().__init__(self.message)
+
+
+class UnsupportedCodecError(Exception):
+    def __init__(self, message: str = "Cache codec not supported.") -> None:
+        self.message = message
+        super().__init__(self.message)
+
+
+class CacheKeyTemplateError(Exception):
+    def __init__(self, message: str = "Invalid cache key template.") -> None:
+        self.message = message
+        super().__init__(self.message)
+
+
+class MissingSessionFactoryError(Exception):
+    def __init__(self, message: str = "Background refreshes need a session factory.") -> None:
+        self.message = message
+        super().__init__(self.message)
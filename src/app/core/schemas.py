@@ -55,6 +55,11 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username_or_email: str
+    jti: str | None = None
+    # Set only for self-contained access tokens whose claims are fresh enough, see `ACCESS_TOKEN_CLAIMS`
+    uid: int | None = None
+    tier_id: int | None = None
+    is_superuser: bool | None = None
 
 
 class TokenBlacklistBase(BaseModel):
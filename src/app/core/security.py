@@ -1,32 +1,41 @@
+import uuid
 from datetime import UTC, datetime, timedelta
+from time import time
 from typing import Any, Literal
 
-import bcrypt
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.config.settings import get_settings
+
 from ..crud.crud_users import crud_users
-from .config import settings
 from .db.crud_token_blacklist import crud_token_blacklist
 from .schemas import TokenBlacklistCreate, TokenData
+from .utils import token_blacklist
+from .utils.password_hasher import password_hasher
+from .utils.token_cache import verified_tokens
+
+settings = get_settings()
 
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 REFRESH_TOKEN_EXPIRE_DAYS = settings.REFRESH_TOKEN_EXPIRE_DAYS
+ACCESS_TOKEN_CLAIMS = settings.ACCESS_TOKEN_CLAIMS
+ACCESS_TOKEN_MAX_STALENESS = timedelta(
+    minutes=min(settings.ACCESS_TOKEN_MAX_STALENESS_MINUTES, ACCESS_TOKEN_EXPIRE_MINUTES)
+)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/login")
 
 
 async def verify_password(plain_password: str, hashed_password: str) -> bool:
-    correct_password: bool = bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
-    return correct_password
+    return await password_hasher.verify(plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
-    hashed_password: str = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
-    return hashed_password
+async def get_password_hash(password: str) -> str:
+    return await password_hasher.hash(password)
 
 
 async def authenticate_user(username_or_email: str, password: str, db: AsyncSession) -> dict[str, Any] | Literal[False]:
@@ -44,13 +53,24 @@ async def authenticate_user(username_or_email: str, password: str, db: AsyncSess
     return db_user
 
 
+def access_token_data(user: dict[str, Any]) -> dict[str, Any]:
+    """Claims of an access token for a user: its username, and with `ACCESS_TOKEN_CLAIMS` its id, tier and role,
+    so that requests are authorized from the token alone."""
+    data: dict[str, Any] = {"sub": user["username"]}
+    if ACCESS_TOKEN_CLAIMS:
+        data.update({"uid": user["id"], "tier_id": user["tier_id"], "is_superuser": user["is_superuser"]})
+
+    return data
+
+
 async def create_access_token(data: dict[str, Any], expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
+    issued_at = datetime.now(UTC).replace(tzinfo=None)
     if expires_delta:
-        expire = datetime.now(UTC).replace(tzinfo=None) + expires_delta
+        expire = issued_at + expires_delta
     else:
-        expire = datetime.now(UTC).replace(tzinfo=None) + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+        expire = issued_at + timedelta(minutes=15)
+    to_encode.update({"exp": expire, "iat": issued_at, "jti": uuid.uuid4().hex})
     encoded_jwt: str = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -66,6 +86,26 @@ async def create_refresh_token(data: dict[str, Any], expires_delta: timedelta |
     return encoded_jwt
 
 
+def _token_data(payload: dict[str, Any]) -> tuple[TokenData, float] | None:
+    """TokenData of a verified payload, and until when it holds. The user id, tier and role claims are only kept
+    for `ACCESS_TOKEN_MAX_STALENESS` after the token was issued."""
+    username_or_email: str | None = payload.get("sub")
+    if username_or_email is None:
+        return None
+
+    token_data = TokenData(username_or_email=username_or_email, jti=payload.get("jti"))
+    expires_at = payload.get("exp", 0)
+    if ACCESS_TOKEN_CLAIMS and "uid" in payload:
+        claims_expire_at = payload.get("iat", 0) + ACCESS_TOKEN_MAX_STALENESS.total_seconds()
+        if claims_expire_at > time():
+            token_data.uid = payload["uid"]
+            token_data.tier_id = payload.get("tier_id")
+            token_data.is_superuser = payload.get("is_superuser", False)
+            expires_at = min(expires_at, claims_expire_at)
+
+    return token_data, expires_at
+
+
 async def verify_token(token: str, db: AsyncSession) -> TokenData | None:
     """Verify a JWT token and return TokenData if valid.
 
@@ -80,23 +120,44 @@ async def verify_token(token: str, db: AsyncSession) -> TokenData | None:
     -------
     TokenData | None
         TokenData instance if the token is valid, None otherwise.
+
+    Note
+    ----
+        - Tokens verified before are answered from `verified_tokens` until they expire.
+        - Revocation is checked on every call, by `jti` when the token has one. Revoked tokens are looked up in
+          Redis when it is configured, see `token_blacklist`, and in the `TokenBlacklist` table otherwise.
+        - The user id, tier and role of self-contained access tokens are only set while fresher than
+          `ACCESS_TOKEN_MAX_STALENESS`, see `access_token_data`.
     """
-    is_blacklisted = await crud_token_blacklist.exists(db, token=token)
-    if is_blacklisted:
-        return None
+    token_data = verified_tokens.get(token)
+    if token_data is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            return None
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username_or_email: str = payload.get("sub")
-        if username_or_email is None:
+        verified = _token_data(payload)
+        if verified is None:
             return None
-        return TokenData(username_or_email=username_or_email)
 
-    except JWTError:
+        token_data, expires_at = verified
+        verified_tokens.set(token, token_data, expires_at)
+
+    if token_blacklist.client is not None:
+        is_blacklisted = await token_blacklist.is_revoked(token, token_data.jti)
+    else:
+        is_blacklisted = await crud_token_blacklist.exists(db, token=token)
+    if is_blacklisted:
         return None
 
+    return token_data
+
 
 async def blacklist_token(token: str, db: AsyncSession) -> None:
     payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    if token_blacklist.client is not None:
+        await token_blacklist.revoke(token, payload.get("exp"), payload.get("jti"))
+        return
+
     expires_at = datetime.fromtimestamp(payload.get("exp"))
     await crud_token_blacklist.create(db, object=TokenBlacklistCreate(**{"token": token, "expires_at": expires_at}))
@@ -0,0 +1,76 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter of strings, for membership tests that may return false positives but never false
+    negatives.
+
+    Parameters
+    ----------
+    capacity: int
+        Number of items the filter is sized for.
+    false_positive_rate: float
+        False positive rate once `capacity` items are added. Memory grows with `-log(false_positive_rate)`.
+
+    Attributes
+    ----------
+    size: int
+        Number of bits.
+    hash_count: int
+        Number of bits set per item.
+    count: int
+        Number of items added.
+
+    Note
+    ----
+        - Bit positions are derived from one 128-bit BLAKE2b digest per item with double hashing.
+        - Past `capacity` the filter keeps working, but its false positive rate degrades. `info()` reports the
+          rate to expect at the current fill.
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float) -> None:
+        if capacity <= 0 or not 0 < false_positive_rate < 1:
+            raise ValueError("capacity must be positive and false_positive_rate between 0 and 1")
+
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        self.size = math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> list[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._bits)
+
+    def estimated_false_positive_rate(self) -> float:
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
+
+    def info(self) -> dict[str, float]:
+        return {
+            "capacity": self.capacity,
+            "count": self.count,
+            "size_bits": self.size,
+            "hash_count": self.hash_count,
+            "memory_bytes": self.memory_bytes,
+            "target_false_positive_rate": self.false_positive_rate,
+            "estimated_false_positive_rate": self.estimated_false_positive_rate(),
+        }
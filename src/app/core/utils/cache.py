@@ -1,145 +1,241 @@
+import asyncio
 import functools
+import inspect
 import json
+import logging
+import math
+import random
 import re
-from collections.abc import Callable
-from typing import Any
-
-from fastapi import Request, Response
+import string
+import types
+import typing
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable, Collection, Coroutine
+from time import monotonic, time
+from typing import Any, NamedTuple
+
+from fastapi import HTTPException, Request, Response, status
 from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
 from redis.asyncio import ConnectionPool, Redis
-
-from ..exceptions.cache_exceptions import CacheIdentificationInferenceError, InvalidRequestError, MissingClientError
+from redis.asyncio.client import Pipeline
+from redis.commands.core import AsyncScript
+from redis.exceptions import NoScriptError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.settings import get_settings
+
+from ..exceptions.cache_exceptions import (
+    CacheIdentificationInferenceError,
+    CacheKeyTemplateError,
+    InvalidRequestError,
+    MissingClientError,
+    MissingSessionFactoryError,
+    UnsupportedCodecError,
+)
+from ..exceptions.http_exceptions import NotFoundException
+from .cache_codecs import (
+    CachedBody,
+    CachedNotFound,
+    ETaggedRawCodec,
+    NotFoundCodec,
+    decode_entry,
+    encode_entry,
+    get_codec,
+    get_compressor,
+)
+from .cache_metrics import CacheMetricsRegistry, flush_periodically
+from .etag import compute_etag, etag_matches
+from .local_cache import LocalCache
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
 
 pool: ConnectionPool | None = None
 client: Redis | None = None
 
+local_cache = LocalCache(max_entries=settings.CACHE_LOCAL_MAX_ENTRIES, max_bytes=settings.CACHE_LOCAL_MAX_BYTES)
+INVALIDATION_CHANNEL = settings.CACHE_INVALIDATION_CHANNEL
+metrics = CacheMetricsRegistry()
 
-def _infer_resource_id(kwargs: dict[str, Any], resource_id_type: type | tuple[type, ...]) -> int | str:
-    """Infer the resource ID from a dictionary of keyword arguments.
-
-    Parameters
-    ----------
-    kwargs: Dict[str, Any]
-        A dictionary of keyword arguments.
-    resource_id_type: Union[type, Tuple[type, ...]]
-        The expected type of the resource ID, which can be integer (int) or a string (str).
-
-    Returns
-    -------
-    Union[None, int, str]
-        The inferred resource ID. If it cannot be inferred or does not match the expected type, it returns None.
+_instance_id = uuid.uuid4().hex
+_local_cache_in_use = False
+_listener_task: asyncio.Task | None = None
+_metrics_task: asyncio.Task | None = None
+_inflight: dict[str, asyncio.Future] = {}
+_background_tasks: set[asyncio.Task] = set()
 
-    Note
-    ----
-        - When `resource_id_type` is `int`, the function looks for an argument with the key 'id'.
-        - When `resource_id_type` is `str`, it attempts to infer the resource ID as a string.
-    """
-    resource_id: int | str | None = None
-    for arg_name, arg_value in kwargs.items():
-        if isinstance(arg_value, resource_id_type):
-            if (resource_id_type is int) and ("id" in arg_name):
-                resource_id = arg_value
+_MISS = object()
+_NOT_FOUND_CODEC = NotFoundCodec()
 
-            elif (resource_id_type is int) and ("id" not in arg_name):
-                pass
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
 
-            elif resource_id_type is str:
-                resource_id = arg_value
+# Only the tag is touched, its members may live on other cluster nodes and are unlinked by the caller
+_POP_TAG_SCRIPT = """
+local members = redis.call("SMEMBERS", KEYS[1])
+redis.call("UNLINK", KEYS[1])
+return members
+"""
 
-    if resource_id is None:
-        raise CacheIdentificationInferenceError
+_registered_scripts: dict[str, AsyncScript] = {}
 
-    return resource_id
+TAG_GC_PROBABILITY = 0.01
+UNLINK_BATCH_SIZE = 1000
 
 
-def _extract_data_inside_brackets(input_string: str) -> list[str]:
-    """Extract data inside curly brackets from a given string using regular expressions.
+def _extract_template_fields(template: str) -> list[str]:
+    """Extract the names of the parameters referenced by a cache key template.
 
     Parameters
     ----------
-    input_string: str
-        The input string in which to find data enclosed within curly brackets.
+    template: str
+        A `str.format` template, e.g. a key prefix or a tag.
 
     Returns
     -------
     List[str]
-        A list of strings containing the data found inside the curly brackets within the input string.
+        The parameter names, without attribute or item access.
+
+    Raises
+    ------
+    CacheKeyTemplateError
+        If the template is malformed or uses positional fields.
 
     Example
     -------
-    >>> _extract_data_inside_brackets("The {quick} brown {fox} jumps over the {lazy} dog.")
-    ['quick', 'fox', 'lazy']
+    >>> _extract_template_fields("{username}_posts:page_{page}:{user.tier_id}")
+    ['username', 'page', 'user']
     """
-    data_inside_brackets = re.findall(r"{(.*?)}", input_string)
-    return data_inside_brackets
+    try:
+        parsed_template = list(string.Formatter().parse(template))
+    except ValueError as e:
+        raise CacheKeyTemplateError(f"Invalid cache key template '{template}': {e}") from e
 
+    fields = []
+    for _, field_name, _, _ in parsed_template:
+        if field_name is None:
+            continue
 
-def _construct_data_dict(data_inside_brackets: list[str], kwargs: dict[str, Any]) -> dict[str, Any]:
-    """Construct a dictionary based on data inside brackets and keyword arguments.
+        name = re.split(r"[.\[]", field_name, maxsplit=1)[0]
+        if not name.isidentifier():
+            raise CacheKeyTemplateError(f"Cache key template '{template}' must only use named fields.")
 
-    Parameters
-    ----------
-    data_inside_brackets: List[str]
-        A list of keys inside brackets.
-    kwargs: Dict[str, Any]
-        A dictionary of keyword arguments.
+        fields.append(name)
 
-    Returns
-    -------
-    Dict[str, Any]: A dictionary with keys from data_inside_brackets and corresponding values from kwargs.
-    """
-    data_dict = {}
-    for key in data_inside_brackets:
-        data_dict[key] = kwargs[key]
-    return data_dict
+    return fields
 
 
-def _format_prefix(prefix: str, kwargs: dict[str, Any]) -> str:
-    """Format a prefix using keyword arguments.
+def _compile_template(template: str, parameters: Collection[str]) -> Callable[[dict[str, Any]], str]:
+    """Compile a cache key template against the parameters of the decorated function.
 
     Parameters
     ----------
-    prefix: str
-        The prefix template to be formatted.
-    kwargs: Dict[str, Any]
-        A dictionary of keyword arguments.
+    template: str
+        A `str.format` template, e.g. a key prefix or a tag.
+    parameters: Collection[str]
+        Parameter names of the decorated function.
 
     Returns
     -------
-    str: The formatted prefix.
+    Callable[[Dict[str, Any]], str]
+        Formats the template from the keyword arguments of a call in a single step.
+
+    Raises
+    ------
+    CacheKeyTemplateError
+        If the template is malformed or references a parameter the function does not have.
     """
-    data_inside_brackets = _extract_data_inside_brackets(prefix)
-    data_dict = _construct_data_dict(data_inside_brackets, kwargs)
-    formatted_prefix = prefix.format(**data_dict)
-    return formatted_prefix
+    for field in _extract_template_fields(template):
+        if field not in parameters:
+            raise CacheKeyTemplateError(f"Cache key template '{template}' references unknown parameter '{field}'.")
+
+    return template.format_map
+
+
+def _annotated_types(annotation: Any) -> tuple[Any, ...]:
+    """The types a parameter annotation accepts, unwrapping `Annotated[...]` and unions such as `int | None`."""
+    if typing.get_origin(annotation) is typing.Annotated:
+        return _annotated_types(typing.get_args(annotation)[0])
+
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+        return tuple(arg for member in typing.get_args(annotation) for arg in _annotated_types(member))
 
+    return (annotation,)
 
-def _format_extra_data(to_invalidate_extra: dict[str, str], kwargs: dict[str, Any]) -> dict[str, Any]:
-    """Format extra data based on provided templates and keyword arguments.
 
-    This function takes a dictionary of templates and their associated values and a dictionary of keyword arguments.
-    It formats the templates with the corresponding values from the keyword arguments and returns a dictionary
-    where keys are the formatted templates and values are the associated keyword argument values.
+def _resolve_resource_id_name(
+    func: Callable, resource_id_name: str | None, resource_id_type: type | tuple[type, ...]
+) -> str:
+    """Bind the resource ID of a cache key to one of the decorated function's parameters.
 
     Parameters
     ----------
-    to_invalidate_extra: Dict[str, str]
-        A dictionary where keys are templates and values are the associated values.
-    kwargs: Dict[str, Any]
-        A dictionary of keyword arguments.
+    func: Callable
+        The decorated function.
+    resource_id_name: str | None
+        The explicitly configured parameter name, if any.
+    resource_id_type: Union[type, Tuple[type, ...]]
+        The expected type of the resource ID, which can be integer (int) or a string (str).
 
     Returns
     -------
-        Dict[str, Any]: A dictionary where keys are formatted templates and values
-        are associated keyword argument values.
+    str
+        The name of the parameter holding the resource ID.
+
+    Raises
+    ------
+    CacheKeyTemplateError
+        If `resource_id_name` is not a parameter of `func`.
+    CacheIdentificationInferenceError
+        If no parameter matches `resource_id_type`.
+
+    Note
+    ----
+        - When `resource_id_type` is `int`, the last parameter annotated as `int` whose name contains 'id' is used.
+        - When `resource_id_type` is `str`, the last parameter annotated as `str` is used.
+        - Annotations are matched through `Annotated[...]` and unions, e.g. `Annotated[int, Path()]` or
+          `int | None`.
     """
-    formatted_extra = {}
-    for prefix, id_template in to_invalidate_extra.items():
-        formatted_prefix = _format_prefix(prefix, kwargs)
-        id = _extract_data_inside_brackets(id_template)[0]
-        formatted_extra[formatted_prefix] = kwargs[id]
+    parameters = inspect.signature(func).parameters
+    if resource_id_name:
+        if resource_id_name not in parameters:
+            raise CacheKeyTemplateError(f"'{func.__name__}' has no parameter named '{resource_id_name}'.")
+
+        return resource_id_name
 
-    return formatted_extra
+    expected_types = resource_id_type if isinstance(resource_id_type, tuple) else (resource_id_type,)
+    annotations = typing.get_type_hints(func)
+    inferred_name = None
+    for name in parameters:
+        accepted_types = _annotated_types(annotations.get(name))
+        if int in expected_types and int in accepted_types and "id" in name:
+            inferred_name = name
+
+        elif str in expected_types and str in accepted_types:
+            inferred_name = name
+
+    if inferred_name is None:
+        raise CacheIdentificationInferenceError(f"Could not infer id for resource being cached by '{func.__name__}'.")
+
+    return inferred_name
+
+
+def _session_parameters(func: Callable) -> list[str]:
+    """Names of the parameters of `func` annotated as an `AsyncSession`, including through `Annotated` and unions."""
+    annotations = typing.get_type_hints(func)
+    return [
+        name
+        for name in inspect.signature(func).parameters
+        if any(
+            inspect.isclass(arg) and issubclass(arg, AsyncSession) for arg in _annotated_types(annotations.get(name))
+        )
+    ]
 
 
 async def _delete_keys_by_pattern(pattern: str) -> None:
@@ -181,13 +277,501 @@ async def _delete_keys_by_pattern(pattern: str) -> None:
             await client.delete(*keys)
 
 
+def _render_json(value: Any) -> bytes:
+    """Encode a value exactly as FastAPI's `JSONResponse` does, so that cached bodies and their ETags match."""
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def _tag_key(tag: str) -> str:
+    return f"tag:{tag}"
+
+
+def _get_script(source: str) -> AsyncScript:
+    if client is None:
+        raise MissingClientError
+
+    script = _registered_scripts.get(source)
+    if script is None or script.registered_client is not client:
+        script = _registered_scripts[source] = client.register_script(source)
+
+    return script
+
+
+async def load_scripts() -> None:
+    """Preload the cache scripts into Redis, so that pipelines can run them by SHA without checking first.
+
+    Does nothing if the Redis client is not initialized.
+    """
+    if client is None:
+        return
+
+    for source in (_RELEASE_LOCK_SCRIPT, _POP_TAG_SCRIPT):
+        await client.script_load(_get_script(source).script)
+
+
+def _queue_fill(pipe: Pipeline, cache_key: str, serialized_data: bytes, expiration: int, tags: list[str]) -> None:
+    """Queue the commands that write a cache entry and register it under its tags.
+
+    Each tag is a Redis set of cache keys. Its TTL is set if it has none and otherwise only ever extended, so a tag
+    outlives every entry registered under it. `EXPIRE` with `NX` and `GT` requires Redis 7.
+
+    Parameters
+    ----------
+    pipe: Pipeline
+        The pipeline the commands are added to.
+    cache_key: str
+        The cache key being written.
+    serialized_data: bytes
+        The encoded entry to store.
+    expiration: int
+        Redis TTL of the cache entry in seconds.
+    tags: List[str]
+        Formatted tag names.
+    """
+    pipe.set(cache_key, serialized_data, ex=expiration)
+    for tag in tags:
+        tag_key = _tag_key(tag)
+        pipe.sadd(tag_key, cache_key)
+        pipe.expire(tag_key, expiration, nx=True)
+        pipe.expire(tag_key, expiration, gt=True)
+
+
+async def _pop_tags(keys: list[str], tags: list[str]) -> list[bytes]:
+    """Unlink `keys`, and read and delete every tag atomically in the same pipeline, returning their members."""
+    if client is None:
+        raise MissingClientError
+
+    pop_tag = _get_script(_POP_TAG_SCRIPT)
+    while True:
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                if keys:
+                    pipe.unlink(*keys)
+                for tag in tags:
+                    pipe.evalsha(pop_tag.sha, 1, _tag_key(tag))
+                results = await pipe.execute()
+
+            return [member for members in results[-len(tags) :] for member in members]
+
+        except NoScriptError:
+            # Not preloaded by `load_scripts`, or flushed since
+            await client.script_load(pop_tag.script)
+
+
+async def _invalidate(keys: list[str], patterns: list[str], tags: list[str]) -> int:
+    """Delete cache entries and tell other worker processes to evict them locally.
+
+    Each tag is read and deleted atomically by a server-side script, then its members are unlinked, so a tag costs
+    no keyspace scan no matter how many keys the cache holds. The script only touches the tag key, which keeps it
+    valid on Redis Cluster, where the members may hash to other slots.
+
+    Parameters
+    ----------
+    keys: List[str]
+        Exact cache keys to delete.
+    patterns: List[str]
+        Glob patterns whose keys were already deleted by `_delete_keys_by_pattern`. They are only broadcast.
+    tags: List[str]
+        Formatted tag names.
+
+    Returns
+    -------
+    int
+        Number of round trips to Redis: one without tags, and up to two with tags, since their members are only
+        known once the tags are read.
+    """
+    if client is None:
+        raise MissingClientError
+
+    round_trips = 0
+    members: list[bytes] = []
+    if tags:
+        # `keys` are unlinked along with the tags
+        members = await _pop_tags(keys, tags)
+        round_trips += 1
+
+    async with client.pipeline(transaction=False) as pipe:
+        if keys and not tags:
+            pipe.unlink(*keys)
+        for i in range(0, len(members), UNLINK_BATCH_SIZE):
+            pipe.unlink(*members[i : i + UNLINK_BATCH_SIZE])
+
+        # Only announced once the entries are gone, so other processes cannot refill their local tier from them
+        if _local_cache_in_use:
+            message = json.dumps({"origin": _instance_id, "keys": keys, "patterns": patterns, "tags": tags})
+            pipe.publish(INVALIDATION_CHANNEL, message)
+
+        if len(pipe):
+            await pipe.execute()
+            round_trips += 1
+
+    return round_trips
+
+
+async def invalidate_tags(*tags: str) -> None:
+    """Delete every cache entry registered under one of `tags`, in Redis and in the local tier of every worker.
+
+    For endpoints that change what cached endpoints return without caching anything themselves, e.g. one creating
+    a resource that cached listings include.
+
+    Example
+    -------
+    ```python
+    await invalidate_tags(f"{username}_posts")
+    ```
+    """
+    await _invalidate([], [], list(tags))
+    if _local_cache_in_use:
+        _evict_local([], [], list(tags))
+
+
+async def _execute_in_background(pipe: Pipeline, cache_key: str) -> None:
+    try:
+        await pipe.execute()
+    except Exception as e:
+        logger.exception(f"Background write of cache key {cache_key} failed: {e}")
+
+
+async def _collect_tag_garbage(tag: str) -> None:
+    """Remove members of a tag whose cache entries have already expired.
+
+    Parameters
+    ----------
+    tag: str
+        Formatted tag name.
+    """
+    if client is None:
+        raise MissingClientError
+
+    tag_key = _tag_key(tag)
+    try:
+        async for members in _batched(client.sscan_iter(tag_key, count=100), 100):
+            async with client.pipeline(transaction=False) as pipe:
+                for member in members:
+                    pipe.exists(member)
+                exists = await pipe.execute()
+
+            stale_members = [member for member, present in zip(members, exists) if not present]
+            if stale_members:
+                await client.srem(tag_key, *stale_members)  # type: ignore[misc]
+
+    except Exception as e:
+        logger.exception(f"Garbage collection of cache tag {tag} failed: {e}")
+
+
+async def _batched(iterator: AsyncIterator[Any], size: int) -> AsyncIterator[list[Any]]:
+    batch = []
+    async for item in iterator:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def _evict_local(keys: list[str], patterns: list[str], tags: list[str]) -> None:
+    local_cache.delete(*keys)
+    local_cache.delete_tags(*tags)
+    for pattern in patterns:
+        local_cache.delete_pattern(pattern)
+
+
+async def _listen_for_invalidations() -> None:
+    if client is None:
+        raise MissingClientError
+
+    while True:
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            async for message in pubsub.listen():
+                payload = json.loads(message["data"])
+                if payload["origin"] != _instance_id:
+                    _evict_local(payload["keys"], payload["patterns"], payload.get("tags", []))
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            logger.exception(f"Cache invalidation listener failed, clearing local cache and resubscribing: {e}")
+            local_cache.clear()
+            await asyncio.sleep(1)
+
+        finally:
+            await pubsub.aclose()
+
+
+async def start_invalidation_listener() -> None:
+    """Subscribe this worker process to local cache invalidations broadcast by the others.
+
+    Does nothing if the Redis client is not initialized or no endpoint opted into the local tier.
+    """
+    global _listener_task
+
+    if client is None or not _local_cache_in_use or _listener_task is not None:
+        return
+
+    _listener_task = asyncio.create_task(_listen_for_invalidations())
+
+
+async def stop_invalidation_listener() -> None:
+    global _listener_task
+
+    if _listener_task is None:
+        return
+
+    _listener_task.cancel()
+    try:
+        await _listener_task
+    except asyncio.CancelledError:
+        pass
+
+    _listener_task = None
+    local_cache.clear()
+
+
+async def start_metrics_flusher() -> None:
+    """Periodically add the cache metrics of this worker process to the totals shared in Redis.
+
+    Does nothing if the Redis client is not initialized.
+    """
+    global _metrics_task
+
+    if client is None or _metrics_task is not None:
+        return
+
+    _metrics_task = asyncio.create_task(flush_periodically(metrics, client, settings.CACHE_METRICS_FLUSH_INTERVAL))
+
+
+async def stop_metrics_flusher() -> None:
+    global _metrics_task
+
+    if _metrics_task is None:
+        return
+
+    _metrics_task.cancel()
+    try:
+        await _metrics_task
+    except asyncio.CancelledError:
+        pass
+
+    _metrics_task = None
+    if client is not None:
+        try:
+            await metrics.flush(client)
+        except Exception as e:
+            logger.exception(f"Final flush of cache metrics failed: {e}")
+
+
+class _CacheEntry(NamedTuple):
+    value: Any
+    expires_at: float = math.inf
+    delta: float = 0.0
+
+
+def _should_refresh_early(expires_at: float, delta: float, beta: float, now: float) -> bool:
+    """Decide whether a still-fresh entry should be recomputed ahead of its expiry.
+
+    This is the XFetch rule: the probability of an early refresh grows as expiry gets closer, scaled by how long the
+    value took to compute (`delta`) and by `beta`. Values above 1 favour earlier refreshes.
+
+    Parameters
+    ----------
+    expires_at: float
+        Logical expiry of the entry as a Unix timestamp.
+    delta: float
+        Time in seconds it took to compute the entry.
+    beta: float
+        Eagerness of the early refresh.
+    now: float
+        The current Unix timestamp.
+
+    Returns
+    -------
+    bool
+        True if this caller should trigger a refresh.
+    """
+    return now - delta * beta * math.log(1.0 - random.random()) >= expires_at
+
+
+async def _refresh_in_background(cache_key: str, compute: Callable[[], Awaitable[Any]], lock_expiration: int) -> None:
+    """Recompute a cache entry unless another process or task is already doing it.
+
+    Parameters
+    ----------
+    cache_key: str
+        The cache key being refreshed.
+    compute: Callable[[], Awaitable[Any]]
+        Runs the endpoint and stores its result in the cache.
+    lock_expiration: int
+        Lifetime of the refresh lock in seconds.
+    """
+    if client is None:
+        raise MissingClientError
+
+    lock_key = f"lock:{cache_key}"
+    token = uuid.uuid4().hex
+    if cache_key in _inflight or not await client.set(lock_key, token, nx=True, ex=lock_expiration):
+        return
+
+    # A miss may have started recomputing while the lock was being acquired
+    if cache_key in _inflight:
+        await _get_script(_RELEASE_LOCK_SCRIPT)(keys=[lock_key], args=[token])
+        return
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[cache_key] = future
+    try:
+        future.set_result(await compute())
+
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()
+        logger.exception(f"Background refresh of cache key {cache_key} failed: {e}")
+
+    finally:
+        if _inflight.get(cache_key) is future:
+            del _inflight[cache_key]
+        await _get_script(_RELEASE_LOCK_SCRIPT)(keys=[lock_key], args=[token])
+
+
+def _spawn(coroutine: Coroutine[Any, Any, None]) -> None:
+    task = asyncio.create_task(coroutine)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def _compute_with_lock(
+    cache_key: str, compute: Callable[[], Awaitable[Any]], read: Callable[[str], Awaitable[Any]], lock_expiration: int
+) -> Any:
+    """Recompute a cache entry while holding a short Redis lock shared by every process and node.
+
+    The process that acquires `lock:{cache_key}` runs `compute`. The others poll with exponential backoff until the
+    entry shows up in the cache, the lock is released without a fill (the holder failed) or `lock_expiration`
+    elapses, in which case they compute the value themselves.
+
+    Parameters
+    ----------
+    cache_key: str
+        The cache key being recomputed.
+    compute: Callable[[], Awaitable[Any]]
+        Runs the endpoint and stores its result in the cache.
+    read: Callable[[str], Awaitable[Any]]
+        Reads a cache key, returning `_MISS` when it is absent.
+    lock_expiration: int
+        Lifetime of the lock in seconds. It bounds how long waiters block on a stuck or crashed holder.
+
+    Returns
+    -------
+    Any
+        The freshly computed or cached result.
+    """
+    if client is None:
+        raise MissingClientError
+
+    lock_key = f"lock:{cache_key}"
+    token = uuid.uuid4().hex
+    if await client.set(lock_key, token, nx=True, ex=lock_expiration):
+        try:
+            return await compute()
+        finally:
+            await _get_script(_RELEASE_LOCK_SCRIPT)(keys=[lock_key], args=[token])
+
+    deadline = monotonic() + lock_expiration
+    delay = 0.01
+    while monotonic() < deadline:
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 0.25)
+
+        cached_data = await read(cache_key)
+        if cached_data is not _MISS:
+            return cached_data
+
+        if not await client.exists(lock_key):
+            break
+
+    return await compute()
+
+
+async def _single_flight(
+    cache_key: str, compute: Callable[[], Awaitable[Any]], read: Callable[[str], Awaitable[Any]], lock_expiration: int
+) -> Any:
+    """Coalesce concurrent cache misses for the same key into a single recompute.
+
+    Within a process, the first miss stores a future in `_inflight` and every concurrent miss awaits it.
+    Across processes, the first miss additionally takes a Redis lock (see `_compute_with_lock`).
+
+    Parameters
+    ----------
+    cache_key: str
+        The cache key that missed.
+    compute: Callable[[], Awaitable[Any]]
+        Runs the endpoint and stores its result in the cache.
+    read: Callable[[str], Awaitable[Any]]
+        Reads a cache key, returning `_MISS` when it is absent.
+    lock_expiration: int
+        Lifetime of the cross-process lock in seconds.
+
+    Returns
+    -------
+    Any
+        The result shared by every coalesced caller.
+    """
+    future = _inflight.get(cache_key)
+    if future is not None:
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+
+            return await compute()
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[cache_key] = future
+    try:
+        result = await _compute_with_lock(cache_key, compute, read, lock_expiration)
+        future.set_result(result)
+        return result
+
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()
+        raise
+
+    finally:
+        if _inflight.get(cache_key) is future:
+            del _inflight[cache_key]
+
+
 def cache(
     key_prefix: str,
-    resource_id_name: Any = None,
+    resource_id_name: str | None = None,
     expiration: int = 3600,
     resource_id_type: type | tuple[type, ...] = int,
     to_invalidate_extra: dict[str, Any] | None = None,
     pattern_to_invalidate_extra: list[str] | None = None,
+    local_expiration: int | None = None,
+    single_flight: bool = False,
+    lock_expiration: int = 10,
+    stale_ttl: int | None = None,
+    early_refresh_beta: float | None = None,
+    tags: list[str] | None = None,
+    tags_to_invalidate: list[str] | None = None,
+    fire_and_forget: bool = False,
+    raw_response: bool = False,
+    response_model: Any = None,
+    codec: str | None = None,
+    compression: str | None = None,
+    compression_threshold: int | None = None,
+    not_found_expiration: int | None = None,
+    session_factory: Callable[[], typing.AsyncContextManager[AsyncSession]] | None = None,
 ) -> Callable:
     """Cache decorator for FastAPI endpoints.
 
@@ -198,9 +782,9 @@ def cache(
     ----------
     key_prefix: str
         A unique prefix to identify the cache key.
-    resource_id_name: Any, optional
+    resource_id_name: str | None, optional
         The name of the resource ID argument in the decorated function. If provided, it is used directly;
-        otherwise, the resource ID is inferred from the function's arguments.
+        otherwise, the resource ID parameter is inferred from the function's signature.
     expiration: int, optional
         The expiration time for the cached data in seconds. Defaults to 3600 seconds (1 hour).
     resource_id_type: Union[type, Tuple[type, ...]], default int
@@ -209,10 +793,54 @@ def cache(
         Defaults to int. This is used only if resource_id_name is not provided.
     to_invalidate_extra: Dict[str, Any] | None, optional
         A dictionary where keys are cache key prefixes and values are templates for cache key suffixes.
-        These keys are invalidated when the decorated function is called with a method other than GET.
+        These keys are invalidated when the decorated function is called with a method other than GET or HEAD.
     pattern_to_invalidate_extra: List[str] | None, optional
         A list of string patterns for cache keys that should be invalidated when the decorated function is called.
         This allows for bulk invalidation of cache keys based on a matching pattern.
+    local_expiration: int | None, optional
+        If provided, responses are also kept in an in-process LRU tier in front of Redis for at most this many
+        seconds, and never longer than `expiration`. Defaults to None, which disables the local tier.
+    single_flight: bool, optional
+        If True, concurrent GET misses for the same cache key are coalesced so that only one recompute reaches the
+        database per key and expiry, across processes and nodes. Defaults to False.
+    lock_expiration: int, optional
+        Lifetime in seconds of the Redis lock taken by `single_flight` recomputes. Waiters give up and compute the
+        value themselves after this long. Defaults to 10 seconds.
+    stale_ttl: int | None, optional
+        If provided, entries are kept in Redis for this many seconds past `expiration`. During that window the stale
+        value is served right away and the entry is recomputed in the background. Defaults to None.
+    early_refresh_beta: float | None, optional
+        If provided, fresh entries are refreshed in the background before they expire, with a probability that grows
+        as expiry gets closer (XFetch). 1.0 is a good default; higher values refresh earlier. Defaults to None.
+    tags: List[str] | None, optional
+        Templates of tags under which cached GET responses are registered, e.g. `["{username}_posts"]`.
+    tags_to_invalidate: List[str] | None, optional
+        Templates of tags whose cache entries are invalidated when the decorated function is called with a method
+        other than GET or HEAD. This is the cheap alternative to `pattern_to_invalidate_extra`.
+    fire_and_forget: bool, optional
+        If True, the Redis write that fills the cache on a miss runs in the background instead of delaying the
+        response. A failed write is only logged. Defaults to False.
+    raw_response: bool, optional
+        If True, the final JSON response body is cached and returned as a `Response`, so hits skip decoding,
+        `response_model` validation and re-encoding. Defaults to False.
+    response_model: Any, optional
+        Used with `raw_response` to validate and serialize the endpoint result once per cache fill, exactly like
+        the route's `response_model` would. If omitted, the result is encoded with `jsonable_encoder`.
+    codec: str | None, optional
+        Codec used to store values: "json", "orjson" or "msgpack". Ignored with `raw_response`, which stores bytes.
+        Defaults to the `CACHE_CODEC` setting.
+    compression: str | None, optional
+        Compression applied to values larger than `compression_threshold`: "none", "zlib", "zstd" or "lz4".
+        Defaults to the `CACHE_COMPRESSION` setting.
+    compression_threshold: int | None, optional
+        Size in bytes above which values are compressed. Defaults to the `CACHE_COMPRESSION_THRESHOLD` setting.
+    not_found_expiration: int | None, optional
+        If provided, a 404 raised by the endpoint on a GET is cached for this many seconds and replayed on hits, with
+        the same detail, without calling the endpoint. Keep it short. Defaults to None, which never caches errors.
+    session_factory: Callable[[], AsyncContextManager[AsyncSession]] | None, optional
+        Opens database sessions, e.g. `local_session`. Required with `stale_ttl` or `early_refresh_beta` when the
+        endpoint takes an `AsyncSession`: background refreshes run after the response was sent, when the request's
+        session is closed, so each one gets its own session. Defaults to None.
 
     Returns
     -------
@@ -237,7 +865,7 @@ def cache(
     ```
 
     This decorator caches the response data of the endpoint function using a unique cache key.
-    The cached data is retrieved for GET requests, and the cache is invalidated for other types of requests.
+    The cached data is retrieved for GET and HEAD requests, and the cache is invalidated for other types of requests.
 
     Advanced Example Usage
     -------------
@@ -278,55 +906,305 @@ def cache(
     Note
     ----
     - resource_id_type is used only if resource_id is not passed.
-    - `to_invalidate_extra` and `pattern_to_invalidate_extra` are used for cache invalidation on methods other than GET.
-    - Using `pattern_to_invalidate_extra` can be resource-intensive on large datasets. Use it judiciously and
-      consider the potential impact on Redis performance.
+    - Key templates, invalidation templates and the resource ID are bound to the function's signature when the
+      decorator is applied, so a malformed template or a missing parameter fails at import time.
+    - `to_invalidate_extra` and `pattern_to_invalidate_extra` are used for cache invalidation on methods other than GET
+      and HEAD.
+    - Using `pattern_to_invalidate_extra` can be resource-intensive on large datasets, since it scans the whole
+      keyspace. Prefer registering entries with `tags` and invalidating them with `tags_to_invalidate`.
+    - All Redis commands of a cache fill are sent in a single pipeline, so a fill costs one round trip. So does an
+      invalidation without `tags_to_invalidate`. With them it costs two, one to read and delete the tags and one to
+      unlink their members, plus the scans of `pattern_to_invalidate_extra` if any.
+    - Invalidations are also broadcast over Redis pub/sub so that every worker process evicts the same keys from
+      its local tier. `start_invalidation_listener` must run on startup for this to work.
+    - Every entry records its codec and compression in a header byte, so entries written with other settings, or
+      by versions without headers, stay readable. Entries whose format is unavailable in this process are misses.
+    - With `raw_response`, the body is stored with a strong `ETag` computed once per fill. Hits send it and answer
+      a matching `If-None-Match` with a bodiless 304 without calling the endpoint.
+    - With `raw_response`, FastAPI does not filter the response through the route's `response_model`. Pass the same
+      model as `response_model`, or make sure the endpoint already returns data of that shape.
+    - Hits, misses, fill and Redis latency, payload sizes and invalidations are counted per `key_prefix` in
+      `metrics`. `start_metrics_flusher` aggregates them across worker processes in Redis.
+    - Cached 404s are stored as a compact marker under the same key and `tags` as the value would be, so the same
+      invalidations clear them. They are never served stale nor refreshed early.
+    - With `stale_ttl` or `early_refresh_beta`, entries also carry their logical expiry and compute time. Background
+      refreshes call the endpoint again after the response was sent, with the original request and arguments except
+      for database sessions, which are opened with `session_factory`.
     """
+    global _local_cache_in_use
+
+    if local_expiration is not None:
+        _local_cache_in_use = True
+
+    prefix_metrics = metrics.for_prefix(key_prefix)
+    revalidate = stale_ttl is not None or early_refresh_beta is not None
+    invalidation_options = (to_invalidate_extra, pattern_to_invalidate_extra, tags_to_invalidate)
+    invalidates = any(option is not None for option in invalidation_options)
+    redis_expiration = expiration + (stale_ttl or 0)
+
+    entry_codec = ETaggedRawCodec() if raw_response else get_codec(codec or settings.CACHE_CODEC)
+    entry_compressor = get_compressor(compression or settings.CACHE_COMPRESSION)
+    if compression_threshold is None:
+        entry_compression_threshold = settings.CACHE_COMPRESSION_THRESHOLD
+    else:
+        entry_compression_threshold = compression_threshold
+
+    if raw_response and response_model is not None:
+        response_adapter: TypeAdapter | None = TypeAdapter(response_model)
+    else:
+        response_adapter = None
+
+    def encode_value(result: Any) -> Any:
+        if not raw_response:
+            return jsonable_encoder(result)
+
+        if response_adapter is not None:
+            body = response_adapter.dump_json(response_adapter.validate_python(result))
+        else:
+            body = _render_json(jsonable_encoder(result))
+
+        return CachedBody(body, compute_etag(body))
+
+    def encode(value: Any, expires_at: float, delta: float) -> bytes:
+        metadata = (expires_at, delta) if revalidate else None
+        return encode_entry(value, entry_codec, entry_compressor, entry_compression_threshold, metadata)
+
+    def decode(data: bytes) -> _CacheEntry | None:
+        try:
+            value, metadata = decode_entry(data)
+        except UnsupportedCodecError as e:
+            logger.warning(f"Ignoring cache entry written with an unavailable format: {e}")
+            return None
+
+        if isinstance(value, CachedNotFound):
+            return _CacheEntry(value)
+
+        if raw_response and not isinstance(value, (bytes, CachedBody)):
+            value = _render_json(value)
+
+        if metadata is None:
+            return _CacheEntry(value)
+
+        return _CacheEntry(value, *metadata)
+
+    def respond(request: Request, value: Any) -> Any:
+        if isinstance(value, CachedNotFound):
+            raise NotFoundException(value.detail)
+
+        if isinstance(value, CachedBody):
+            headers = {"ETag": value.etag}
+            if etag_matches(request.headers.get("if-none-match"), value.etag):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+            return Response(content=value.body, media_type="application/json", headers=headers)
+
+        if raw_response:
+            return Response(content=value, media_type="application/json")
+
+        return value
 
     def wrapper(func: Callable) -> Callable:
-        @functools.wraps(func)
-        async def inner(request: Request, *args: Any, **kwargs: Any) -> Response:
+        parameters = inspect.signature(func).parameters
+        format_prefix = _compile_template(key_prefix, parameters)
+        resource_id_key = _resolve_resource_id_name(func, resource_id_name, resource_id_type)
+        session_parameters = _session_parameters(func) if revalidate else []
+        if session_parameters and session_factory is None:
+            raise MissingSessionFactoryError(
+                f"'{func.__name__}' takes a database session, so its background refreshes need a session_factory."
+            )
+
+        format_tags = [_compile_template(tag, parameters) for tag in tags or []]
+        format_tags_to_invalidate = [_compile_template(tag, parameters) for tag in tags_to_invalidate or []]
+        format_patterns = [_compile_template(pattern, parameters) for pattern in pattern_to_invalidate_extra or []]
+        format_extra_keys = []
+        for prefix, id_template in (to_invalidate_extra or {}).items():
+            id_fields = _extract_template_fields(id_template)
+            if not id_fields or id_fields[0] not in parameters:
+                raise CacheKeyTemplateError(f"Invalid cache key id template '{id_template}' for prefix '{prefix}'.")
+
+            format_extra_keys.append((_compile_template(prefix, parameters), id_fields[0]))
+
+        def build_cache_key(kwargs: dict[str, Any]) -> str:
+            return f"{format_prefix(kwargs)}:{kwargs[resource_id_key]}"
+
+        async def read_cached(cache_key: str, formatted_tags: list[str]) -> _CacheEntry | None:
+            if client is None:
+                raise MissingClientError
+
+            if local_expiration is not None:
+                cached_data = local_cache.get(cache_key)
+                if cached_data:
+                    prefix_metrics.local_hits += 1
+                    prefix_metrics.bytes_read += len(cached_data)
+                    return decode(cached_data)
+
+                start_time = monotonic()
+                async with client.pipeline(transaction=False) as pipe:
+                    pipe.get(cache_key)
+                    pipe.ttl(cache_key)
+                    cached_data, ttl = await pipe.execute()
+
+                prefix_metrics.redis_calls += 1
+                prefix_metrics.redis_seconds += monotonic() - start_time
+                if cached_data:
+                    prefix_metrics.bytes_read += len(cached_data)
+                    local_ttl = min(local_expiration, ttl) if ttl >= 0 else local_expiration
+                    local_cache.set(cache_key, cached_data, local_ttl, tags=formatted_tags)
+                    return decode(cached_data)
+
+            else:
+                start_time = monotonic()
+                cached_data = await client.get(cache_key)
+                prefix_metrics.redis_calls += 1
+                prefix_metrics.redis_seconds += monotonic() - start_time
+                if cached_data:
+                    prefix_metrics.bytes_read += len(cached_data)
+                    return decode(cached_data)
+
+            return None
+
+        async def read_usable(cache_key: str, formatted_tags: list[str]) -> Any:
+            entry = await read_cached(cache_key, formatted_tags)
+            if entry is None or (stale_ttl is None and entry.expires_at <= time()):
+                return _MISS
+
+            return entry.value
+
+        async def store(
+            cache_key: str, serialized_data: bytes, redis_ttl: int, local_ttl: int, formatted_tags: list[str]
+        ) -> None:
             if client is None:
                 raise MissingClientError
 
-            if resource_id_name:
-                resource_id = kwargs[resource_id_name]
+            prefix_metrics.fills += 1
+            prefix_metrics.bytes_written += len(serialized_data)
+            pipe = client.pipeline(transaction=False)
+            _queue_fill(pipe, cache_key, serialized_data, redis_ttl, formatted_tags)
+            if fire_and_forget:
+                _spawn(_execute_in_background(pipe, cache_key))
             else:
-                resource_id = _infer_resource_id(kwargs=kwargs, resource_id_type=resource_id_type)
+                start_time = monotonic()
+                await pipe.execute()
+                prefix_metrics.redis_calls += 1
+                prefix_metrics.redis_seconds += monotonic() - start_time
 
-            formatted_key_prefix = _format_prefix(key_prefix, kwargs)
-            cache_key = f"{formatted_key_prefix}:{resource_id}"
-            if request.method == "GET":
-                if to_invalidate_extra is not None or pattern_to_invalidate_extra is not None:
+            for tag in formatted_tags:
+                if random.random() < TAG_GC_PROBABILITY:
+                    _spawn(_collect_tag_garbage(tag))
+
+            if local_expiration is not None:
+                local_cache.set(cache_key, serialized_data, min(local_expiration, local_ttl), tags=formatted_tags)
+
+        async def compute_and_store(
+            request: Request, args: tuple, kwargs: dict[str, Any], cache_key: str, formatted_tags: list[str]
+        ) -> Any:
+            if client is None:
+                raise MissingClientError
+
+            start_time = monotonic()
+            try:
+                result = await func(request, *args, **kwargs)
+
+            except HTTPException as e:
+                if not_found_expiration is None or e.status_code != status.HTTP_404_NOT_FOUND:
+                    raise
+
+                prefix_metrics.fill_seconds += monotonic() - start_time
+                serialized_data = encode_entry(CachedNotFound(e.detail), _NOT_FOUND_CODEC)
+                await store(cache_key, serialized_data, not_found_expiration, not_found_expiration, formatted_tags)
+                raise
+
+            value = encode_value(result)
+            compute_time = monotonic() - start_time
+            prefix_metrics.fill_seconds += compute_time
+            serialized_data = encode(value, time() + expiration, compute_time)
+            await store(cache_key, serialized_data, redis_expiration, expiration, formatted_tags)
+            return value if raw_response else result
+
+        async def refresh_and_store(
+            request: Request, args: tuple, kwargs: dict[str, Any], cache_key: str, formatted_tags: list[str]
+        ) -> Any:
+            # A session factory is required for session parameters, see above
+            if not session_parameters or session_factory is None:
+                return await compute_and_store(request, args, kwargs, cache_key, formatted_tags)
+
+            async with session_factory() as db:
+                kwargs = {**kwargs, **dict.fromkeys(session_parameters, db)}
+                return await compute_and_store(request, args, kwargs, cache_key, formatted_tags)
+
+        @functools.wraps(func)
+        async def inner(request: Request, *args: Any, **kwargs: Any) -> Any:
+            if client is None:
+                raise MissingClientError
+
+            cache_key = build_cache_key(kwargs)
+            if request.method in ("GET", "HEAD"):
+                if invalidates:
                     raise InvalidRequestError
 
-                cached_data = await client.get(cache_key)
-                if cached_data:
-                    return json.loads(cached_data.decode())
+                formatted_tags = [format_tag(kwargs) for format_tag in format_tags]
+
+                def compute() -> Awaitable[Any]:
+                    return compute_and_store(request, args, kwargs, cache_key, formatted_tags)
+
+                def refresh() -> Awaitable[Any]:
+                    return refresh_and_store(request, args, kwargs, cache_key, formatted_tags)
+
+                entry = await read_cached(cache_key, formatted_tags)
+                if entry is not None:
+                    now = time()
+                    if entry.expires_at > now:
+                        prefix_metrics.hits += 1
+                        if early_refresh_beta is not None and _should_refresh_early(
+                            entry.expires_at, entry.delta, early_refresh_beta, now
+                        ):
+                            _spawn(_refresh_in_background(cache_key, refresh, lock_expiration))
+
+                        return respond(request, entry.value)
+
+                    if stale_ttl is not None:
+                        prefix_metrics.hits += 1
+                        prefix_metrics.stale_hits += 1
+                        _spawn(_refresh_in_background(cache_key, refresh, lock_expiration))
+                        return respond(request, entry.value)
+
+                prefix_metrics.misses += 1
+                if single_flight:
+                    return respond(
+                        request,
+                        await _single_flight(
+                            cache_key,
+                            compute=compute,
+                            read=lambda key: read_usable(key, formatted_tags),
+                            lock_expiration=lock_expiration,
+                        ),
+                    )
+
+                return respond(request, await compute())
 
             result = await func(request, *args, **kwargs)
 
-            if request.method == "GET":
-                serializable_data = jsonable_encoder(result)
-                serialized_data = json.dumps(serializable_data)
+            invalidated_keys = [cache_key]
+            invalidated_patterns = []
+            formatted_tags = [format_tag(kwargs) for format_tag in format_tags_to_invalidate]
 
-                await client.set(cache_key, serialized_data)
-                await client.expire(cache_key, expiration)
+            for format_extra_prefix, id_name in format_extra_keys:
+                invalidated_keys.append(f"{format_extra_prefix(kwargs)}:{kwargs[id_name]}")
 
-                serialized_data = json.loads(serialized_data)
+            for format_pattern in format_patterns:
+                formatted_pattern = format_pattern(kwargs) + "*"
+                await _delete_keys_by_pattern(formatted_pattern)
+                invalidated_patterns.append(formatted_pattern)
 
-            else:
-                await client.delete(cache_key)
-                if to_invalidate_extra is not None:
-                    formatted_extra = _format_extra_data(to_invalidate_extra, kwargs)
-                    for prefix, id in formatted_extra.items():
-                        extra_cache_key = f"{prefix}:{id}"
-                        await client.delete(extra_cache_key)
-
-                if pattern_to_invalidate_extra is not None:
-                    for pattern in pattern_to_invalidate_extra:
-                        formatted_pattern = _format_prefix(pattern, kwargs)
-                        await _delete_keys_by_pattern(formatted_pattern + "*")
+            start_time = monotonic()
+            round_trips = await _invalidate(invalidated_keys, invalidated_patterns, formatted_tags)
+
+            prefix_metrics.invalidations += 1
+            prefix_metrics.redis_calls += round_trips
+            prefix_metrics.redis_seconds += monotonic() - start_time
+
+            if _local_cache_in_use:
+                _evict_local(invalidated_keys, invalidated_patterns, formatted_tags)
 
             return result
 
@@ -0,0 +1,350 @@
+"""Codecs and compression for values stored by the `cache` decorator.
+
+Every entry starts with a header byte that records how it was written, so entries stay readable while the codec or
+compression settings change during a rolling deploy:
+
+    bit 7       always set. Entries written before headers existed are plain JSON and never start with a byte >= 0x80.
+    bit 6       set when the entry carries revalidation metadata (logical expiry and compute time).
+    bits 3-5    codec id.
+    bits 0-2    compression id.
+
+The header is followed by the metadata, if any, then by the possibly compressed payload.
+"""
+import json
+import struct
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, NamedTuple
+
+from ..exceptions.cache_exceptions import UnsupportedCodecError
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore[assignment]
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover
+    lz4_frame = None
+
+HEADER_MARKER = 0x80
+METADATA_FLAG = 0x40
+ENTRY_METADATA = struct.Struct("!dd")
+
+
+class CacheCodec(ABC):
+    """Serializes cached values to bytes and back.
+
+    Attributes
+    ----------
+    format_id: int
+        Identifier written into the entry header. Must be unique and fit in 3 bits.
+    name: str
+        Name used to select the codec in settings and in the `cache` decorator.
+    """
+
+    format_id: int
+    name: str
+
+    @abstractmethod
+    def dumps(self, value: Any) -> bytes: ...
+
+    @abstractmethod
+    def loads(self, data: bytes) -> Any: ...
+
+
+class RawCodec(CacheCodec):
+    """Stores bytes as is. Used for raw response bodies."""
+
+    format_id = 0
+    name = "raw"
+
+    def dumps(self, value: bytes) -> bytes:
+        return value
+
+    def loads(self, data: bytes) -> bytes:
+        return data
+
+
+class CachedBody(NamedTuple):
+    """A raw response body cached together with its entity tag."""
+
+    body: bytes
+    etag: str
+
+
+class ETaggedRawCodec(CacheCodec):
+    """Stores a raw response body prefixed with its entity tag, so that hits can answer conditional requests
+    without hashing the body again."""
+
+    format_id = 4
+    name = "raw_etag"
+
+    def dumps(self, value: CachedBody) -> bytes:
+        etag = value.etag.encode()
+        return bytes((len(etag),)) + etag + value.body
+
+    def loads(self, data: bytes) -> CachedBody:
+        etag_end = 1 + data[0]
+        return CachedBody(data[etag_end:], data[1:etag_end].decode())
+
+
+class JsonCodec(CacheCodec):
+    format_id = 1
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value).encode()
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(CacheCodec):
+    format_id = 2
+    name = "orjson"
+
+    def dumps(self, value: Any) -> bytes:
+        return orjson.dumps(value)
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackCodec(CacheCodec):
+    format_id = 3
+    name = "msgpack"
+
+    def dumps(self, value: Any) -> bytes:
+        packed: bytes = msgpack.packb(value)
+        return packed
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data)
+
+
+class CachedNotFound(NamedTuple):
+    """Stored in place of a value when a cached endpoint raised a 404, so that hits can replay the error."""
+
+    detail: Any
+
+
+class NotFoundCodec(CacheCodec):
+    """Stores only the detail of a cached 404. Written by the `cache` decorator itself, not selected in settings."""
+
+    format_id = 7
+    name = "not_found"
+
+    def dumps(self, value: CachedNotFound) -> bytes:
+        return json.dumps(value.detail).encode()
+
+    def loads(self, data: bytes) -> CachedNotFound:
+        return CachedNotFound(json.loads(data))
+
+
+class CacheCompressor(ABC):
+    """Compresses entry payloads above the configured size threshold.
+
+    Attributes
+    ----------
+    format_id: int
+        Identifier written into the entry header. Must be unique, non-zero and fit in 3 bits.
+    name: str
+        Name used to select the compressor in settings and in the `cache` decorator.
+    """
+
+    format_id: int
+    name: str
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes: ...
+
+    @abstractmethod
+    def decompress(self, data: bytes) -> bytes: ...
+
+
+class ZlibCompressor(CacheCompressor):
+    format_id = 1
+    name = "zlib"
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, 6)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class ZstdCompressor(CacheCompressor):
+    format_id = 2
+    name = "zstd"
+
+    def __init__(self) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=3)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._decompressor.decompress(data)
+
+
+class Lz4Compressor(CacheCompressor):
+    format_id = 3
+    name = "lz4"
+
+    def compress(self, data: bytes) -> bytes:
+        compressed: bytes = lz4_frame.compress(data)
+        return compressed
+
+    def decompress(self, data: bytes) -> bytes:
+        decompressed: bytes = lz4_frame.decompress(data)
+        return decompressed
+
+
+_codec_dependencies: dict[type[CacheCodec], Any] = {
+    RawCodec: True,
+    ETaggedRawCodec: True,
+    JsonCodec: True,
+    OrjsonCodec: orjson,
+    MsgpackCodec: msgpack,
+    NotFoundCodec: True,
+}
+_compressor_dependencies: dict[type[CacheCompressor], Any] = {
+    ZlibCompressor: True,
+    ZstdCompressor: zstandard,
+    Lz4Compressor: lz4_frame,
+}
+
+CODECS: dict[int, CacheCodec] = {cls.format_id: cls() for cls, dependency in _codec_dependencies.items() if dependency}
+COMPRESSORS: dict[int, CacheCompressor] = {
+    cls.format_id: cls() for cls, dependency in _compressor_dependencies.items() if dependency
+}
+
+
+def get_codec(name: str) -> CacheCodec:
+    """Return the codec registered under `name`.
+
+    Raises
+    ------
+    UnsupportedCodecError
+        If no such codec exists or its optional dependency is not installed.
+    """
+    for codec in CODECS.values():
+        if codec.name == name:
+            return codec
+
+    raise UnsupportedCodecError(f"Cache codec '{name}' is unknown or its dependency is not installed.")
+
+
+def get_compressor(name: str | None) -> CacheCompressor | None:
+    """Return the compressor registered under `name`, or None for `None` and `"none"`.
+
+    Raises
+    ------
+    UnsupportedCodecError
+        If no such compressor exists or its optional dependency is not installed.
+    """
+    if name is None or name == "none":
+        return None
+
+    for compressor in COMPRESSORS.values():
+        if compressor.name == name:
+            return compressor
+
+    raise UnsupportedCodecError(f"Cache compression '{name}' is unknown or its dependency is not installed.")
+
+
+def encode_entry(
+    value: Any,
+    codec: CacheCodec,
+    compressor: CacheCompressor | None = None,
+    compression_threshold: int = 0,
+    metadata: tuple[float, float] | None = None,
+) -> bytes:
+    """Encode a value into a cache entry.
+
+    Parameters
+    ----------
+    value: Any
+        The value to store.
+    codec: CacheCodec
+        Codec used to serialize `value`.
+    compressor: CacheCompressor | None, optional
+        Compressor used when the serialized value is larger than `compression_threshold` bytes.
+    compression_threshold: int, optional
+        Minimum payload size in bytes before compression kicks in.
+    metadata: Tuple[float, float] | None, optional
+        Logical expiry timestamp and compute time in seconds, for stale-while-revalidate entries.
+
+    Returns
+    -------
+    bytes
+        The header byte, the metadata if any, then the payload.
+    """
+    payload = codec.dumps(value)
+    compression_id = 0
+    if compressor is not None and len(payload) > compression_threshold:
+        payload = compressor.compress(payload)
+        compression_id = compressor.format_id
+
+    header = HEADER_MARKER | (codec.format_id << 3) | compression_id
+    if metadata is None:
+        return bytes((header,)) + payload
+
+    return bytes((header | METADATA_FLAG,)) + ENTRY_METADATA.pack(*metadata) + payload
+
+
+def decode_entry(data: bytes) -> tuple[Any, tuple[float, float] | None]:
+    """Decode a cache entry written by `encode_entry` or by a version without entry headers.
+
+    Parameters
+    ----------
+    data: bytes
+        The raw entry.
+
+    Returns
+    -------
+    Tuple[Any, Tuple[float, float] | None]
+        The value and the revalidation metadata, if the entry carries any.
+
+    Raises
+    ------
+    UnsupportedCodecError
+        If the entry was written with a codec or compression that is not available in this process.
+    """
+    header = data[0]
+    if not header & HEADER_MARKER:
+        return json.loads(data), None
+
+    offset = 1
+    metadata = None
+    if header & METADATA_FLAG:
+        metadata = ENTRY_METADATA.unpack_from(data, offset)
+        offset += ENTRY_METADATA.size
+
+    codec = CODECS.get((header >> 3) & 0x07)
+    if codec is None:
+        raise UnsupportedCodecError(f"Cache entry uses unavailable codec id {(header >> 3) & 0x07}.")
+
+    payload = data[offset:]
+    compression_id = header & 0x07
+    if compression_id:
+        compressor = COMPRESSORS.get(compression_id)
+        if compressor is None:
+            raise UnsupportedCodecError(f"Cache entry uses unavailable compression id {compression_id}.")
+
+        payload = compressor.decompress(payload)
+
+    return codec.loads(payload), metadata
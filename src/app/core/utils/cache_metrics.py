@@ -0,0 +1,150 @@
+import asyncio
+import logging
+from dataclasses import asdict, dataclass, fields
+
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY_PREFIX = "cache:stats"
+
+
+@dataclass
+class CacheMetrics:
+    """Counters for one `key_prefix` of the `cache` decorator.
+
+    These are plain attributes incremented from the event loop thread, so they need no locking.
+    """
+
+    hits: int = 0
+    local_hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    fills: int = 0
+    fill_seconds: float = 0.0
+    redis_calls: int = 0
+    redis_seconds: float = 0.0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    invalidations: int = 0
+
+
+_DESCRIPTIONS = {
+    "hits": "Cache hits, including local tier and stale hits.",
+    "local_hits": "Cache hits served by the in-process tier.",
+    "stale_hits": "Stale entries served while being refreshed in the background.",
+    "misses": "Cache misses.",
+    "fills": "Endpoint executions whose result was written to the cache.",
+    "fill_seconds": "Time spent executing endpoints to fill the cache.",
+    "redis_calls": "Redis round trips made by the cache decorator.",
+    "redis_seconds": "Time spent waiting on Redis round trips.",
+    "bytes_read": "Bytes of cache entries read from Redis or the local tier.",
+    "bytes_written": "Bytes of cache entries written to Redis.",
+    "invalidations": "Calls that invalidated cache entries.",
+}
+
+
+class CacheMetricsRegistry:
+    """Per-prefix cache metrics of this process, with aggregation across worker processes through Redis.
+
+    Each process periodically adds what it counted since its last flush to one Redis hash per prefix, so the hashes
+    hold totals for every worker.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, CacheMetrics] = {}
+        self._flushed: dict[str, CacheMetrics] = {}
+
+    def for_prefix(self, key_prefix: str) -> CacheMetrics:
+        if key_prefix not in self._metrics:
+            self._metrics[key_prefix] = CacheMetrics()
+            self._flushed[key_prefix] = CacheMetrics()
+
+        return self._metrics[key_prefix]
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        return {key_prefix: asdict(metrics) for key_prefix, metrics in self._metrics.items()}
+
+    async def flush(self, client: Redis) -> None:
+        """Add the counts accumulated since the last flush to the shared Redis hashes in one round trip."""
+        async with client.pipeline(transaction=False) as pipe:
+            deltas = []
+            for key_prefix, metrics in self._metrics.items():
+                current = asdict(metrics)
+                flushed = asdict(self._flushed[key_prefix])
+                for name, value in current.items():
+                    delta = value - flushed[name]
+                    if not delta:
+                        continue
+
+                    if isinstance(value, float):
+                        pipe.hincrbyfloat(f"{STATS_KEY_PREFIX}:{key_prefix}", name, delta)
+                    else:
+                        pipe.hincrby(f"{STATS_KEY_PREFIX}:{key_prefix}", name, delta)
+
+                pipe.sadd(STATS_KEY_PREFIX, key_prefix)
+                deltas.append((key_prefix, current))
+
+            if not deltas:
+                return
+
+            await pipe.execute()
+
+        for key_prefix, current in deltas:
+            self._flushed[key_prefix] = CacheMetrics(**current)
+
+    async def aggregated(self, client: Redis) -> dict[str, dict[str, float]]:
+        """Return the totals of every worker process, as last flushed to Redis."""
+        members: set[bytes] = await client.smembers(STATS_KEY_PREFIX)  # type: ignore[misc]
+        key_prefixes = sorted(member.decode() for member in members)
+        async with client.pipeline(transaction=False) as pipe:
+            for key_prefix in key_prefixes:
+                pipe.hgetall(f"{STATS_KEY_PREFIX}:{key_prefix}")
+            hashes = await pipe.execute()
+
+        types = {field.name: field.type for field in fields(CacheMetrics)}
+        stats = {}
+        for key_prefix, values in zip(key_prefixes, hashes):
+            totals = asdict(CacheMetrics())
+            for name, value in values.items():
+                name = name.decode()
+                if name in types:
+                    totals[name] = float(value) if types[name] is float else int(value)
+
+            stats[key_prefix] = totals
+
+        return stats
+
+
+def render_prometheus(stats: dict[str, dict[str, float]]) -> str:
+    """Render per-prefix cache stats in the Prometheus text exposition format.
+
+    Parameters
+    ----------
+    stats: Dict[str, Dict[str, float]]
+        Stats as returned by `CacheMetricsRegistry.snapshot` or `CacheMetricsRegistry.aggregated`.
+
+    Returns
+    -------
+    str
+        One counter family per metric, labelled by key prefix.
+    """
+    lines = []
+    for name, description in _DESCRIPTIONS.items():
+        metric_name = f"cache_{name}_total"
+        lines.append(f"# HELP {metric_name} {description}")
+        lines.append(f"# TYPE {metric_name} counter")
+        for key_prefix, values in stats.items():
+            label = key_prefix.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            lines.append(f'{metric_name}{{prefix="{label}"}} {values[name]}')
+
+    return "\n".join(lines) + "\n"
+
+
+async def flush_periodically(registry: CacheMetricsRegistry, client: Redis, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await registry.flush(client)
+        except Exception as e:
+            logger.exception(f"Flushing cache metrics failed: {e}")
@@ -0,0 +1,46 @@
+import hashlib
+
+
+def compute_etag(body: bytes) -> str:
+    """Compute a strong entity tag for a response body.
+
+    Parameters
+    ----------
+    body: bytes
+        The exact bytes sent to the client.
+
+    Returns
+    -------
+    str
+        A quoted 128-bit BLAKE2b digest, ready to be used as the `ETag` header.
+    """
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Evaluate an `If-None-Match` header against the current entity tag.
+
+    Parameters
+    ----------
+    if_none_match: str | None
+        The raw `If-None-Match` request header, if any.
+    etag: str
+        The current entity tag of the resource.
+
+    Returns
+    -------
+    bool
+        True if the client already holds this representation and should get a 304.
+
+    Note
+    ----
+        - `If-None-Match` uses the weak comparison function, so `W/` prefixes are ignored on both sides.
+    """
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    etag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
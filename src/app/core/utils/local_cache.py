@@ -0,0 +1,132 @@
+import fnmatch
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass
+from time import monotonic
+
+
+@dataclass
+class LocalCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+
+class LocalCache:
+    """Bounded in-process LRU cache used as the first tier in front of Redis.
+
+    Entries are raw bytes exactly as stored in Redis, so a local hit skips the network round trip
+    but still goes through the same decoding path as a Redis hit.
+
+    Parameters
+    ----------
+    max_entries: int, optional
+        Maximum number of entries kept in memory. Defaults to 1024.
+    max_bytes: int, optional
+        Maximum total size of the stored values in bytes. Defaults to 16 MiB.
+
+    Attributes
+    ----------
+    stats: LocalCacheStats
+        Hit, miss, eviction, expiration and invalidation counters for this process.
+
+    Note
+    ----
+        - The cache is not shared between worker processes. Cross-process invalidation is handled by
+          the Redis pub/sub listener in `app.core.utils.cache`.
+        - Values larger than `max_bytes` are never stored.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 16 * 1024 * 1024) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.stats = LocalCacheStats()
+        self._entries: OrderedDict[str, tuple[bytes, float, tuple[str, ...]]] = OrderedDict()
+        self._tags: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+
+        value, expires_at, _ = entry
+        if expires_at <= monotonic():
+            self._remove(key)
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str] = ()) -> None:
+        if ttl <= 0 or len(value) > self.max_bytes:
+            self._remove(key)
+            return
+
+        self._remove(key)
+        tags = tuple(tags)
+        self._entries[key] = (value, monotonic() + ttl, tags)
+        self.current_bytes += len(value)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.stats.evictions += 1
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            if self._remove(key):
+                self.stats.invalidations += 1
+
+    def delete_tags(self, *tags: str) -> None:
+        """Delete every entry stored under one of the given tags."""
+        for tag in tags:
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+                self.stats.invalidations += 1
+
+    def delete_pattern(self, pattern: str) -> None:
+        """Delete every entry whose key matches a Redis-style glob pattern."""
+        for key in [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]:
+            self._remove(key)
+            self.stats.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tags.clear()
+        self.current_bytes = 0
+
+    def info(self) -> dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            **asdict(self.stats),
+        }
+
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+
+        value, _, tags = entry
+        self.current_bytes -= len(value)
+        for tag in tags:
+            tag_keys = self._tags[tag]
+            tag_keys.discard(key)
+            if not tag_keys:
+                del self._tags[tag]
+
+        return True
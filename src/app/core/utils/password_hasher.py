@@ -0,0 +1,68 @@
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import bcrypt
+
+from src.config.settings import get_settings
+
+from ..exceptions.http_exceptions import ServiceUnavailableException
+
+settings = get_settings()
+
+
+class PasswordHasher:
+    """Runs bcrypt in a bounded thread pool, so that hashing a password never blocks the event loop.
+
+    Parameters
+    ----------
+    max_workers: int
+        Threads hashing concurrently. bcrypt releases the GIL, so up to one per spare CPU core.
+    max_pending: int
+        Hashes running or waiting for a thread beyond which new ones are rejected.
+
+    Note
+    ----
+        - Each bcrypt call takes in the order of 100 ms by design. Run on the event loop, it stalls every other
+          request of the worker for that long; here, only the awaiting request waits.
+        - Under a login storm, requests beyond `max_pending` fail fast with `503 Service Unavailable` instead of
+          queueing for seconds and holding their database connections meanwhile.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int) -> None:
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: ThreadPoolExecutor | None = None
+
+    async def hash(self, password: str) -> str:
+        hashed_password: bytes = await self._run(bcrypt.hashpw, password.encode(), bcrypt.gensalt())
+        return hashed_password.decode()
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        correct_password: bool = await self._run(bcrypt.checkpw, password.encode(), hashed_password.encode())
+        return correct_password
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self.pending >= self.max_pending:
+            raise ServiceUnavailableException("Too many password checks in progress, try again shortly.")
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hasher")
+
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS, max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
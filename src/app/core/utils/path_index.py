@@ -0,0 +1,123 @@
+from collections.abc import Iterator
+from typing import Any
+
+PARAMETER = "{}"
+WILDCARD = "*"
+RECURSIVE_WILDCARD = "**"
+
+
+def _is_parameter(segment: str) -> bool:
+    return segment.startswith("{") and segment.endswith("}")
+
+
+def split_path(path: str) -> list[str]:
+    """Split a route template or pattern into segments, with every route parameter as `{}`.
+
+    Example
+    -------
+    ```python
+    split_path("/api/v1/user/{username}/posts")  # ["api", "v1", "user", "{}", "posts"]
+    ```
+    """
+    return [PARAMETER if _is_parameter(segment) else segment for segment in path.strip("/").split("/") if segment]
+
+
+def check_pattern(pattern: str) -> list[str]:
+    """Split a path pattern into segments, see `split_path`.
+
+    Raises
+    ------
+    ValueError
+        If `**` is not the last segment of the pattern.
+    """
+    segments = split_path(pattern)
+    if RECURSIVE_WILDCARD in segments[:-1]:
+        raise ValueError(f"'{RECURSIVE_WILDCARD}' must be the last segment of '{pattern}'")
+
+    return segments
+
+
+class PathIndex:
+    """Prefix trie of path patterns, matched segment by segment against route templates.
+
+    Patterns are route templates whose segments may also be wildcards:
+
+    - a literal segment matches the same literal segment;
+    - a parameter, e.g. `{username}` whatever its name, matches any route parameter;
+    - `*` matches any single segment;
+    - `**` matches all remaining segments, including none. It must be the last segment.
+
+    The most specific pattern wins: segments are compared from the left, and a literal or parameter beats `*`,
+    which beats `**`. A lookup visits O(segments) nodes, backtracking only through wildcards.
+
+    Example
+    -------
+    ```python
+    index = PathIndex()
+    index.insert("/api/v1/**", "default")
+    index.insert("/api/v1/user/{username}/posts", "posts")
+    index.match("/api/v1/user/{username}/posts")  # "posts"
+    index.match("/api/v1/tiers")  # "default"
+    ```
+    """
+
+    __slots__ = ("children", "value", "pattern")
+
+    def __init__(self) -> None:
+        self.children: dict[str, PathIndex] = {}
+        self.value: Any = None
+        self.pattern: str | None = None
+
+    def insert(self, pattern: str, value: Any) -> None:
+        """Add a pattern, replacing the value of an equivalent one.
+
+        Raises
+        ------
+        ValueError
+            If `**` is not the last segment of the pattern.
+        """
+        segments = check_pattern(pattern)
+        node = self
+        for segment in segments:
+            node = node.children.setdefault(segment, PathIndex())
+
+        node.value = value
+        node.pattern = "/" + "/".join(segments)
+
+    def match(self, path: str) -> Any:
+        """Value of the most specific pattern matching a route template, or None."""
+        node = self._match(split_path(path), 0)
+        return None if node is None else node.value
+
+    def match_pattern(self, path: str) -> tuple[str, Any] | None:
+        """Normalized pattern and value of the most specific pattern matching a route template, or None."""
+        node = self._match(split_path(path), 0)
+        if node is None or node.pattern is None:
+            return None
+
+        return node.pattern, node.value
+
+    def _match(self, segments: list[str], index: int) -> "PathIndex | None":
+        if index < len(segments):
+            for key in (segments[index], WILDCARD):
+                child = self.children.get(key)
+                if child is not None:
+                    node = child._match(segments, index + 1)
+                    if node is not None:
+                        return node
+
+        elif self.pattern is not None:
+            return self
+
+        tail = self.children.get(RECURSIVE_WILDCARD)
+        return tail if tail is not None and tail.pattern is not None else None
+
+    def __iter__(self) -> Iterator[tuple[str, Any]]:
+        if self.pattern is not None:
+            yield self.pattern, self.value
+
+        for child in self.children.values():
+            yield from child
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import logging
+from typing import Any
+
+from redis.asyncio import ConnectionPool, Redis
+
+from src.config.settings import get_settings
+
+from ..exceptions.cache_exceptions import MissingClientError
+from .local_cache import LocalCache
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+pool: ConnectionPool | None = None
+client: Redis | None = None
+
+EVICTIONS_CHANNEL = settings.PRINCIPAL_CACHE_CHANNEL
+
+principals = LocalCache(max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES)
+
+_listener_task: asyncio.Task | None = None
+
+
+def get(subject: str) -> dict[str, Any] | None:
+    """Cached principal of a token subject, a username or an email address, or None."""
+    value = principals.get(subject)
+    return None if value is None else json.loads(value)
+
+
+def store(subject: str, principal: dict[str, Any]) -> None:
+    """Cache a principal for `PRINCIPAL_CACHE_TTL` seconds, tagged with its username for `evict`."""
+    value = json.dumps(principal).encode()
+    principals.set(subject, value, settings.PRINCIPAL_CACHE_TTL, tags=(principal["username"],))
+
+
+async def evict(username: str) -> None:
+    """Drop the cached principal of a user in every worker process, after the user is updated or deleted.
+
+    Note
+    ----
+        Worker processes that miss the broadcast serve the old principal for at most `PRINCIPAL_CACHE_TTL`
+        seconds.
+    """
+    principals.delete_tags(username)
+    if client is None:
+        return
+
+    try:
+        await client.publish(EVICTIONS_CHANNEL, username)
+    except Exception as e:
+        logger.error(f"Broadcast of principal eviction for {username} failed: {e}")
+
+
+async def _listen_for_evictions() -> None:
+    if client is None:
+        raise MissingClientError
+
+    while True:
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(EVICTIONS_CHANNEL)
+            async for message in pubsub.listen():
+                data = message["data"]
+                principals.delete_tags(data.decode() if isinstance(data, bytes) else data)
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            logger.exception(f"Principal eviction listener failed, clearing cached principals and resubscribing: {e}")
+            principals.clear()
+            await asyncio.sleep(1)
+
+        finally:
+            await pubsub.aclose()
+
+
+async def start_eviction_listener() -> None:
+    """Subscribe this worker process to principal evictions broadcast by the others.
+
+    Does nothing if the Redis client is not initialized. Cached principals then only expire with their TTL, so
+    only run a single worker process in that case, or set `PRINCIPAL_CACHE_TTL` to 0.
+    """
+    global _listener_task
+
+    if client is None or _listener_task is not None:
+        return
+
+    _listener_task = asyncio.create_task(_listen_for_evictions())
+
+
+async def stop_eviction_listener() -> None:
+    global _listener_task
+
+    if _listener_task is None:
+        return
+
+    _listener_task.cancel()
+    try:
+        await _listener_task
+    except asyncio.CancelledError:
+        pass
+
+    _listener_task = None
+    principals.clear()
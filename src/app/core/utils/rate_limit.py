@@ -1,38 +1,489 @@
-from datetime import UTC, datetime
+import asyncio
+import logging
+import math
+from dataclasses import dataclass
+from enum import Enum
+from time import time
+from typing import NamedTuple
 
 from redis.asyncio import ConnectionPool, Redis
+from redis.commands.core import AsyncScript
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ...core.logger import logging
-from ...models.rate_limit import sanitize_path
+from src.config.settings import get_settings
+
+from ...models.rate_limit import RateLimitAlgorithm, sanitize_path
 
 logger = logging.getLogger(__name__)
 
+settings = get_settings()
+
 pool: ConnectionPool | None = None
 client: Redis | None = None
 
 
-async def is_rate_limited(db: AsyncSession, user_id: int, path: str, limit: int, period: int) -> bool:
+class RateLimitLayout(str, Enum):
+    """How rate limit state is laid out in Redis
+
+    - KEYS: One key per user, path and window. Simple to inspect, but each key costs its own overhead.
+    - HASH: One hash per user, period and window, with a field per path. A user's counters share one key and one
+      TTL, and small hashes use Redis' compact listpack encoding. GCRA state is one hash per user.
+    """
+    KEYS = "keys"
+    HASH = "hash"
+
+
+# Each script works on a plain key, or on a field of a hash key when the field is passed as its last argument.
+
+# Increments the window counter and makes it expire when the window ends, atomically. A key left without a TTL, e.g.
+# by a crash between INCR and EXPIRE in earlier versions, gets one on its next hit.
+# ARGV: seconds until the window ends, the increment, and optionally the hash field.
+FIXED_WINDOW_SCRIPT = """
+local field = ARGV[3]
+local count
+if field then
+    count = redis.call("HINCRBY", KEYS[1], field, ARGV[2])
+else
+    count = redis.call("INCRBY", KEYS[1], ARGV[2] or 1)
+end
+local ttl = redis.call("TTL", KEYS[1])
+if ttl < 0 then
+    redis.call("EXPIRE", KEYS[1], ARGV[1])
+    ttl = tonumber(ARGV[1])
+end
+return {count, ttl}
+"""
+
+# Estimates the count over the last `period` seconds from the current and previous fixed windows, weighting the
+# previous one by how much of it still overlaps. Only allowed requests are counted, so clients that keep retrying
+# are not locked out for longer than the limit requires. The current counter must outlive the next window, so its
+# TTL is extended when shorter, e.g. when a fixed window check created the shared hash with a TTL up to the window end.
+# ARGV: limit, period, seconds elapsed in the current window, and optionally the hash field.
+SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local field = ARGV[4]
+local function get(key)
+    if field then
+        return redis.call("HGET", key, field)
+    end
+    return redis.call("GET", key)
+end
+local previous = tonumber(get(KEYS[2]) or "0")
+local current = tonumber(get(KEYS[1]) or "0")
+local estimated = math.floor(previous * (period - elapsed) / period) + current
+if estimated >= limit then
+    return {1, estimated, period - elapsed}
+end
+if field then
+    redis.call("HINCRBY", KEYS[1], field, 1)
+else
+    redis.call("INCR", KEYS[1])
+end
+if redis.call("TTL", KEYS[1]) < 2 * period - elapsed then
+    redis.call("EXPIRE", KEYS[1], 2 * period - elapsed)
+end
+return {0, estimated + 1, period - elapsed}
+"""
+
+# Generic cell rate algorithm. The key holds the theoretical arrival time (TAT) of the next request in milliseconds:
+# every allowed request pushes it `period / limit` further, and a request is allowed as long as the TAT stays within
+# `period` of now. Denied requests leave it untouched.
+# In a hash, the key expires with its latest TAT rather than each field with its own.
+# ARGV: now in milliseconds, emission interval in milliseconds, period in milliseconds, and optionally the hash field.
+GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local period = tonumber(ARGV[3])
+local field = ARGV[4]
+local stored
+if field then
+    stored = redis.call("HGET", KEYS[1], field)
+else
+    stored = redis.call("GET", KEYS[1])
+end
+local tat = math.max(tonumber(stored or "0"), now)
+local new_tat = tat + interval
+if new_tat - now > period then
+    return {1, math.ceil((tat - now) / interval), math.ceil((new_tat - period - now) / 1000)}
+end
+local ttl = math.ceil(new_tat - now)
+if field then
+    redis.call("HSET", KEYS[1], field, new_tat)
+    if redis.call("PTTL", KEYS[1]) < ttl then
+        redis.call("PEXPIRE", KEYS[1], ttl)
+    end
+else
+    redis.call("SET", KEYS[1], new_tat, "PX", ttl)
+end
+return {0, math.ceil((new_tat - now) / interval), math.ceil((new_tat - now) / 1000)}
+"""
+
+_SCRIPTS = {
+    RateLimitAlgorithm.FIXED_WINDOW: FIXED_WINDOW_SCRIPT,
+    RateLimitAlgorithm.SLIDING_WINDOW: SLIDING_WINDOW_SCRIPT,
+    RateLimitAlgorithm.GCRA: GCRA_SCRIPT,
+}
+
+_registered_scripts: dict[RateLimitAlgorithm, AsyncScript] = {}
+
+
+class RateLimitStatus(NamedTuple):
+    """Outcome of a rate limit check.
+
+    Attributes
+    ----------
+    limited: bool
+        Whether the request exceeds the limit.
+    current_count: int
+        Requests counted against the limit, including this one if it was allowed.
+    reset_after: int
+        Seconds until the window resets, or with GCRA until the next request would be allowed if this one was
+        limited, and until the whole burst is available again otherwise.
+    """
+
+    limited: bool
+    current_count: int
+    reset_after: int
+
+
+def _get_script(algorithm: RateLimitAlgorithm) -> AsyncScript:
     if client is None:
         logger.error("Redis client is not initialized.")
         raise Exception("Redis client is not initialized.")
 
-    current_timestamp = int(datetime.now(UTC).timestamp())
-    window_start = current_timestamp - (current_timestamp % period)
+    script = _registered_scripts.get(algorithm)
+    if script is None or script.registered_client is not client:
+        script = _registered_scripts[algorithm] = client.register_script(_SCRIPTS[algorithm])
 
-    sanitized_path = sanitize_path(path)
-    key = f"ratelimit:{user_id}:{sanitized_path}:{window_start}"
+    return script
+
+
+def _window_counter(
+    layout: RateLimitLayout, user_id: int | str, sanitized_path: str, period: int, window_start: int
+) -> tuple[str, list[str]]:
+    """Key of a window counter, and the hash field holding it as trailing script arguments if any."""
+    if layout is RateLimitLayout.HASH:
+        return f"ratelimit:{user_id}:{period}:{window_start}", [sanitized_path]
+
+    return f"ratelimit:{user_id}:{sanitized_path}:{window_start}", []
+
+
+async def load_scripts() -> None:
+    """Preload the rate limit scripts into Redis so that the first checks do not pay for a NOSCRIPT retry.
+
+    Does nothing if the Redis client is not initialized.
+    """
+    if client is None:
+        return
+
+    for algorithm in RateLimitAlgorithm:
+        await client.script_load(_get_script(algorithm).script)
+
+
+@dataclass
+class _LocalWindow:
+    key: str
+    field: list[str]
+    expires_at: int
+    known: int = 0
+    in_flight: int = 0
+    pending: int = 0
+
+
+class LocalRateLimiter:
+    """Approximate fixed window rate limiting that counts most requests in this worker process.
+
+    Requests are admitted against a local counter per user, path and window, and the counts are added to the
+    Redis counters shared with exact checks in batched pipelines, every `sync_interval` seconds or `sync_requests`
+    admitted requests, whichever comes first. Each sync also brings back the totals of the other workers.
+
+    Parameters
+    ----------
+    max_overshoot: float
+        Fraction of a limit that each worker may admit without Redis having seen it.
+    sync_interval: float
+        Seconds between syncs.
+    sync_requests: int
+        Locally admitted requests, over all keys, that trigger a sync before the interval elapses.
+    layout: RateLimitLayout, optional
+        Layout of the Redis counters. Defaults to one key per counter.
+
+    Note
+    ----
+        - A worker admits at most `floor(limit * max_overshoot)` requests per user, path and window beyond the
+          last total it got from Redis. Past that, the request is checked exactly and carries the pending count
+          with it. With `n` workers, a window therefore lets through at most about
+          `limit + n * floor(limit * max_overshoot)` requests.
+        - Limits below `1 / max_overshoot` get no local budget and are always checked exactly.
+        - A window known to be exhausted is rejected locally, without a Redis round trip.
+        - Requests admitted since the last sync are lost if the worker dies. They are undercounted, never
+          overcounted.
+    """
+
+    def __init__(
+        self,
+        max_overshoot: float,
+        sync_interval: float,
+        sync_requests: int,
+        layout: RateLimitLayout = RateLimitLayout.KEYS,
+    ) -> None:
+        self.max_overshoot = max_overshoot
+        self.sync_interval = sync_interval
+        self.sync_requests = sync_requests
+        self.layout = layout
+        self._windows: dict[tuple[int | str, str, int, int], _LocalWindow] = {}
+        self._pending_requests = 0
+        self._sync_lock = asyncio.Lock()
+        self._sync_task: asyncio.Task | None = None
+
+    async def check(self, user_id: int | str, path: str, limit: int, period: int) -> RateLimitStatus:
+        current_timestamp = int(time())
+        window_start = current_timestamp - (current_timestamp % period)
+        reset_after = window_start + period - current_timestamp
+        sanitized_path = sanitize_path(path)
+
+        window_id = (user_id, sanitized_path, period, window_start)
+        window = self._windows.get(window_id)
+        if window is None:
+            key, field = _window_counter(self.layout, user_id, sanitized_path, period, window_start)
+            window = self._windows[window_id] = _LocalWindow(key=key, field=field, expires_at=window_start + period)
+
+        count = window.known + window.in_flight + window.pending
+        if count >= limit:
+            return RateLimitStatus(True, count, reset_after)
+
+        if window.pending < math.floor(limit * self.max_overshoot):
+            window.pending += 1
+            self._pending_requests += 1
+            if self._pending_requests >= self.sync_requests:
+                self._schedule_sync()
+
+            return RateLimitStatus(False, count + 1, reset_after)
+
+        increment = window.pending + 1
+        window.pending = 0
+        window.in_flight += increment
+        self._pending_requests -= increment - 1
+        try:
+            current_count, reset_after = await _get_script(RateLimitAlgorithm.FIXED_WINDOW)(
+                keys=[window.key], args=[reset_after, increment, *window.field]
+            )
+
+        except Exception as e:
+            window.pending += increment - 1
+            self._pending_requests += increment - 1
+            logger.exception(f"Error checking rate limit for user {user_id} on path {path}: {e}")
+            raise e
 
+        finally:
+            window.in_flight -= increment
+
+        window.known = max(window.known, current_count)
+        return RateLimitStatus(current_count > limit, current_count, reset_after)
+
+    async def sync(self) -> None:
+        """Add the locally admitted requests to the Redis counters in one pipeline, and fetch their totals."""
+        if client is None:
+            return
+
+        async with self._sync_lock:
+            current_timestamp = int(time())
+            for window_id in [
+                window_id for window_id, window in self._windows.items() if window.expires_at <= current_timestamp
+            ]:
+                self._pending_requests -= self._windows.pop(window_id).pending
+
+            batch = [(window, window.pending) for window in self._windows.values() if window.pending]
+            if not batch:
+                return
+
+            script = _get_script(RateLimitAlgorithm.FIXED_WINDOW)
+            pipe = client.pipeline(transaction=False)
+            for window, pending in batch:
+                await script(
+                    keys=[window.key], args=[window.expires_at - current_timestamp, pending, *window.field], client=pipe
+                )
+                window.pending -= pending
+                window.in_flight += pending
+                self._pending_requests -= pending
+
+            try:
+                results = await pipe.execute()
+
+            except Exception:
+                for window, pending in batch:
+                    window.pending += pending
+                    self._pending_requests += pending
+                raise
+
+            finally:
+                for window, pending in batch:
+                    window.in_flight -= pending
+
+            for (window, _), (current_count, _) in zip(batch, results):
+                window.known = max(window.known, current_count)
+
+    def _schedule_sync(self) -> None:
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.create_task(self._sync_logged())
+
+    async def _sync_logged(self) -> None:
+        try:
+            await self.sync()
+        except Exception as e:
+            logger.exception(f"Rate limit counters sync failed, retrying with the next one: {e}")
+
+    async def run(self) -> None:
+        """Sync every `sync_interval` seconds, forever."""
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            await self._sync_logged()
+
+
+local_limiter = LocalRateLimiter(
+    max_overshoot=settings.RATE_LIMIT_MAX_OVERSHOOT,
+    sync_interval=settings.RATE_LIMIT_SYNC_INTERVAL_MS / 1000,
+    sync_requests=settings.RATE_LIMIT_SYNC_REQUESTS,
+    layout=RateLimitLayout(settings.RATE_LIMIT_LAYOUT),
+)
+
+_local_sync_task: asyncio.Task | None = None
+
+
+async def start_local_sync() -> None:
+    """Periodically synchronize the counters of approximate rate limiting with Redis.
+
+    Does nothing if the Redis client is not initialized or `RATE_LIMIT_APPROXIMATE` is off.
+    """
+    global _local_sync_task
+
+    if client is None or not settings.RATE_LIMIT_APPROXIMATE or _local_sync_task is not None:
+        return
+
+    _local_sync_task = asyncio.create_task(local_limiter.run())
+
+
+async def stop_local_sync() -> None:
+    global _local_sync_task
+
+    if _local_sync_task is None:
+        return
+
+    _local_sync_task.cancel()
+    try:
+        await _local_sync_task
+    except asyncio.CancelledError:
+        pass
+
+    _local_sync_task = None
     try:
-        current_count = await client.incr(key)
-        if current_count == 1:
-            await client.expire(key, period)
+        await local_limiter.sync()
+    except Exception as e:
+        logger.exception(f"Final sync of rate limit counters failed: {e}")
+
+
+async def check_rate_limit(
+    user_id: int | str,
+    path: str,
+    limit: int,
+    period: int,
+    algorithm: RateLimitAlgorithm = RateLimitAlgorithm.FIXED_WINDOW,
+    approximate: bool = False,
+    layout: RateLimitLayout = RateLimitLayout.KEYS,
+) -> RateLimitStatus:
+    """Count a request against a rate limit in a single Redis round trip.
+
+    Parameters
+    ----------
+    user_id: int | str
+        The user ID, or the client host for anonymous requests.
+    path: str
+        The request path.
+    limit: int
+        Maximum number of requests per period.
+    period: int
+        Length of the period in seconds.
+    algorithm: RateLimitAlgorithm, optional
+        How requests are counted. Defaults to a fixed window.
+    approximate: bool, optional
+        Count fixed window requests in this worker process and synchronize with Redis in batches, see
+        `LocalRateLimiter`. Ignored for other algorithms. Defaults to False.
+    layout: RateLimitLayout, optional
+        Layout of the Redis state. Defaults to one key per user, path and window.
 
-        if current_count > limit:
-            return True
+    Returns
+    -------
+    RateLimitStatus
+        Whether the request exceeds the limit, how many requests count against it, and when it resets.
+
+    Note
+    ----
+        - Each algorithm keeps O(1) state per user and path: one counter for the fixed window, the current and
+          previous counters for the sliding window, and one timestamp for GCRA.
+        - The fixed and sliding windows share their counters, so switching between them keeps the counts. Switching
+          layouts starts them over.
+        - Scripts run with EVALSHA. If Redis lost them, e.g. after a restart or SCRIPT FLUSH, they are loaded again
+          and the call retried once.
+    """
+    if approximate and algorithm is RateLimitAlgorithm.FIXED_WINDOW:
+        return await local_limiter.check(user_id=user_id, path=path, limit=limit, period=period)
+
+    script = _get_script(algorithm)
+    sanitized_path = sanitize_path(path)
+    now = time()
+
+    if algorithm is RateLimitAlgorithm.GCRA:
+        args: list[int | float | str] = [math.floor(now * 1000), period * 1000 / limit, period * 1000]
+        if layout is RateLimitLayout.HASH:
+            keys = [f"ratelimit:{user_id}:gcra"]
+            args.append(sanitized_path)
+        else:
+            keys = [f"ratelimit:{user_id}:{sanitized_path}:gcra"]
+
+    else:
+        current_timestamp = int(now)
+        window_start = current_timestamp - (current_timestamp % period)
+        key, field = _window_counter(layout, user_id, sanitized_path, period, window_start)
+        if algorithm is RateLimitAlgorithm.SLIDING_WINDOW:
+            previous_key, _ = _window_counter(layout, user_id, sanitized_path, period, window_start - period)
+            keys = [key, previous_key]
+            args = [limit, period, current_timestamp - window_start, *field]
+        else:
+            keys = [key]
+            args = [window_start + period - current_timestamp, 1, *field]
+
+    try:
+        result = await script(keys=keys, args=args)
 
     except Exception as e:
         logger.exception(f"Error checking rate limit for user {user_id} on path {path}: {e}")
         raise e
 
-    return False
+    if algorithm is RateLimitAlgorithm.FIXED_WINDOW:
+        current_count, reset_after = result
+        return RateLimitStatus(current_count > limit, current_count, reset_after)
+
+    limited, current_count, reset_after = result
+    return RateLimitStatus(bool(limited), current_count, reset_after)
+
+
+async def is_rate_limited(
+    db: AsyncSession,
+    user_id: int,
+    path: str,
+    limit: int,
+    period: int,
+    algorithm: RateLimitAlgorithm = RateLimitAlgorithm.FIXED_WINDOW,
+) -> bool:
+    status = await check_rate_limit(
+        user_id=user_id,
+        path=path,
+        limit=limit,
+        period=period,
+        algorithm=algorithm,
+        approximate=settings.RATE_LIMIT_APPROXIMATE,
+        layout=RateLimitLayout(settings.RATE_LIMIT_LAYOUT),
+    )
+    return status.limited
@@ -0,0 +1,268 @@
+import asyncio
+import logging
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field
+from time import time
+from typing import Any, NamedTuple, cast
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.settings import get_settings
+
+from ...crud.crud_rate_limit import crud_rate_limits
+from ...crud.crud_tier import crud_tiers
+from ...models.rate_limit import RateLimitAlgorithm, RateLimitRead, sanitize_path
+from ...models.tier import TierRead
+from ..exceptions.cache_exceptions import MissingClientError
+from . import rate_limit
+from .path_index import PathIndex
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+RULES_CHANNEL = settings.RATE_LIMIT_RULES_CHANNEL
+RULES_VERSION_KEY = f"{RULES_CHANNEL}:version"
+
+
+class RateLimitRule(NamedTuple):
+    """A rate limit, and the path its requests are counted under: the normalized pattern it was matched with, so
+    that every route matched by a wildcard shares one counter."""
+
+    limit: int
+    period: int
+    algorithm: RateLimitAlgorithm = RateLimitAlgorithm.FIXED_WINDOW
+    path: str = ""
+
+
+@dataclass(frozen=True)
+class RateLimitSnapshot:
+    """Immutable copy of every tier and rate limit, swapped as a whole on reload.
+
+    Attributes
+    ----------
+    version: int
+        Value of the shared rules version counter when the snapshot was loaded, or -1 if it was never loaded.
+    tiers: Mapping[int, str]
+        Tier names by ID.
+    rules: Mapping[int, PathIndex]
+        Rate limits of each tier by path pattern.
+    legacy_rules: Mapping[tuple[int, str], RateLimitRule]
+        Rate limits whose path has no `/`, by tier ID and sanitized path, as they were matched before patterns.
+    loaded_at: float
+        Timestamp of the load.
+    """
+
+    version: int = -1
+    tiers: Mapping[int, str] = field(default_factory=dict)
+    rules: Mapping[int, PathIndex] = field(default_factory=dict)
+    legacy_rules: Mapping[tuple[int, str], RateLimitRule] = field(default_factory=dict)
+    loaded_at: float = 0.0
+    _matches: dict[tuple[int, str], RateLimitRule | None] = field(default_factory=dict, repr=False, compare=False)
+
+    def match(self, tier_id: int, route_path: str) -> RateLimitRule | None:
+        """Most specific rate limit of a tier for a route.
+
+        Parameters
+        ----------
+        tier_id: int
+            The tier ID.
+        route_path: str
+            The route template, e.g. `/api/v1/user/{username}/posts`, not the request path.
+
+        Returns
+        -------
+        RateLimitRule | None
+            The rate limit, or None if the tier has none for this route.
+
+        Note
+        ----
+            Routes are finite, so results are memoized for the lifetime of the snapshot and a lookup is a dictionary
+            hit once each route has been seen.
+        """
+        key = (tier_id, route_path)
+        try:
+            return self._matches[key]
+        except KeyError:
+            pass
+
+        rule = self.legacy_rules.get((tier_id, sanitize_path(route_path)))
+        if rule is None and tier_id in self.rules:
+            matched = self.rules[tier_id].match_pattern(route_path)
+            if matched is not None:
+                pattern, rule = matched
+                rule = rule._replace(path=pattern)
+
+        if len(self._matches) < _MAX_MEMOIZED_MATCHES:
+            self._matches[key] = rule
+
+        return rule
+
+
+_MAX_MEMOIZED_MATCHES = 65536
+
+snapshot = RateLimitSnapshot()
+
+_reload_lock = asyncio.Lock()
+_listener_task: asyncio.Task | None = None
+_reload_task: asyncio.Task | None = None
+
+
+async def _current_version() -> int:
+    if rate_limit.client is None:
+        return 0
+
+    return int(await rate_limit.client.get(RULES_VERSION_KEY) or 0)
+
+
+async def load_snapshot(db: AsyncSession) -> RateLimitSnapshot:
+    """Read every tier and rate limit from the database and make them the current snapshot.
+
+    Parameters
+    ----------
+    db: AsyncSession
+        The database session.
+
+    Returns
+    -------
+    RateLimitSnapshot
+        The new snapshot.
+
+    Note
+    ----
+        The version is read before the rows, so a change committed while they are read is either in the snapshot or
+        announced with a higher version, which triggers another reload.
+    """
+    global snapshot
+
+    version = await _current_version()
+    tiers_data = await crud_tiers.get_multi(db=db, limit=None, schema_to_select=TierRead)
+    rate_limits_data = await crud_rate_limits.get_multi(db=db, limit=None, schema_to_select=RateLimitRead)
+
+    tier_rows = cast(list[dict[str, Any]], tiers_data["data"])
+    rate_limit_rows = cast(list[dict[str, Any]], rate_limits_data["data"])
+
+    tiers = {tier["id"]: tier["name"] for tier in tier_rows}
+    rules: dict[int, PathIndex] = {}
+    legacy_rules = {}
+    for row in rate_limit_rows:
+        rule = RateLimitRule(row["limit"], row["period"], RateLimitAlgorithm(row["algorithm"]))
+        if "/" not in row["path"]:
+            path = sanitize_path(row["path"])
+            legacy_rules[(row["tier_id"], path)] = rule._replace(path=path)
+            continue
+
+        try:
+            rules.setdefault(row["tier_id"], PathIndex()).insert(row["path"], rule)
+        except ValueError as e:
+            logger.error(f"Ignoring rate limit {row['name']}: {e}")
+
+    snapshot = RateLimitSnapshot(
+        version=version, tiers=tiers, rules=rules, legacy_rules=legacy_rules, loaded_at=time()
+    )
+    rule_count = sum(len(index) for index in rules.values()) + len(legacy_rules)
+    logger.info(f"Loaded rate limit rules version {version}: {len(tiers)} tiers, {rule_count} rate limits")
+    return snapshot
+
+
+async def reload_snapshot(session_factory: Callable[[], AsyncSession], min_version: int | None = None) -> None:
+    """Reload the snapshot, unless it is already at `min_version` or later.
+
+    Concurrent reloads are serialized, so a burst of notifications costs at most one reload after the running one.
+    """
+    async with _reload_lock:
+        if min_version is not None and snapshot.version >= min_version:
+            return
+
+        async with session_factory() as db:
+            await load_snapshot(db)
+
+
+async def notify_rules_changed() -> None:
+    """Tell every worker process to reload its snapshot, after tiers or rate limits were written.
+
+    Does nothing if the Redis client is not initialized; workers then pick the change up on their periodic reload.
+    """
+    if rate_limit.client is None:
+        return
+
+    version = await rate_limit.client.incr(RULES_VERSION_KEY)
+    await rate_limit.client.publish(RULES_CHANNEL, version)
+
+
+async def _listen_for_changes(session_factory: Callable[[], AsyncSession]) -> None:
+    client = rate_limit.client
+    if client is None:
+        raise MissingClientError
+
+    while True:
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(RULES_CHANNEL)
+            # Catch up on changes announced while unsubscribed
+            await reload_snapshot(session_factory, min_version=await _current_version())
+            async for message in pubsub.listen():
+                await reload_snapshot(session_factory, min_version=int(message["data"]))
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            logger.exception(f"Rate limit rules listener failed, resubscribing: {e}")
+            await asyncio.sleep(1)
+
+        finally:
+            await pubsub.aclose()
+
+
+async def _reload_periodically(session_factory: Callable[[], AsyncSession], interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await reload_snapshot(session_factory)
+        except Exception as e:
+            logger.exception(f"Periodic reload of rate limit rules failed, keeping version {snapshot.version}: {e}")
+
+
+async def start_rules_refresher(session_factory: Callable[[], AsyncSession]) -> None:
+    """Load the rate limit rules and keep them fresh for the lifetime of this worker process.
+
+    Parameters
+    ----------
+    session_factory: Callable[[], AsyncSession]
+        Opens database sessions, e.g. `local_session`.
+
+    Note
+    ----
+        - Changes are picked up when `notify_rules_changed` announces them, and in any case every
+          `RATE_LIMIT_RULES_RELOAD_INTERVAL` seconds in case a notification was lost.
+        - Without a Redis client only the periodic reload runs.
+    """
+    global _listener_task, _reload_task
+
+    await reload_snapshot(session_factory)
+
+    if rate_limit.client is not None and _listener_task is None:
+        _listener_task = asyncio.create_task(_listen_for_changes(session_factory))
+
+    if _reload_task is None:
+        _reload_task = asyncio.create_task(
+            _reload_periodically(session_factory, settings.RATE_LIMIT_RULES_RELOAD_INTERVAL)
+        )
+
+
+async def stop_rules_refresher() -> None:
+    global _listener_task, _reload_task
+
+    for task in (_listener_task, _reload_task):
+        if task is None:
+            continue
+
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    _listener_task = None
+    _reload_task = None
@@ -0,0 +1,312 @@
+import asyncio
+import hashlib
+import logging
+import math
+from collections.abc import Callable
+from datetime import UTC, datetime
+from time import time
+
+from jose import JWTError, jwt
+from redis.asyncio import ConnectionPool, Redis
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import col
+
+from src.config.settings import get_settings
+
+from ..db.token_blacklist import TokenBlacklist
+from ..exceptions.cache_exceptions import MissingClientError
+from .bloom_filter import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+pool: ConnectionPool | None = None
+client: Redis | None = None
+
+REVOCATIONS_CHANNEL = settings.TOKEN_BLACKLIST_CHANNEL
+KEY_PREFIX = "blacklist:"
+SCAN_BATCH_SIZE = 1000
+
+revoked_filter: BloomFilter | None = None
+_rebuilding_filter: BloomFilter | None = None
+_rebuild_lock = asyncio.Lock()
+_listener_task: asyncio.Task | None = None
+_rebuild_task: asyncio.Task | None = None
+_write_behind_task: asyncio.Task | None = None
+_write_behind_queue: list[tuple[str, float]] = []
+
+
+def token_fingerprint(token: str, jti: str | None = None) -> str:
+    """What a revoked token is stored under instead of the token itself: `jti:<jti>` for tokens with a `jti`
+    claim, so that revocation does not depend on the exact encoding, and a short digest of the token otherwise."""
+    if jti is not None:
+        return f"jti:{jti}"
+
+    return hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+
+
+def _new_filter() -> BloomFilter:
+    return BloomFilter(settings.TOKEN_BLACKLIST_FILTER_CAPACITY, settings.TOKEN_BLACKLIST_FILTER_FALSE_POSITIVE_RATE)
+
+
+def _remember(fingerprint: str) -> None:
+    for bloom_filter in (revoked_filter, _rebuilding_filter):
+        if bloom_filter is not None:
+            bloom_filter.add(fingerprint)
+
+
+async def revoke(token: str, expires_at: float, jti: str | None = None) -> None:
+    """Add a token to the blacklist until it expires.
+
+    Parameters
+    ----------
+    token: str
+        The revoked token.
+    expires_at: float
+        Unix timestamp of the token's `exp` claim. Expired tokens are rejected by signature verification anyway,
+        so nothing is stored past it.
+    jti: str, optional
+        The token's `jti` claim, if any.
+
+    Note
+    ----
+        - Other worker processes add the fingerprint to their filter when they receive it over pub/sub. Until
+          then, usually for a few milliseconds, they may still accept the token.
+        - With `TOKEN_BLACKLIST_WRITE_BEHIND` the revocation is also queued for the database, see
+          `start_token_blacklist`.
+    """
+    if client is None:
+        raise MissingClientError
+
+    ttl = math.ceil(expires_at - time())
+    if ttl <= 0:
+        return
+
+    fingerprint = token_fingerprint(token, jti)
+    async with client.pipeline(transaction=False) as pipe:
+        pipe.set(f"{KEY_PREFIX}{fingerprint}", 1, ex=ttl)
+        pipe.publish(REVOCATIONS_CHANNEL, fingerprint)
+        await pipe.execute()
+
+    _remember(fingerprint)
+    if settings.TOKEN_BLACKLIST_WRITE_BEHIND:
+        _write_behind_queue.append((fingerprint, expires_at))
+
+
+async def is_revoked(token: str, jti: str | None = None) -> bool:
+    """Whether a token was revoked. Tokens the filter has never seen are answered without a Redis round trip."""
+    if client is None:
+        raise MissingClientError
+
+    fingerprint = token_fingerprint(token, jti)
+    if revoked_filter is not None and fingerprint not in revoked_filter:
+        return False
+
+    return bool(await client.exists(f"{KEY_PREFIX}{fingerprint}"))
+
+
+async def rebuild_filter() -> None:
+    """Replace the filter with one holding every fingerprint in Redis, dropping the ones that have expired since.
+
+    Fingerprints received over pub/sub during the scan go to both filters, so none is lost in the swap.
+    """
+    global revoked_filter, _rebuilding_filter
+
+    if client is None:
+        raise MissingClientError
+
+    async with _rebuild_lock:
+        rebuilt_filter = _rebuilding_filter = _new_filter()
+        try:
+            async for key in client.scan_iter(match=f"{KEY_PREFIX}*", count=SCAN_BATCH_SIZE):
+                key = key.decode() if isinstance(key, bytes) else key
+                rebuilt_filter.add(key.removeprefix(KEY_PREFIX))
+
+            revoked_filter = rebuilt_filter
+
+        finally:
+            _rebuilding_filter = None
+
+    info = rebuilt_filter.info()
+    logger.info(
+        f"Token blacklist filter rebuilt: {info['count']} tokens in {info['memory_bytes']} bytes, "
+        f"estimated false positive rate {info['estimated_false_positive_rate']:.2e} "
+        f"(target {info['target_false_positive_rate']:.2e} up to {info['capacity']} tokens)"
+    )
+    if info["count"] > info["capacity"]:
+        logger.warning("More revoked tokens than TOKEN_BLACKLIST_FILTER_CAPACITY, consider raising it")
+
+
+def filter_info() -> dict[str, float] | None:
+    """Size, memory and false positive rate of this worker's filter, or None if it is disabled."""
+    return None if revoked_filter is None else revoked_filter.info()
+
+
+def _unverified_jti(token: str) -> str | None:
+    try:
+        jti: str | None = jwt.get_unverified_claims(token).get("jti")
+        return jti
+    except JWTError:
+        return None
+
+
+async def import_from_database(db: AsyncSession) -> int:
+    """Copy the unexpired rows of the `TokenBlacklist` table into Redis.
+
+    Migration path from the table-backed blacklist, safe to run more than once. Rows hold either a full token,
+    written before the Redis blacklist, or a fingerprint, written behind by it.
+
+    Returns
+    -------
+    int
+        Number of tokens imported.
+    """
+    if client is None:
+        raise MissingClientError
+
+    now = datetime.now(UTC)
+    result = await db.execute(
+        select(col(TokenBlacklist.token), col(TokenBlacklist.expires_at)).where(col(TokenBlacklist.expires_at) > now)
+    )
+
+    imported = 0
+    async with client.pipeline(transaction=False) as pipe:
+        for token, expires_at in result:
+            if "." in token:
+                fingerprint = token_fingerprint(token, _unverified_jti(token))
+            else:
+                fingerprint = token
+            ttl = math.ceil((expires_at - now).total_seconds())
+            pipe.set(f"{KEY_PREFIX}{fingerprint}", 1, ex=max(ttl, 1))
+            imported += 1
+
+        await pipe.execute()
+
+    return imported
+
+
+async def flush_write_behind(session_factory: Callable[[], AsyncSession]) -> None:
+    """Insert queued revocations into the `TokenBlacklist` table, and delete the expired rows."""
+    global _write_behind_queue
+
+    batch, _write_behind_queue = _write_behind_queue, []
+    now = datetime.now(UTC)
+    try:
+        async with session_factory() as db:
+            existing = set()
+            if batch:
+                result = await db.execute(
+                    select(col(TokenBlacklist.token)).where(col(TokenBlacklist.token).in_([fp for fp, _ in batch]))
+                )
+                existing = set(result.scalars())
+
+            db.add_all(
+                TokenBlacklist(token=fingerprint, expires_at=datetime.fromtimestamp(expires_at, UTC))
+                for fingerprint, expires_at in dict(batch).items()
+                if fingerprint not in existing
+            )
+            await db.execute(delete(TokenBlacklist).where(col(TokenBlacklist.expires_at) <= now))
+            await db.commit()
+
+    except Exception:
+        # Keep the batch for the next flush
+        _write_behind_queue = batch + _write_behind_queue
+        raise
+
+
+async def _write_behind_periodically(session_factory: Callable[[], AsyncSession], interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await flush_write_behind(session_factory)
+        except Exception as e:
+            logger.exception(f"Token blacklist write-behind failed, {len(_write_behind_queue)} revocations queued: {e}")
+
+
+async def _listen_for_revocations() -> None:
+    if client is None:
+        raise MissingClientError
+
+    while True:
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(REVOCATIONS_CHANNEL)
+            # Catch up on revocations announced while unsubscribed
+            await rebuild_filter()
+            async for message in pubsub.listen():
+                data = message["data"]
+                _remember(data.decode() if isinstance(data, bytes) else data)
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            logger.exception(f"Token blacklist listener failed, resubscribing: {e}")
+            await asyncio.sleep(1)
+
+        finally:
+            await pubsub.aclose()
+
+
+async def _rebuild_periodically(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await rebuild_filter()
+        except Exception as e:
+            logger.exception(f"Periodic rebuild of the token blacklist filter failed: {e}")
+
+
+async def start_token_blacklist(session_factory: Callable[[], AsyncSession] | None = None) -> None:
+    """Build this worker's filter of revoked tokens and keep it up to date, and start the database write-behind.
+
+    Parameters
+    ----------
+    session_factory: Callable[[], AsyncSession], optional
+        Opens database sessions, e.g. `local_session`. Required for `TOKEN_BLACKLIST_WRITE_BEHIND`.
+
+    Note
+    ----
+        - The filter is rebuilt every `TOKEN_BLACKLIST_FILTER_REBUILD_INTERVAL` seconds to drop expired tokens,
+          which a Bloom filter cannot remove one by one.
+        - Does nothing if the Redis client is not initialized.
+    """
+    global _listener_task, _rebuild_task, _write_behind_task
+
+    if client is None:
+        return
+
+    if settings.TOKEN_BLACKLIST_FILTER_ENABLED and _listener_task is None:
+        # The listener builds the filter once subscribed, so that no revocation falls in between
+        _listener_task = asyncio.create_task(_listen_for_revocations())
+        _rebuild_task = asyncio.create_task(_rebuild_periodically(settings.TOKEN_BLACKLIST_FILTER_REBUILD_INTERVAL))
+
+    if settings.TOKEN_BLACKLIST_WRITE_BEHIND and session_factory is not None and _write_behind_task is None:
+        _write_behind_task = asyncio.create_task(
+            _write_behind_periodically(session_factory, settings.TOKEN_BLACKLIST_WRITE_BEHIND_INTERVAL)
+        )
+
+
+async def stop_token_blacklist(session_factory: Callable[[], AsyncSession] | None = None) -> None:
+    global _listener_task, _rebuild_task, _write_behind_task, revoked_filter
+
+    for task in (_listener_task, _rebuild_task, _write_behind_task):
+        if task is None:
+            continue
+
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    _listener_task = _rebuild_task = _write_behind_task = None
+    revoked_filter = None
+
+    if _write_behind_queue and session_factory is not None:
+        try:
+            await flush_write_behind(session_factory)
+        except Exception as e:
+            logger.error(f"Final token blacklist write-behind failed, {len(_write_behind_queue)} revocations lost: {e}")
@@ -0,0 +1,87 @@
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import time
+from typing import Any
+
+from src.config.settings import get_settings
+
+settings = get_settings()
+
+
+@dataclass
+class VerifiedTokenCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class VerifiedTokenCache:
+    """Bounded in-process LRU cache of tokens whose signature and claims were already verified.
+
+    Entries are keyed by a 128-bit BLAKE2b digest of the whole token, signature included, so a token only hits if
+    it is byte for byte one that passed verification. They are dropped at the token's `exp`.
+
+    Parameters
+    ----------
+    max_entries: int, optional
+        Maximum number of tokens kept in memory. 0 disables the cache. Defaults to 10000.
+
+    Attributes
+    ----------
+    stats: VerifiedTokenCacheStats
+        Hit, miss and eviction counters for this process.
+
+    Note
+    ----
+        - Only signature verification and claim parsing are skipped. Revocation must still be checked on every
+          request.
+        - Tokens stay valid until they expire even if `SECRET_KEY` changes, unless `clear()` is called.
+    """
+
+    def __init__(self, max_entries: int = 10000) -> None:
+        self.max_entries = max_entries
+        self.stats = VerifiedTokenCacheStats()
+        self._entries: OrderedDict[bytes, tuple[Any, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def get(self, token: str) -> Any | None:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+
+        value, expires_at = entry
+        if expires_at <= time():
+            del self._entries[key]
+            self.stats.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def set(self, token: str, value: Any, expires_at: float) -> None:
+        """Cache the verified claims of a token until `expires_at`, a Unix timestamp."""
+        if self.max_entries <= 0 or expires_at <= time():
+            return
+
+        key = self._key(token)
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+verified_tokens = VerifiedTokenCache(max_entries=settings.TOKEN_CACHE_MAX_ENTRIES)
@@ -1,3 +1,5 @@
+from src.app.core.utils import cache, principal_cache, rate_limit, token_blacklist
+from src.app.core.utils.password_hasher import password_hasher
 from src.app.setup import create_application
 from src.config.settings import get_settings
 from src.core.logger import logger
@@ -16,6 +18,16 @@ async def startup_event():
     """
     logger.info(f"Starting {settings.APP_NAME} in {settings.ENVIRONMENT} mode")
     logger.info(f"API documentation available at: /docs")
+    await cache.load_scripts()
+    await cache.start_invalidation_listener()
+    await cache.start_metrics_flusher()
+    await rate_limit.load_scripts()
+    await rate_limit.start_local_sync()
+    # Rate limit rules are read from the database, see `app.core.db.database`
+    # await rate_limit_rules.start_rules_refresher(local_session)
+    # Pass `local_session` for TOKEN_BLACKLIST_WRITE_BEHIND once the database is set up
+    await token_blacklist.start_token_blacklist()
+    await principal_cache.start_eviction_listener()
 
 
 @app.on_event("shutdown")
@@ -25,3 +37,10 @@ async def shutdown_event():
     Runs when the application is shutting down.
     """
     logger.info(f"Shutting down {settings.APP_NAME}")
+    await cache.stop_invalidation_listener()
+    await cache.stop_metrics_flusher()
+    await rate_limit.stop_local_sync()
+    await token_blacklist.stop_token_blacklist()
+    await principal_cache.stop_eviction_listener()
+    password_hasher.shutdown()
+    # await rate_limit_rules.stop_rules_refresher()
@@ -1,56 +1,309 @@
-from fastapi import FastAPI, Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+import fnmatch
+from collections.abc import Callable, Iterator, Mapping
+from dataclasses import dataclass, replace
+from functools import cached_property
+from typing import Any
 
+from starlette.datastructures import MutableHeaders
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-class ClientCacheMiddleware(BaseHTTPMiddleware):
-    """Middleware to set the `Cache-Control` header for client-side caching on all responses.
+from ..core.utils.etag import compute_etag, etag_matches
+
+_NOT_MODIFIED_HEADERS = (b"cache-control", b"content-location", b"date", b"etag", b"expires", b"vary")
+_SAFE_METHODS = ("GET", "HEAD")
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Client and shared cache directives for the responses of a route.
+
+    Attributes
+    ----------
+    max_age: int
+        Seconds browsers and shared caches may reuse a response. Defaults to 0.
+    s_maxage: int | None
+        Seconds shared caches such as CDNs may reuse a response, overriding `max_age` for them. Ignored if private.
+    stale_while_revalidate: int | None
+        Seconds a cache may keep serving a stale response while it revalidates it in the background.
+    private: bool
+        Only the end user's browser may cache the response, e.g. for authenticated data.
+    no_cache: bool
+        Caches must revalidate the response, e.g. with its `ETag`, before every reuse. `max_age` and `s_maxage` are
+        ignored.
+    no_store: bool
+        The response must not be cached at all. Every other directive is ignored.
+    vary: Tuple[str, ...]
+        Request headers the response depends on, e.g. `("Authorization",)`.
+    """
+
+    max_age: int = 0
+    s_maxage: int | None = None
+    stale_while_revalidate: int | None = None
+    private: bool = False
+    no_cache: bool = False
+    no_store: bool = False
+    vary: tuple[str, ...] = ()
+
+    @cached_property
+    def cache_control(self) -> str:
+        if self.no_store:
+            return "no-store"
+
+        directives = ["private" if self.private else "public"]
+        if self.no_cache:
+            directives.append("no-cache")
+        else:
+            directives.append(f"max-age={self.max_age}")
+            if self.s_maxage is not None and not self.private:
+                directives.append(f"s-maxage={self.s_maxage}")
+
+        if self.stale_while_revalidate is not None:
+            directives.append(f"stale-while-revalidate={self.stale_while_revalidate}")
+
+        return ", ".join(directives)
+
+    @cached_property
+    def for_authorized_request(self) -> "CachePolicy":
+        """This policy for requests carrying credentials, which shared caches must never store."""
+        if self.private or self.no_store:
+            return self
+
+        return replace(self, private=True)
+
+
+NO_STORE = CachePolicy(no_store=True)
+REVALIDATE = CachePolicy(private=True, no_cache=True)
+
+
+def cache_policy(policy: CachePolicy | None = None, **directives: Any) -> Callable:
+    """Attach a `CachePolicy` to an endpoint, for `ClientCacheMiddleware` to apply to its responses.
+
+    Parameters
+    ----------
+    policy: CachePolicy | None, optional
+        A ready-made policy, e.g. `NO_STORE`.
+    **directives: Any
+        Fields of a new `CachePolicy`, used when `policy` is not given.
+
+    Returns
+    -------
+    Callable
+        A decorator to apply below the route decorator.
+
+    Example
+    -------
+    ```python
+    @router.get("/tiers")
+    @cache_policy(max_age=60, s_maxage=600, stale_while_revalidate=60)
+    async def read_tiers(request: Request): ...
+    ```
+    """
+    resolved_policy = policy or CachePolicy(**directives)
+
+    def wrapper(func: Callable) -> Callable:
+        setattr(func, "__cache_policy__", resolved_policy)
+        return func
+
+    return wrapper
+
+
+def _iter_endpoints(routes: list[BaseRoute], prefix: str = "") -> Iterator[tuple[str, Callable]]:
+    for route in routes:
+        path = prefix + getattr(route, "path", "")
+        endpoint = getattr(route, "endpoint", None)
+        if endpoint is not None:
+            yield path, endpoint
+
+        yield from _iter_endpoints(getattr(route, "routes", []), path)
+
+
+class ClientCacheMiddleware:
+    """Middleware to set the `Cache-Control` header for client-side caching on all responses, and to answer
+    conditional GET and HEAD requests.
 
     Parameters
     ----------
-    app: FastAPI
-        The FastAPI application instance.
-    max_age: int, optional
-        Duration (in seconds) for which the response should be cached. Defaults to 60 seconds.
+    app: ASGIApp
+        The ASGI application to wrap.
+    default_policy: CachePolicy, optional
+        Policy of GET and HEAD responses of routes without one. Defaults to `REVALIDATE`, i.e. `private, no-cache`.
+    policies: Mapping[str, CachePolicy] | None, optional
+        Policies by route path template, e.g. `"/api/v1/user/{username}"`. Keys may use glob wildcards; the first
+        matching key wins. A policy attached with `cache_policy` takes precedence.
 
     Attributes
     ----------
-    max_age: int
-        Duration (in seconds) for which the response should be cached.
+    default_policy: CachePolicy
+        Policy of GET and HEAD responses of routes without one.
 
     Methods
     -------
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        Process the request and set the `Cache-Control` header in the response.
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        Process the request and set the `Cache-Control`, `Vary` and `ETag` headers in the response.
 
     Note
     ----
         - The `Cache-Control` header instructs clients (e.g., browsers)
         to cache the response for the specified duration.
+        - Policies are resolved once per endpoint on startup, so a request costs a dictionary lookup.
+        - Routes without a policy get `private, no-cache` on GET and HEAD, so only the browser keeps them and
+        revalidates them with their `ETag`, and `no-store` on other methods. Shared caching is opt-in per route
+        with `cache_policy`.
+        - Public policies are applied as private to requests with an `Authorization` header, so that a shared
+        cache never serves a response computed for one user to another.
+        - Successful GET and HEAD responses get a strong `ETag` derived from their body, unless the endpoint already
+        set one (see `raw_response` in `app.core.utils.cache.cache`) or the policy is `no-store`. Requests whose
+        `If-None-Match` matches get a bodiless `304 Not Modified` instead.
+        - This is a pure ASGI middleware: headers are edited in `send`, and only bodies that must be hashed are
+        buffered. Streaming responses, which have no `Content-Length`, pass through untouched and get no `ETag`.
     """
 
-    def __init__(self, app: FastAPI, max_age: int = 60) -> None:
-        super().__init__(app)
-        self.max_age = max_age
+    def __init__(
+        self, app: ASGIApp, default_policy: CachePolicy = REVALIDATE, policies: Mapping[str, CachePolicy] | None = None
+    ) -> None:
+        self.app = app
+        self.default_policy = default_policy
+        self.policies = dict(policies or {})
+        self._endpoint_policies: dict[Callable, CachePolicy] | None = None
+
+    def compile(self, routes: list[BaseRoute]) -> dict[Callable, CachePolicy]:
+        """Resolve the policy of every endpoint once, from the endpoint itself and from `policies`."""
+        endpoint_policies = {}
+        for path, endpoint in _iter_endpoints(routes):
+            policy = getattr(endpoint, "__cache_policy__", None)
+            if policy is None:
+                policy = next(
+                    (policy for pattern, policy in self.policies.items() if fnmatch.fnmatchcase(path, pattern)), None
+                )
+
+            if policy is not None:
+                endpoint_policies[endpoint] = policy
+
+        self._endpoint_policies = endpoint_policies
+        return endpoint_policies
+
+    def _resolve(self, scope: Scope) -> CachePolicy:
+        endpoint_policies = self._endpoint_policies
+        if endpoint_policies is None:
+            endpoint_policies = self.compile(scope["app"].routes)
+
+        endpoint: Callable | None = scope.get("endpoint")
+        policy = None
+        if endpoint is not None:
+            policy = endpoint_policies.get(endpoint) or getattr(endpoint, "__cache_policy__", None)
+
+        if policy is None:
+            policy = self.default_policy if scope["method"] in _SAFE_METHODS else NO_STORE
+
+        if any(name == b"authorization" for name, _ in scope["headers"]):
+            return policy.for_authorized_request
+
+        return policy
 
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        """Process the request and set the `Cache-Control` header in the response.
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Process the request and set the `Cache-Control`, `Vary` and `ETag` headers in the response.
 
         Parameters
         ----------
-        request: Request
-            The incoming request.
-        call_next: RequestResponseEndpoint
-            The next middleware or route handler in the processing chain.
-
-        Returns
-        -------
-        Response
-            The response object with the `Cache-Control` header set.
-
-        Note
-        ----
-            - This method is automatically called by Starlette for processing the request-response cycle.
+        scope: Scope
+            The ASGI connection scope.
+        receive: Receive
+            The ASGI receive channel.
+        send: Send
+            The ASGI send channel.
         """
-        response: Response = await call_next(request)
-        response.headers["Cache-Control"] = f"public, max-age={self.max_age}"
-        return response
+        if scope["type"] == "lifespan" and self._endpoint_policies is None and "app" in scope:
+            self.compile(scope["app"].routes)
+
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] not in _SAFE_METHODS:
+            await self.app(scope, receive, self._stamp_headers(scope, send))
+            return
+
+        if_none_match = None
+        for name, value in scope["headers"]:
+            if name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+                break
+
+        start_message: Message | None = None
+        body_chunks: list[bytes] = []
+        not_modified = False
+
+        async def send_not_modified(message: Message, etag: str) -> None:
+            headers = [(name, value) for name, value in message["headers"] if name in _NOT_MODIFIED_HEADERS]
+            if not any(name == b"etag" for name, _ in headers):
+                headers.append((b"etag", etag.encode("latin-1")))
+
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def send_with_etag(message: Message) -> None:
+            nonlocal start_message, not_modified
+
+            if message["type"] == "http.response.start":
+                policy = self._resolve(scope)
+                headers = self._apply(policy, message)
+                etag = headers.get("etag")
+                if message["status"] != 200 or policy.no_store or (etag is None and "content-length" not in headers):
+                    await send(message)
+
+                elif etag is None:
+                    start_message = message
+
+                elif etag_matches(if_none_match, etag):
+                    not_modified = True
+                    await send_not_modified(message, etag)
+
+                else:
+                    await send(message)
+
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            if not_modified:
+                return
+
+            if start_message is None:
+                await send(message)
+                return
+
+            body_chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(body_chunks)
+            etag = compute_etag(body)
+            if etag_matches(if_none_match, etag):
+                await send_not_modified(start_message, etag)
+                return
+
+            MutableHeaders(scope=start_message)["ETag"] = etag
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_with_etag)
+
+    def _apply(self, policy: CachePolicy, message: Message) -> MutableHeaders:
+        headers = MutableHeaders(scope=message)
+        headers["Cache-Control"] = policy.cache_control
+        for header in policy.vary:
+            headers.add_vary_header(header)
+
+        return headers
+
+    def _stamp_headers(self, scope: Scope, send: Send) -> Send:
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                self._apply(self._resolve(scope), message)
+
+            await send(message)
+
+        return send_with_headers
@@ -0,0 +1,133 @@
+import json
+import logging
+from collections.abc import Collection
+
+from jose import JWTError, jwt
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.config.settings import get_settings
+
+from ..core.utils import rate_limit
+from ..core.utils.rate_limit import RateLimitLayout
+from ..core.utils.token_cache import verified_tokens
+from ..models.rate_limit import RateLimitAlgorithm
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+_RATE_LIMITED_BODY = json.dumps({"detail": "Rate limit exceeded."}).encode()
+
+
+def _bearer_token(scope: Scope) -> str | None:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            return token if scheme.lower() == "bearer" and token else None
+
+    return None
+
+
+def _client_identity(scope: Scope) -> str:
+    """`user:<sub>` for requests with a valid access token, `ip:<host>` for the others."""
+    token = _bearer_token(scope)
+    if token is not None:
+        # Filled by `verify_token`, which also keeps the claims this function ignores
+        token_data = verified_tokens.get(token)
+        if token_data is not None:
+            return f"user:{token_data.username_or_email}"
+
+        try:
+            subject = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]).get("sub")
+        except JWTError:
+            subject = None
+
+        if subject is not None:
+            return f"user:{subject}"
+
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    """Middleware to enforce a global rate limit per client before routing, authentication and body parsing.
+
+    Parameters
+    ----------
+    app: ASGIApp
+        The ASGI application to wrap.
+    limit: int
+        Maximum number of requests per client and period.
+    period: int
+        Length of the period in seconds.
+    algorithm: RateLimitAlgorithm, optional
+        How requests are counted. Defaults to a fixed window.
+    exempt_paths: Collection[str], optional
+        Request paths that are never limited, e.g. health checks.
+
+    Note
+    ----
+        - Authenticated clients are identified by the `sub` claim of their bearer token, once its signature and
+        expiry are verified. It costs one HMAC unless an endpoint already verified the token, see
+        `verified_tokens`, and no database query; revocation is left to the endpoints. Other clients are
+        identified by their IP address, as set by the server, so run it behind a proxy with forwarded headers
+        enabled.
+        - Rejected requests get `429 Too Many Requests` with a `Retry-After` header before the request body is read.
+        - This limit is a coarse flood guard shared by all routes. The `rate_limiter` dependency still applies
+        per tier and route rules on top of it.
+        - If Redis is unavailable the request is let through.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limit: int,
+        period: int,
+        algorithm: RateLimitAlgorithm = RateLimitAlgorithm.FIXED_WINDOW,
+        exempt_paths: Collection[str] = (),
+    ) -> None:
+        self.app = app
+        self.limit = limit
+        self.period = period
+        self.algorithm = algorithm
+        self.exempt_paths = frozenset(exempt_paths)
+        self._layout = RateLimitLayout(settings.RATE_LIMIT_LAYOUT)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths or rate_limit.client is None:
+            await self.app(scope, receive, send)
+            return
+
+        identity = _client_identity(scope)
+        try:
+            status = await rate_limit.check_rate_limit(
+                user_id=identity,
+                path="global",
+                limit=self.limit,
+                period=self.period,
+                algorithm=self.algorithm,
+                approximate=settings.RATE_LIMIT_APPROXIMATE,
+                layout=self._layout,
+            )
+
+        except Exception as e:
+            logger.error(f"Rate limit check failed for {identity}, letting the request through: {e}")
+            await self.app(scope, receive, send)
+            return
+
+        if not status.limited:
+            await self.app(scope, receive, send)
+            return
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(_RATE_LIMITED_BODY)).encode()),
+                    (b"retry-after", str(max(status.reset_after, 1)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": _RATE_LIMITED_BODY})
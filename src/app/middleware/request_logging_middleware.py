@@ -0,0 +1,49 @@
+from time import perf_counter
+
+from fastapi import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.logger import log_request, logger
+
+
+class RequestLoggingMiddleware:
+    """Middleware to log every HTTP request with its status code and processing time.
+
+    Parameters
+    ----------
+    app: ASGIApp
+        The ASGI application to wrap.
+
+    Note
+    ----
+        - This is a pure ASGI middleware: the status code is read from the response start message in `send` and
+        the body is never wrapped, so streaming responses keep streaming.
+        - The processing time covers the whole response, body included.
+        - Requests that fail with an unhandled exception are logged with status 500.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = perf_counter() - start_time
+            await log_request(Request(scope), status_code)
+            logger.bind(access=True).debug(f"Request processed in {duration:.2f} seconds")
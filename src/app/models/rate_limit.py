@@ -1,4 +1,5 @@
 from datetime import datetime
+from enum import Enum
 from typing import Optional
 from sqlmodel import SQLModel, Field
 
@@ -7,10 +8,25 @@ def sanitize_path(path: str) -> str:
     return path.strip("/").replace("/", "_")
 
 
+class RateLimitAlgorithm(str, Enum):
+    """Rate limiting algorithms
+
+    - FIXED_WINDOW: Counts requests per calendar window. Allows up to twice the limit around window edges.
+    - SLIDING_WINDOW: Weights the previous window's count by its overlap with the last `period` seconds.
+    - GCRA: Generic cell rate algorithm. Allows bursts of up to `limit` requests, then one every `period / limit`.
+    """
+    FIXED_WINDOW = "fixed_window"
+    SLIDING_WINDOW = "sliding_window"
+    GCRA = "gcra"
+
+
 class RateLimitBase(SQLModel):
-    path: str = Field(..., schema_extra={"example": "users"})
+    path: str = Field(..., schema_extra={"example": "/api/v1/user/{username}/posts"})
     limit: int = Field(..., schema_extra={"example": 5})
     period: int = Field(..., schema_extra={"example": 60})
+    algorithm: RateLimitAlgorithm = Field(
+        default=RateLimitAlgorithm.FIXED_WINDOW, schema_extra={"example": RateLimitAlgorithm.SLIDING_WINDOW}
+    )
 
     @classmethod
     def validate_path(cls, v: str) -> str:
@@ -43,6 +59,7 @@ class RateLimitUpdate(SQLModel):
     path: Optional[str] = Field(default=None)
     limit: Optional[int] = None
     period: Optional[int] = None
+    algorithm: Optional[RateLimitAlgorithm] = None
     name: Optional[str] = None
 
     @classmethod
@@ -34,6 +34,15 @@ class UserRead(SQLModel):
     tier_id: Optional[int]
 
 
+class UserPrincipal(SQLModel):
+    """What authorization and rate limiting need to know about the authenticated user."""
+
+    id: int
+    username: str
+    is_superuser: bool
+    tier_id: Optional[int]
+
+
 class UserCreate(UserBase):
     password: str = Field(..., regex="^.{8,}|[0-9]+|[A-Z]+|[a-z]+|[^a-zA-Z0-9]+$", schema_extra={"example": "Str1ngst!"})
 
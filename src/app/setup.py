@@ -1,9 +1,8 @@
 import multiprocessing
-from time import time
 from typing import Any
 
 from fastapi import APIRouter
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html, get_redoc_html
 from fastapi.openapi.utils import get_openapi
@@ -11,8 +10,10 @@ from fastapi.responses import HTMLResponse
 
 from src.app import template
 from src.app.api.v1 import router as v1_router
+from src.app.middleware.client_cache_middleware import ClientCacheMiddleware
+from src.app.middleware.rate_limit_middleware import RateLimitMiddleware
+from src.app.middleware.request_logging_middleware import RequestLoggingMiddleware
 from src.config.settings import get_settings
-from src.core.logger import log_request, logger
 from src.core.logging import setup_logging
 
 
@@ -64,17 +65,21 @@ def create_application(
     # Create FastAPI application
     app = FastAPI(**app_config)
 
-    # Add middleware for request logging
-    @app.middleware("http")
-    async def log_requests(request: Request, call_next):
-        start_time = time()
-        response = await call_next(request)
-        duration = time() - start_time
-
-        await log_request(request, response)
-        logger.bind(access=True).debug(f"Request processed in {duration:.2f} seconds")
+    # Add middleware for client cache headers, with per-route policies set by `cache_policy`
+    app.add_middleware(ClientCacheMiddleware)
+
+    # Add middleware for a global rate limit per client, outside of the client cache middleware so that rejected
+    # requests cost as little as possible, but inside CORS so that browsers can read the 429
+    if settings.RATE_LIMIT_ENABLED:
+        app.add_middleware(
+            RateLimitMiddleware,
+            limit=settings.RATE_LIMIT_REQUESTS,
+            period=settings.RATE_LIMIT_PERIOD,
+            exempt_paths=[f"/{settings.API_PREFIX}/{settings.API_VERSION}/health"],
+        )
 
-        return response
+    # Add middleware for request logging, outside of the rate limit so that rejected requests are logged too
+    app.add_middleware(RequestLoggingMiddleware)
 
     # Add routers
     # Create main router and include versioned routes
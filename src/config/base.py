@@ -45,6 +45,7 @@ class BaseConfig(BaseSettings):
     - CORS configuration
     - Logging configuration
     - Rate limiting
+    - Caching
     - Security settings
     - LiveKit integration
     """
@@ -96,9 +97,58 @@ class BaseConfig(BaseSettings):
     RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "True").lower() == "true"
     RATE_LIMIT_REQUESTS: int = int(os.getenv("RATE_LIMIT_REQUESTS", "100"))
     RATE_LIMIT_PERIOD: int = int(os.getenv("RATE_LIMIT_PERIOD", "60"))  # seconds
+    RATE_LIMIT_LAYOUT: str = os.getenv("RATE_LIMIT_LAYOUT", "keys")  # keys or hash, see `RateLimitLayout`
+    # Count fixed window requests per worker and sync them to Redis in batches, see `LocalRateLimiter`
+    RATE_LIMIT_APPROXIMATE: bool = os.getenv("RATE_LIMIT_APPROXIMATE", "False").lower() == "true"
+    RATE_LIMIT_MAX_OVERSHOOT: float = float(os.getenv("RATE_LIMIT_MAX_OVERSHOOT", "0.1"))  # fraction of the limit
+    RATE_LIMIT_SYNC_INTERVAL_MS: int = int(os.getenv("RATE_LIMIT_SYNC_INTERVAL_MS", "100"))
+    RATE_LIMIT_SYNC_REQUESTS: int = int(os.getenv("RATE_LIMIT_SYNC_REQUESTS", "1000"))
+    RATE_LIMIT_RULES_CHANNEL: str = os.getenv("RATE_LIMIT_RULES_CHANNEL", "ratelimit:rules")
+    RATE_LIMIT_RULES_RELOAD_INTERVAL: int = int(os.getenv("RATE_LIMIT_RULES_RELOAD_INTERVAL", "300"))  # seconds
+
+    # Cache settings
+    CACHE_LOCAL_MAX_ENTRIES: int = int(os.getenv("CACHE_LOCAL_MAX_ENTRIES", "1024"))
+    CACHE_LOCAL_MAX_BYTES: int = int(os.getenv("CACHE_LOCAL_MAX_BYTES", str(16 * 1024 * 1024)))
+    CACHE_INVALIDATION_CHANNEL: str = os.getenv("CACHE_INVALIDATION_CHANNEL", "cache:invalidate")
+    CACHE_CODEC: str = os.getenv("CACHE_CODEC", "json")  # json, orjson or msgpack
+    # Every hit pays the decompression, so only worth it when Redis memory or bandwidth is the bottleneck
+    CACHE_COMPRESSION: str = os.getenv("CACHE_COMPRESSION", "none")  # none, zlib, zstd or lz4
+    CACHE_COMPRESSION_THRESHOLD: int = int(os.getenv("CACHE_COMPRESSION_THRESHOLD", "1024"))  # bytes
+    CACHE_METRICS_FLUSH_INTERVAL: int = int(os.getenv("CACHE_METRICS_FLUSH_INTERVAL", "10"))  # seconds
+    # Bearer token of the /cache/stats and /cache/metrics endpoints, e.g. for a Prometheus scrape config. Unset, the
+    # endpoints answer 404
+    CACHE_METRICS_TOKEN: str = os.getenv("CACHE_METRICS_TOKEN", "")
 
     # Security settings
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here")
+    ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+    # Embed the user id, tier and role in access tokens, so that requests are authorized without a user lookup
+    ACCESS_TOKEN_CLAIMS: bool = os.getenv("ACCESS_TOKEN_CLAIMS", "False").lower() == "true"
+    # Claims older than this are ignored and the user is looked up again. At most ACCESS_TOKEN_EXPIRE_MINUTES
+    ACCESS_TOKEN_MAX_STALENESS_MINUTES: int = int(
+        os.getenv("ACCESS_TOKEN_MAX_STALENESS_MINUTES", str(ACCESS_TOKEN_EXPIRE_MINUTES))
+    )
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))  # bcrypt threads per worker process
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))  # beyond which 503
+    TOKEN_CACHE_MAX_ENTRIES: int = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))  # verified tokens, 0 disables
+    # Authenticated users cached per worker, see `app.core.utils.principal_cache`. A TTL of 0 disables it
+    PRINCIPAL_CACHE_TTL: int = int(os.getenv("PRINCIPAL_CACHE_TTL", "30"))  # seconds
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+    PRINCIPAL_CACHE_CHANNEL: str = os.getenv("PRINCIPAL_CACHE_CHANNEL", "principal:evict")
+    TOKEN_BLACKLIST_REDIS_URL: str = os.getenv("TOKEN_BLACKLIST_REDIS_URL", "redis://localhost:6379/0")
+    TOKEN_BLACKLIST_CHANNEL: str = os.getenv("TOKEN_BLACKLIST_CHANNEL", "blacklist:revoked")
+    # In-process Bloom filter of revoked tokens, see `app.core.utils.token_blacklist`
+    TOKEN_BLACKLIST_FILTER_ENABLED: bool = os.getenv("TOKEN_BLACKLIST_FILTER_ENABLED", "True").lower() == "true"
+    TOKEN_BLACKLIST_FILTER_CAPACITY: int = int(os.getenv("TOKEN_BLACKLIST_FILTER_CAPACITY", "100000"))  # tokens
+    TOKEN_BLACKLIST_FILTER_FALSE_POSITIVE_RATE: float = float(
+        os.getenv("TOKEN_BLACKLIST_FILTER_FALSE_POSITIVE_RATE", "0.001")
+    )  # 100000 tokens at 0.001 take 176 KiB per worker
+    TOKEN_BLACKLIST_FILTER_REBUILD_INTERVAL: int = int(os.getenv("TOKEN_BLACKLIST_FILTER_REBUILD_INTERVAL", "3600"))
+    # Also keep revoked tokens in the `TokenBlacklist` table, written in batches
+    TOKEN_BLACKLIST_WRITE_BEHIND: bool = os.getenv("TOKEN_BLACKLIST_WRITE_BEHIND", "False").lower() == "true"
+    TOKEN_BLACKLIST_WRITE_BEHIND_INTERVAL: int = int(os.getenv("TOKEN_BLACKLIST_WRITE_BEHIND_INTERVAL", "5"))  # s
     ALLOWED_HOSTS: list[str] = os.getenv("ALLOWED_HOSTS", "*").split(",")
 
     # LiveKit integration settings
@@ -9,11 +9,11 @@ setup_logging(get_settings())
 from fastapi import Request
 
 
-async def log_request(request: Request, response=None):
+async def log_request(request: Request, status_code: int | None = None):
     """Log API request details."""
     logger.bind(access=True).info(
         f"{request.method} {request.url.path} - "
-        f"Status: {getattr(response, 'status_code', 'N/A')} - "
+        f"Status: {status_code or 'N/A'} - "
         f"Client: {request.client.host if request.client else 'Unknown'}"
     )
 
@@ -0,0 +1,39 @@
+import asyncio
+import logging
+
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..app.core.utils import token_blacklist
+from ..config.settings import get_settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+
+async def import_token_blacklist(session: AsyncSession) -> None:
+    try:
+        imported = await token_blacklist.import_from_database(session)
+        logger.info(f"Imported {imported} revoked tokens into Redis.")
+
+    except Exception as e:
+        logger.error(f"Error importing revoked tokens: {e}")
+
+
+async def main():
+    # Only needed when run as a script, so that the import function can be used without a configured database
+    from ..app.core.db.database import local_session
+
+    token_blacklist.client = Redis.from_url(settings.TOKEN_BLACKLIST_REDIS_URL)
+    try:
+        async with local_session() as session:
+            await import_token_blacklist(session)
+    finally:
+        await token_blacklist.client.aclose()
+
+
+if __name__ == "__main__":
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(main())
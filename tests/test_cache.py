@@ -0,0 +1,390 @@
+import asyncio
+import contextlib
+import json
+from time import time
+
+import fakeredis
+import pytest
+from fastapi import Request
+from redis.asyncio.client import Pipeline
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.core.exceptions.http_exceptions import NotFoundException
+from src.app.core.utils import cache
+from src.app.core.utils.cache_codecs import (
+    CODECS,
+    COMPRESSORS,
+    HEADER_MARKER,
+    METADATA_FLAG,
+    CacheCodec,
+    CachedBody,
+    ETaggedRawCodec,
+    decode_entry,
+    encode_entry,
+)
+from src.app.core.utils.local_cache import LocalCache
+
+
+@pytest.fixture
+def event_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def redis_client(monkeypatch, event_loop):
+    client = fakeredis.aioredis.FakeRedis()
+    monkeypatch.setattr(cache, "client", client)
+    monkeypatch.setattr(cache, "_registered_scripts", {})
+    monkeypatch.setattr(cache, "TAG_GC_PROBABILITY", 0)
+    yield client
+    event_loop.run_until_complete(client.aclose())
+
+
+def _request(method: str = "GET", if_none_match: str | None = None) -> Request:
+    headers = [] if if_none_match is None else [(b"if-none-match", if_none_match.encode())]
+    return Request({"type": "http", "method": method, "path": "/", "query_string": b"", "headers": headers})
+
+
+def test_hit_miss_and_invalidation(event_loop, redis_client) -> None:
+    calls = []
+
+    @cache.cache("item", expiration=60)
+    async def read_item(request: Request, item_id: int) -> dict:
+        calls.append(item_id)
+        return {"id": item_id, "version": len(calls)}
+
+    @cache.cache("item", expiration=60)
+    async def update_item(request: Request, item_id: int) -> dict:
+        return {"id": item_id}
+
+    first = event_loop.run_until_complete(read_item(_request(), item_id=1))
+    second = event_loop.run_until_complete(read_item(_request(), item_id=1))
+    assert first == second == {"id": 1, "version": 1}
+    assert calls == [1]
+
+    event_loop.run_until_complete(update_item(_request("PUT"), item_id=1))
+    assert not event_loop.run_until_complete(redis_client.exists("item:1"))
+
+    third = event_loop.run_until_complete(read_item(_request(), item_id=1))
+    assert third == {"id": 1, "version": 2}
+    assert calls == [1, 1]
+
+
+def test_local_cache_evicts_least_recently_used() -> None:
+    local_cache = LocalCache(max_entries=2, max_bytes=10)
+    local_cache.set("a", b"1", 60)
+    local_cache.set("b", b"2", 60)
+    assert local_cache.get("a") == b"1"
+
+    local_cache.set("c", b"3", 60)
+    assert local_cache.get("b") is None
+    assert local_cache.get("a") == b"1"
+
+    local_cache.set("d", b"4" * 10, 60)
+    assert len(local_cache) == 1
+    assert local_cache.info()["bytes"] == 10
+    assert (local_cache.stats.evictions, local_cache.stats.hits, local_cache.stats.misses) == (3, 2, 1)
+
+
+def test_local_tier_serves_hits_without_redis(event_loop, redis_client, monkeypatch) -> None:
+    monkeypatch.setattr(cache, "local_cache", LocalCache())
+    calls = []
+
+    @cache.cache("local", local_expiration=30)
+    async def read_local(request: Request, local_id: int) -> dict:
+        calls.append(local_id)
+        return {"id": local_id}
+
+    event_loop.run_until_complete(read_local(_request(), local_id=1))
+    event_loop.run_until_complete(redis_client.flushall())
+
+    assert event_loop.run_until_complete(read_local(_request(), local_id=1)) == {"id": 1}
+    assert calls == [1]
+    assert cache.local_cache.stats.hits == 1
+
+
+def test_invalidation_evicts_local_entries_of_other_processes(event_loop, redis_client, monkeypatch) -> None:
+    monkeypatch.setattr(cache, "local_cache", LocalCache())
+    monkeypatch.setattr(cache, "_local_cache_in_use", True)
+    cache.local_cache.set("item:1", b"1", 60)
+    cache.local_cache.set("items_page:1", b"[1]", 60, tags=["items"])
+    cache.local_cache.set("item:2", b"2", 60)
+
+    async def invalidate_from_another_process() -> dict:
+        listener = asyncio.create_task(cache._listen_for_invalidations())
+        other_process = redis_client.pubsub(ignore_subscribe_messages=True)
+        await other_process.subscribe(cache.INVALIDATION_CHANNEL)
+        try:
+            while (await redis_client.pubsub_numsub(cache.INVALIDATION_CHANNEL))[0][1] < 2:
+                await asyncio.sleep(0.01)
+
+            # What this process broadcasts is what the other processes evict
+            await cache._invalidate(["item:1"], [], ["items"])
+            message = None
+            while message is None:
+                message = await other_process.get_message(timeout=1)
+            broadcast = json.loads(message["data"])
+            await redis_client.publish(cache.INVALIDATION_CHANNEL, json.dumps({**broadcast, "origin": "other"}))
+            for _ in range(100):
+                if "item:1" not in cache.local_cache._entries:
+                    break
+                await asyncio.sleep(0.01)
+
+            return broadcast
+
+        finally:
+            listener.cancel()
+            await asyncio.gather(listener, return_exceptions=True)
+            await other_process.aclose()
+
+    broadcast = event_loop.run_until_complete(invalidate_from_another_process())
+    assert broadcast == {"origin": cache._instance_id, "keys": ["item:1"], "patterns": [], "tags": ["items"]}
+    assert cache.local_cache.get("item:1") is None
+    assert cache.local_cache.get("items_page:1") is None
+    assert cache.local_cache.get("item:2") == b"2"
+    assert cache.local_cache.stats.invalidations == 2
+
+
+def test_single_flight_computes_once_under_concurrency(event_loop, redis_client) -> None:
+    calls = []
+
+    @cache.cache("slow", single_flight=True)
+    async def read_slow(request: Request, slow_id: int) -> dict:
+        calls.append(slow_id)
+        await asyncio.sleep(0.05)
+        return {"id": slow_id}
+
+    async def read_concurrently() -> list:
+        return await asyncio.gather(*(read_slow(_request(), slow_id=1) for _ in range(20)))
+
+    results = event_loop.run_until_complete(read_concurrently())
+    assert results == [{"id": 1}] * 20
+    assert calls == [1]
+    assert not event_loop.run_until_complete(redis_client.exists("lock:slow:1"))
+
+
+def test_background_refresh_leaves_a_concurrent_miss_its_future(event_loop, redis_client) -> None:
+    async def compute() -> dict:
+        await asyncio.sleep(0.01)
+        return {"id": 1}
+
+    async def read(cache_key: str) -> object:
+        return cache._MISS
+
+    async def refresh_during_miss() -> list:
+        return await asyncio.gather(
+            cache._refresh_in_background("race:1", compute, lock_expiration=1),
+            cache._single_flight("race:1", compute, read, lock_expiration=1),
+        )
+
+    assert event_loop.run_until_complete(refresh_during_miss()) == [None, {"id": 1}]
+    assert cache._inflight == {}
+
+
+def _wait_for_background_tasks(event_loop) -> None:
+    event_loop.run_until_complete(asyncio.gather(*cache._background_tasks))
+
+
+def test_stale_entry_is_served_while_refreshed(event_loop, redis_client, monkeypatch) -> None:
+    calls = []
+
+    @cache.cache("stale", expiration=10, stale_ttl=60)
+    async def read_stale(request: Request, stale_id: int) -> dict:
+        calls.append(stale_id)
+        return {"version": len(calls)}
+
+    assert event_loop.run_until_complete(read_stale(_request(), stale_id=1)) == {"version": 1}
+
+    now = time()
+    monkeypatch.setattr(cache, "time", lambda: now + 11)
+    assert event_loop.run_until_complete(read_stale(_request(), stale_id=1)) == {"version": 1}
+    _wait_for_background_tasks(event_loop)
+    assert calls == [1, 1]
+
+    assert event_loop.run_until_complete(read_stale(_request(), stale_id=1)) == {"version": 2}
+    assert calls == [1, 1]
+
+
+def test_early_refresh_recomputes_before_expiry(event_loop, redis_client, monkeypatch) -> None:
+    calls = []
+
+    @cache.cache("early", expiration=10, early_refresh_beta=1.0)
+    async def read_early(request: Request, early_id: int) -> dict:
+        calls.append(early_id)
+        return {"version": len(calls)}
+
+    event_loop.run_until_complete(read_early(_request(), early_id=1))
+    monkeypatch.setattr(cache, "_should_refresh_early", lambda *args: True)
+    assert event_loop.run_until_complete(read_early(_request(), early_id=1)) == {"version": 1}
+    _wait_for_background_tasks(event_loop)
+    assert calls == [1, 1]
+
+
+def test_background_refresh_opens_its_own_session(event_loop, redis_client, monkeypatch) -> None:
+    request_session, refresh_session = object(), object()
+    sessions = []
+
+    @contextlib.asynccontextmanager
+    async def session_factory():
+        yield refresh_session
+
+    @cache.cache("session", expiration=10, stale_ttl=60, session_factory=session_factory)
+    async def read_with_session(request: Request, session_id: int, db: AsyncSession) -> dict:
+        sessions.append(db)
+        return {"id": session_id}
+
+    event_loop.run_until_complete(read_with_session(_request(), session_id=1, db=request_session))
+
+    now = time()
+    monkeypatch.setattr(cache, "time", lambda: now + 11)
+    event_loop.run_until_complete(read_with_session(_request(), session_id=1, db=request_session))
+    _wait_for_background_tasks(event_loop)
+    assert sessions == [request_session, refresh_session]
+
+
+def test_tag_invalidation_across_pages(event_loop, redis_client) -> None:
+    calls = []
+
+    @cache.cache("items_page", resource_id_name="page", tags=["items"])
+    async def read_items(request: Request, page: int) -> list:
+        calls.append(page)
+        return [page]
+
+    @cache.cache("item", tags_to_invalidate=["items"])
+    async def update_item(request: Request, item_id: int) -> dict:
+        return {"id": item_id}
+
+    for page in (1, 2, 1, 2):
+        event_loop.run_until_complete(read_items(_request(), page=page))
+    assert calls == [1, 2]
+    assert event_loop.run_until_complete(redis_client.scard("tag:items")) == 2
+
+    event_loop.run_until_complete(update_item(_request("PATCH"), item_id=7))
+    assert event_loop.run_until_complete(redis_client.exists("items_page:1", "items_page:2", "tag:items")) == 0
+
+    for page in (1, 2):
+        event_loop.run_until_complete(read_items(_request(), page=page))
+    assert calls == [1, 2, 1, 2]
+
+
+def test_tag_fill_and_invalidation_round_trips(event_loop, redis_client, monkeypatch) -> None:
+    async def no_script_check(self) -> None:
+        raise AssertionError("pipelines must not check for scripts before running")
+
+    monkeypatch.setattr(Pipeline, "load_scripts", no_script_check)
+
+    @cache.cache("rt_page", resource_id_name="page", tags=["rt"])
+    async def read_page(request: Request, page: int) -> list:
+        return [page]
+
+    @cache.cache("rt_item", tags_to_invalidate=["rt"])
+    async def update_item(request: Request, item_id: int) -> dict:
+        return {"id": item_id}
+
+    page_metrics, item_metrics = cache.metrics.for_prefix("rt_page"), cache.metrics.for_prefix("rt_item")
+    calls_before = page_metrics.redis_calls
+    event_loop.run_until_complete(read_page(_request(), page=1))
+    # One read that missed, then one fill
+    assert page_metrics.redis_calls - calls_before == 2
+    assert 0 < event_loop.run_until_complete(redis_client.ttl("tag:rt")) <= 3600
+
+    # Scripts flushed since startup are loaded again on NOSCRIPT
+    event_loop.run_until_complete(redis_client.script_flush())
+    calls_before = item_metrics.redis_calls
+    event_loop.run_until_complete(update_item(_request("DELETE"), item_id=1))
+    assert item_metrics.redis_calls - calls_before == 2
+    assert event_loop.run_until_complete(redis_client.exists("rt_page:1", "tag:rt")) == 0
+
+
+@pytest.mark.parametrize(
+    "codec",
+    [codec for codec in CODECS.values() if codec.name in ("json", "orjson", "msgpack")],
+    ids=lambda codec: codec.name,
+)
+@pytest.mark.parametrize(
+    "compressor", [None, *COMPRESSORS.values()], ids=lambda compressor: getattr(compressor, "name", "none")
+)
+@pytest.mark.parametrize("metadata", [None, (1_700_000_000.5, 0.25)])
+def test_entry_header_round_trip(codec, compressor, metadata) -> None:
+    value = {"id": 1, "items": ["x" * 100] * 10}
+    data = encode_entry(value, codec, compressor, compression_threshold=0, metadata=metadata)
+
+    header = data[0]
+    assert header & HEADER_MARKER
+    assert (header >> 3) & 0x07 == codec.format_id
+    assert header & 0x07 == (0 if compressor is None else compressor.format_id)
+    assert bool(header & METADATA_FLAG) == (metadata is not None)
+    assert decode_entry(data) == (value, metadata)
+
+
+def test_etagged_body_and_legacy_entries_round_trip() -> None:
+    body = CachedBody(b'{"id":1}', '"etag"')
+    assert decode_entry(encode_entry(body, ETaggedRawCodec())) == (body, None)
+    assert decode_entry(b'{"id": 1}') == ({"id": 1}, None)
+
+
+def test_incomplete_codec_fails_at_construction() -> None:
+    class DumpOnlyCodec(CacheCodec):
+        format_id = 5
+        name = "dump_only"
+
+        def dumps(self, value: object) -> bytes:
+            return b""
+
+    with pytest.raises(TypeError):
+        DumpOnlyCodec()
+
+
+def test_not_found_is_cached_for_not_found_expiration(event_loop, redis_client) -> None:
+    calls = []
+
+    @cache.cache("missing", not_found_expiration=5)
+    async def read_missing(request: Request, missing_id: int) -> dict:
+        calls.append(missing_id)
+        raise NotFoundException("Missing not found")
+
+    for _ in range(2):
+        with pytest.raises(NotFoundException) as exc_info:
+            event_loop.run_until_complete(read_missing(_request(), missing_id=1))
+        assert exc_info.value.detail == "Missing not found"
+
+    assert calls == [1]
+    assert 0 < event_loop.run_until_complete(redis_client.ttl("missing:1")) <= 5
+
+
+def test_invalidate_tags_without_a_cache_key(event_loop, redis_client, monkeypatch) -> None:
+    monkeypatch.setattr(cache, "local_cache", LocalCache())
+    monkeypatch.setattr(cache, "_local_cache_in_use", True)
+
+    @cache.cache("alice_posts", resource_id_name="page", tags=["alice_posts"], local_expiration=30)
+    async def read_posts(request: Request, page: int) -> list:
+        return [page]
+
+    for page in (1, 2):
+        event_loop.run_until_complete(read_posts(_request(), page=page))
+
+    event_loop.run_until_complete(cache.invalidate_tags("alice_posts", "alice_post_lookups"))
+    assert event_loop.run_until_complete(redis_client.keys("*")) == []
+    assert len(cache.local_cache) == 0
+
+
+@pytest.mark.parametrize("method", ["GET", "HEAD"])
+def test_raw_response_answers_matching_etag_with_304(event_loop, redis_client, method) -> None:
+    @cache.cache("raw", raw_response=True)
+    async def read_raw(request: Request, raw_id: int) -> dict:
+        return {"id": raw_id, "name": "café"}
+
+    response = event_loop.run_until_complete(read_raw(_request(method), raw_id=1))
+    etag = response.headers["etag"]
+    assert response.status_code == 200
+    assert response.body == '{"id":1,"name":"café"}'.encode()
+
+    cached = event_loop.run_until_complete(read_raw(_request(method, if_none_match=etag), raw_id=1))
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert cached.body == b""
+
+    changed = event_loop.run_until_complete(read_raw(_request(method, if_none_match='"other"'), raw_id=1))
+    assert changed.status_code == 200
@@ -0,0 +1,108 @@
+import asyncio
+
+import fakeredis
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from src.app.api.v1 import cache_stats
+from src.app.core.utils import cache
+from src.app.core.utils.cache_metrics import CacheMetricsRegistry, render_prometheus
+
+TOKEN = "scrape-token"
+
+
+@pytest.fixture
+def event_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def registry(monkeypatch) -> CacheMetricsRegistry:
+    registry = CacheMetricsRegistry()
+    monkeypatch.setattr(cache, "metrics", registry)
+    monkeypatch.setattr(cache, "client", None)
+    return registry
+
+
+@pytest.fixture
+def app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(cache_stats.router)
+    return app
+
+
+def _get(event_loop, app: FastAPI, path: str, token: str | None = None) -> httpx.Response:
+    headers = {} if token is None else {"Authorization": f"Bearer {token}"}
+
+    async def send() -> httpx.Response:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path, headers=headers)
+
+    return event_loop.run_until_complete(send())
+
+
+def test_render_prometheus(registry) -> None:
+    metrics = registry.for_prefix('user_"posts"')
+    metrics.hits = 3
+    metrics.fill_seconds = 0.25
+
+    lines = render_prometheus(registry.snapshot()).splitlines()
+
+    assert lines[:3] == [
+        "# HELP cache_hits_total Cache hits, including local tier and stale hits.",
+        "# TYPE cache_hits_total counter",
+        'cache_hits_total{prefix="user_\\"posts\\""} 3',
+    ]
+    assert 'cache_fill_seconds_total{prefix="user_\\"posts\\""} 0.25' in lines
+    assert len([line for line in lines if line.startswith("# TYPE ")]) == len(lines) // 3
+
+
+def test_render_prometheus_without_prefixes() -> None:
+    lines = render_prometheus({}).splitlines()
+
+    assert all(line.startswith("# ") for line in lines)
+
+
+def test_metrics_require_the_token(event_loop, registry, app, monkeypatch) -> None:
+    registry.for_prefix("tiers").misses = 2
+    monkeypatch.setattr(cache_stats.settings, "CACHE_METRICS_TOKEN", TOKEN)
+
+    assert _get(event_loop, app, "/cache/metrics").status_code == 401
+    assert _get(event_loop, app, "/cache/metrics", token="wrong").status_code == 401
+
+    response = _get(event_loop, app, "/cache/metrics", token=TOKEN)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'cache_misses_total{prefix="tiers"} 2' in response.text
+
+    stats = _get(event_loop, app, "/cache/stats", token=TOKEN).json()
+    assert stats["prefixes"]["tiers"]["misses"] == 2
+
+
+def test_metrics_are_hidden_without_a_token(event_loop, registry, app, monkeypatch) -> None:
+    monkeypatch.setattr(cache_stats.settings, "CACHE_METRICS_TOKEN", "")
+
+    assert _get(event_loop, app, "/cache/metrics", token="").status_code == 404
+    assert _get(event_loop, app, "/cache/stats").status_code == 404
+
+
+def test_flushes_add_up_across_workers(event_loop) -> None:
+    client = fakeredis.aioredis.FakeRedis()
+    workers = [CacheMetricsRegistry(), CacheMetricsRegistry()]
+
+    async def count_and_flush() -> dict:
+        for hits, worker in enumerate(workers, start=1):
+            worker.for_prefix("tiers").hits = hits
+            await worker.flush(client)
+        workers[0].for_prefix("tiers").hits += 10
+        await workers[0].flush(client)
+
+        stats = await workers[1].aggregated(client)
+        await client.aclose()
+        return stats
+
+    assert event_loop.run_until_complete(count_and_flush())["tiers"]["hits"] == 13
@@ -0,0 +1,134 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from src.app.middleware.client_cache_middleware import (
+    NO_STORE,
+    REVALIDATE,
+    CachePolicy,
+    ClientCacheMiddleware,
+    cache_policy,
+)
+
+
+@pytest.fixture
+def event_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ClientCacheMiddleware)
+
+    @app.get("/items")
+    async def read_items() -> list[int]:
+        return [1, 2, 3]
+
+    @app.post("/items")
+    async def write_item() -> dict:
+        return {"id": 4}
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        async def chunks():
+            for chunk in (b"first,", b"second"):
+                yield chunk
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    return app
+
+
+def _request(event_loop, app: FastAPI, method: str, path: str, headers: dict | None = None) -> httpx.Response:
+    async def send() -> httpx.Response:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.request(method, path, headers=headers)
+
+    return event_loop.run_until_complete(send())
+
+
+def test_cache_control_is_set_on_every_response(event_loop, app) -> None:
+    response = _request(event_loop, app, "GET", "/items")
+    assert response.json() == [1, 2, 3]
+    assert response.headers["cache-control"] == "private, no-cache"
+    assert response.headers["etag"].startswith('"')
+
+    response = _request(event_loop, app, "POST", "/items")
+    assert response.headers["cache-control"] == "no-store"
+    assert "etag" not in response.headers
+
+
+def test_matching_etag_gets_not_modified(event_loop, app) -> None:
+    etag = _request(event_loop, app, "GET", "/items").headers["etag"]
+
+    response = _request(event_loop, app, "GET", "/items", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert response.headers["cache-control"] == "private, no-cache"
+
+
+def test_streaming_responses_pass_through(event_loop, app) -> None:
+    response = _request(event_loop, app, "GET", "/stream")
+
+    assert response.content == b"first,second"
+    assert response.headers["cache-control"] == "private, no-cache"
+    assert "etag" not in response.headers
+    assert "content-length" not in response.headers
+
+
+def test_routes_without_a_policy_get_the_default(event_loop, app) -> None:
+    response = _request(event_loop, app, "GET", "/items")
+
+    assert response.headers["cache-control"] == REVALIDATE.cache_control == "private, no-cache"
+
+
+def test_per_route_policies(event_loop) -> None:
+    app = FastAPI()
+    app.add_middleware(ClientCacheMiddleware, policies={"/tiers/*": CachePolicy(max_age=30)})
+
+    @app.get("/tiers")
+    @cache_policy(max_age=60, s_maxage=600, stale_while_revalidate=60, vary=("Accept-Language",))
+    async def read_tiers() -> list[str]:
+        return ["free", "pro"]
+
+    @app.get("/tiers/{name}")
+    async def read_tier(name: str) -> dict:
+        return {"name": name}
+
+    @app.get("/me")
+    @cache_policy(NO_STORE)
+    async def read_me() -> dict:
+        return {"name": "alice"}
+
+    tiers = _request(event_loop, app, "GET", "/tiers")
+    assert tiers.headers["cache-control"] == "public, max-age=60, s-maxage=600, stale-while-revalidate=60"
+    assert tiers.headers["vary"] == "Accept-Language"
+    assert _request(event_loop, app, "GET", "/tiers/pro").headers["cache-control"] == "public, max-age=30"
+
+    me = _request(event_loop, app, "GET", "/me")
+    assert me.headers["cache-control"] == "no-store"
+    assert "etag" not in me.headers
+
+
+def test_authorized_requests_are_only_cached_privately(event_loop) -> None:
+    app = FastAPI()
+    app.add_middleware(ClientCacheMiddleware)
+
+    @app.get("/tiers")
+    @cache_policy(max_age=60, s_maxage=600)
+    async def read_tiers() -> list[str]:
+        return ["free", "pro"]
+
+    anonymous = _request(event_loop, app, "GET", "/tiers")
+    authorized = _request(event_loop, app, "GET", "/tiers", headers={"Authorization": "Bearer token"})
+
+    assert anonymous.headers["cache-control"] == "public, max-age=60, s-maxage=600"
+    assert authorized.headers["cache-control"] == "private, max-age=60"
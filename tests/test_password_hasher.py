@@ -0,0 +1,66 @@
+import asyncio
+import threading
+
+import bcrypt
+import pytest
+
+from src.app.core.exceptions.http_exceptions import ServiceUnavailableException
+from src.app.core.utils.password_hasher import PasswordHasher
+
+HASHED_PASSWORD = bcrypt.hashpw(b"secret", bcrypt.gensalt(rounds=4)).decode()
+
+
+@pytest.fixture
+def event_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(max_workers=1, max_pending=2)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_hash_and_verify(event_loop, hasher) -> None:
+    async def hash_and_verify() -> tuple[bool, bool]:
+        hashed_password = await hasher.hash("secret")
+        return await hasher.verify("secret", hashed_password), await hasher.verify("wrong", hashed_password)
+
+    assert event_loop.run_until_complete(hash_and_verify()) == (True, False)
+    assert hasher.pending == 0
+
+
+def test_full_pool_rejects_without_blocking(event_loop, hasher, monkeypatch) -> None:
+    release = threading.Event()
+    checkpw = bcrypt.checkpw
+
+    def slow_checkpw(password: bytes, hashed_password: bytes) -> bool:
+        release.wait(timeout=5)
+        return checkpw(password, hashed_password)
+
+    monkeypatch.setattr(bcrypt, "checkpw", slow_checkpw)
+
+    async def saturate() -> list[bool]:
+        # One check runs on the only thread and the other waits for it, filling `max_pending`
+        checks = [asyncio.ensure_future(hasher.verify("secret", HASHED_PASSWORD)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        assert hasher.pending == 2
+
+        # The event loop stays free while bcrypt runs, and the surplus check fails at once instead of queueing
+        with pytest.raises(ServiceUnavailableException) as exc_info:
+            await asyncio.wait_for(hasher.verify("secret", HASHED_PASSWORD), timeout=0.5)
+        assert exc_info.value.status_code == 503
+
+        release.set()
+        return await asyncio.wait_for(asyncio.gather(*checks), timeout=5)
+
+    try:
+        assert event_loop.run_until_complete(saturate()) == [True, True]
+    finally:
+        release.set()
+
+    assert hasher.pending == 0
+    assert event_loop.run_until_complete(hasher.verify("secret", HASHED_PASSWORD))
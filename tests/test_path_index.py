@@ -0,0 +1,58 @@
+import pytest
+
+from src.app.core.utils.path_index import PathIndex, check_pattern, split_path
+
+
+@pytest.fixture
+def index() -> PathIndex:
+    index = PathIndex()
+    index.insert("/api/v1/**", "api")
+    index.insert("/api/v1/user/**", "users")
+    index.insert("/api/v1/user/{username}", "user")
+    index.insert("/api/v1/user/me", "me")
+    index.insert("/api/v1/*/posts", "posts")
+    return index
+
+
+def test_literal_beats_parameter_and_wildcards(index) -> None:
+    assert index.match("/api/v1/user/me") == "me"
+    assert index.match("/api/v1/user/{name}") == "user"
+    assert index.match("/api/v1/tier/posts") == "posts"
+
+
+def test_deeper_pattern_beats_shallower(index) -> None:
+    assert index.match("/api/v1/user/{username}/posts") == "users"
+    assert index.match("/api/v1/tiers") == "api"
+    assert index.match_pattern("/api/v1/user/{username}/posts/{id}") == ("/api/v1/user/**", "users")
+    assert index.match("/api/v2/tiers") is None
+
+
+def test_recursive_wildcard_matches_no_segment(index) -> None:
+    assert index.match("/api/v1") == "api"
+    assert index.match("/api/v1/user") == "users"
+
+
+def test_trailing_and_repeated_slashes_are_ignored(index) -> None:
+    assert split_path("/api//v1/user/{username}/") == ["api", "v1", "user", "{}"]
+    assert index.match("/api/v1/user/me/") == "me"
+
+    index.insert("/api/v1/tiers/", "tiers")
+    assert index.match("/api/v1/tiers") == "tiers"
+    assert len(index) == 6
+
+
+def test_equivalent_patterns_replace_each_other(index) -> None:
+    index.insert("/api/v1/user/{id}", "renamed")
+
+    assert index.match("/api/v1/user/{username}") == "renamed"
+    assert len(index) == 5
+
+
+@pytest.mark.parametrize("pattern", ["/api/**/posts", "/**/**", "/api/v1/**/{id}"])
+def test_recursive_wildcard_must_be_last(index, pattern) -> None:
+    with pytest.raises(ValueError):
+        check_pattern(pattern)
+    with pytest.raises(ValueError):
+        index.insert(pattern, "rejected")
+
+    assert len(index) == 5
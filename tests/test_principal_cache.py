@@ -0,0 +1,45 @@
+import asyncio
+from time import monotonic
+
+import fakeredis
+import pytest
+
+from src.app.core.utils import local_cache, principal_cache
+
+ALICE = {"id": 1, "username": "alice", "is_superuser": False, "tier_id": None}
+
+
+@pytest.fixture
+def event_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(autouse=True)
+def principals():
+    principal_cache.principals.clear()
+    yield principal_cache.principals
+    principal_cache.principals.clear()
+
+
+def test_principal_expires_after_ttl(monkeypatch) -> None:
+    principal_cache.store("alice", ALICE)
+    assert principal_cache.get("alice") == ALICE
+
+    now = monotonic()
+    monkeypatch.setattr(local_cache, "monotonic", lambda: now + principal_cache.settings.PRINCIPAL_CACHE_TTL + 1)
+    assert principal_cache.get("alice") is None
+
+
+def test_evict_drops_every_subject_of_a_user(event_loop, monkeypatch) -> None:
+    client = fakeredis.aioredis.FakeRedis()
+    monkeypatch.setattr(principal_cache, "client", client)
+    principal_cache.store("alice", ALICE)
+    principal_cache.store("alice@example.com", ALICE)
+
+    event_loop.run_until_complete(principal_cache.evict("alice"))
+    event_loop.run_until_complete(client.aclose())
+
+    assert principal_cache.get("alice") is None
+    assert principal_cache.get("alice@example.com") is None
@@ -0,0 +1,189 @@
+import asyncio
+import math
+import multiprocessing
+import threading
+
+import fakeredis
+import pytest
+from redis.asyncio import Redis
+
+from src.app.core.utils import rate_limit
+from src.app.core.utils.rate_limit import RateLimitLayout
+from src.app.models.rate_limit import RateLimitAlgorithm
+
+LIMIT = 10
+PERIOD = 60
+# One second before a window boundary, and the boundary itself
+WINDOW_END = 1_700_000_040 - 1
+NEXT_WINDOW = WINDOW_END + 1
+
+
+@pytest.fixture
+def event_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(params=list(RateLimitLayout), ids=[layout.value for layout in RateLimitLayout])
+def layout(request):
+    return request.param
+
+
+@pytest.fixture
+def redis_client(monkeypatch, event_loop):
+    client = fakeredis.aioredis.FakeRedis()
+    monkeypatch.setattr(rate_limit, "client", client)
+    monkeypatch.setattr(rate_limit, "_registered_scripts", {})
+    yield client
+    event_loop.run_until_complete(client.aclose())
+
+
+def _burst(
+    event_loop, monkeypatch, algorithm: RateLimitAlgorithm, now: float, count: int, layout: RateLimitLayout
+) -> list[bool]:
+    monkeypatch.setattr(rate_limit, "time", lambda: now)
+
+    async def check_all() -> list[bool]:
+        results = []
+        for _ in range(count):
+            status = await rate_limit.check_rate_limit(1, "/api/v1/users", LIMIT, PERIOD, algorithm, layout=layout)
+            results.append(status.limited)
+        return results
+
+    return event_loop.run_until_complete(check_all())
+
+
+def test_fixed_window_allows_double_burst_at_boundary(event_loop, redis_client, monkeypatch, layout) -> None:
+    before = _burst(event_loop, monkeypatch, RateLimitAlgorithm.FIXED_WINDOW, WINDOW_END, LIMIT + 1, layout)
+    after = _burst(event_loop, monkeypatch, RateLimitAlgorithm.FIXED_WINDOW, NEXT_WINDOW, LIMIT + 1, layout)
+
+    assert before == [False] * LIMIT + [True]
+    assert after == [False] * LIMIT + [True]
+
+
+def test_sliding_window_blocks_burst_at_boundary(event_loop, redis_client, monkeypatch, layout) -> None:
+    before = _burst(event_loop, monkeypatch, RateLimitAlgorithm.SLIDING_WINDOW, WINDOW_END, LIMIT + 1, layout)
+    after = _burst(event_loop, monkeypatch, RateLimitAlgorithm.SLIDING_WINDOW, NEXT_WINDOW, LIMIT, layout)
+
+    assert before == [False] * LIMIT + [True]
+    assert after == [True] * LIMIT
+
+
+def test_sliding_window_recovers_as_previous_window_fades(event_loop, redis_client, monkeypatch, layout) -> None:
+    _burst(event_loop, monkeypatch, RateLimitAlgorithm.SLIDING_WINDOW, WINDOW_END, LIMIT, layout)
+    halfway = _burst(
+        event_loop, monkeypatch, RateLimitAlgorithm.SLIDING_WINDOW, NEXT_WINDOW + PERIOD // 2, LIMIT, layout
+    )
+
+    assert halfway == [False] * (LIMIT // 2) + [True] * (LIMIT - LIMIT // 2)
+
+
+def test_sliding_window_extends_hash_created_by_fixed_window(event_loop, redis_client, monkeypatch) -> None:
+    now = WINDOW_END - PERIOD // 2
+    elapsed = now % PERIOD
+
+    async def check(algorithm: RateLimitAlgorithm, path: str) -> None:
+        await rate_limit.check_rate_limit(1, path, LIMIT, PERIOD, algorithm, layout=RateLimitLayout.HASH)
+
+    monkeypatch.setattr(rate_limit, "time", lambda: now)
+    event_loop.run_until_complete(check(RateLimitAlgorithm.FIXED_WINDOW, "/api/v1/posts"))
+    event_loop.run_until_complete(check(RateLimitAlgorithm.SLIDING_WINDOW, "/api/v1/users"))
+
+    [key] = event_loop.run_until_complete(redis_client.keys("ratelimit:*"))
+    # The sliding window reads this window's counters until the next one ends
+    assert event_loop.run_until_complete(redis_client.ttl(key)) > PERIOD - elapsed
+
+
+def test_gcra_allows_burst_then_steady_rate(event_loop, redis_client, monkeypatch, layout) -> None:
+    interval = PERIOD / LIMIT
+
+    burst = _burst(event_loop, monkeypatch, RateLimitAlgorithm.GCRA, WINDOW_END, LIMIT + 1, layout)
+    too_soon = _burst(event_loop, monkeypatch, RateLimitAlgorithm.GCRA, WINDOW_END + interval / 2, 1, layout)
+    one_interval_later = _burst(event_loop, monkeypatch, RateLimitAlgorithm.GCRA, WINDOW_END + interval, 2, layout)
+
+    assert burst == [False] * LIMIT + [True]
+    assert too_soon == [True]
+    assert one_interval_later == [False, True]
+
+
+def test_gcra_ignores_window_boundaries(event_loop, redis_client, monkeypatch, layout) -> None:
+    _burst(event_loop, monkeypatch, RateLimitAlgorithm.GCRA, WINDOW_END, LIMIT, layout)
+    after = _burst(event_loop, monkeypatch, RateLimitAlgorithm.GCRA, NEXT_WINDOW, LIMIT, layout)
+
+    assert after == [True] * LIMIT
+
+
+def test_scripts_reload_after_flush(event_loop, redis_client, monkeypatch, layout) -> None:
+    event_loop.run_until_complete(rate_limit.load_scripts())
+    event_loop.run_until_complete(redis_client.script_flush())
+
+    for algorithm in RateLimitAlgorithm:
+        assert _burst(event_loop, monkeypatch, algorithm, WINDOW_END, 1, layout) == [False]
+
+
+WORKERS = 4
+REQUESTS_PER_WORKER = 150
+SHARED_LIMIT = 200
+MAX_OVERSHOOT = 0.1
+
+
+@pytest.fixture
+def redis_server():
+    server = fakeredis.TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address
+    server.shutdown()
+    server.server_close()
+
+
+def _count_allowed(address, approximate: bool, start, allowed) -> None:
+    async def send_requests() -> int:
+        rate_limit.client = Redis(host=address[0], port=address[1])
+        # The TCP fake server drops connections after an error reply, NOSCRIPT included
+        await rate_limit.load_scripts()
+        limiter = rate_limit.LocalRateLimiter(MAX_OVERSHOOT, sync_interval=0.005, sync_requests=20)
+        sync_task = asyncio.create_task(limiter.run())
+        count = 0
+        for _ in range(REQUESTS_PER_WORKER):
+            if approximate:
+                status = await limiter.check(1, "/api/v1/users", SHARED_LIMIT, PERIOD)
+            else:
+                status = await rate_limit.check_rate_limit(1, "/api/v1/users", SHARED_LIMIT, PERIOD)
+            count += not status.limited
+            await asyncio.sleep(0.0005)
+
+        sync_task.cancel()
+        await limiter.sync()
+        await rate_limit.client.aclose()
+        return count
+
+    rate_limit.time = lambda: NEXT_WINDOW
+    start.wait()
+    allowed.put(asyncio.run(send_requests()))
+
+
+def _allowed_across_workers(address, approximate: bool) -> int:
+    context = multiprocessing.get_context("spawn")
+    start = context.Barrier(WORKERS)
+    allowed = context.Queue()
+    processes = [
+        context.Process(target=_count_allowed, args=(address, approximate, start, allowed)) for _ in range(WORKERS)
+    ]
+    for process in processes:
+        process.start()
+
+    total = sum(allowed.get(timeout=60) for _ in processes)
+    for process in processes:
+        process.join()
+
+    return total
+
+
+@pytest.mark.parametrize("approximate", [False, True], ids=["exact", "approximate"])
+def test_accuracy_under_multi_process_load(redis_server, approximate) -> None:
+    allowed = _allowed_across_workers(redis_server, approximate)
+
+    max_allowed = SHARED_LIMIT + approximate * WORKERS * math.floor(SHARED_LIMIT * MAX_OVERSHOOT)
+    assert SHARED_LIMIT <= allowed <= max_allowed, f"{allowed} allowed for a limit of {SHARED_LIMIT}"
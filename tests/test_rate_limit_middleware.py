@@ -0,0 +1,121 @@
+import asyncio
+
+import fakeredis
+import httpx
+import pytest
+from fastapi import FastAPI
+from jose import jwt
+
+from src.app.core.utils import rate_limit
+from src.app.middleware import rate_limit_middleware
+from src.app.middleware.rate_limit_middleware import RateLimitMiddleware
+from src.app.middleware.request_logging_middleware import RequestLoggingMiddleware
+from src.core.logger import logger
+
+LIMIT = 2
+PERIOD = 60
+
+
+@pytest.fixture
+def event_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def redis_client(monkeypatch, event_loop):
+    client = fakeredis.aioredis.FakeRedis()
+    monkeypatch.setattr(rate_limit, "client", client)
+    monkeypatch.setattr(rate_limit, "_registered_scripts", {})
+    monkeypatch.setattr(rate_limit_middleware.settings, "RATE_LIMIT_APPROXIMATE", False)
+    yield client
+    event_loop.run_until_complete(client.aclose())
+
+
+@pytest.fixture
+def app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, limit=LIMIT, period=PERIOD, exempt_paths=["/health"])
+
+    @app.get("/items")
+    async def read_items() -> list[int]:
+        return [1, 2, 3]
+
+    @app.get("/health")
+    async def health() -> dict:
+        return {"status": "ok"}
+
+    return app
+
+
+def _get(
+    event_loop, app: FastAPI, path: str, count: int, host: str = "10.0.0.1", headers: dict | None = None
+) -> list[httpx.Response]:
+    async def send() -> list[httpx.Response]:
+        transport = httpx.ASGITransport(app=app, client=(host, 1234))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.get(path, headers=headers) for _ in range(count)]
+
+    return event_loop.run_until_complete(send())
+
+
+def test_global_limit_per_client(event_loop, redis_client, app) -> None:
+    first_client = _get(event_loop, app, "/items", LIMIT + 1)
+    second_client = _get(event_loop, app, "/items", 1, host="10.0.0.2")
+
+    assert [response.status_code for response in first_client] == [200] * LIMIT + [429]
+    assert second_client[0].status_code == 200
+
+
+def test_authenticated_clients_are_limited_by_subject(event_loop, redis_client, app) -> None:
+    settings = rate_limit_middleware.settings
+    token = jwt.encode({"sub": "alice"}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    _get(event_loop, app, "/items", LIMIT, host="10.0.0.1", headers=headers)
+    [other_address] = _get(event_loop, app, "/items", 1, host="10.0.0.2", headers=headers)
+    [anonymous] = _get(event_loop, app, "/items", 1, host="10.0.0.1")
+
+    assert other_address.status_code == 429
+    assert anonymous.status_code == 200
+
+
+def test_rejection_body_and_headers(event_loop, redis_client, app) -> None:
+    rejected = _get(event_loop, app, "/items", LIMIT + 1)[-1]
+
+    assert rejected.status_code == 429
+    assert rejected.json() == {"detail": "Rate limit exceeded."}
+    assert rejected.headers["content-type"] == "application/json"
+    assert rejected.headers["content-length"] == str(len(rejected.content))
+    assert 1 <= int(rejected.headers["retry-after"]) <= PERIOD
+
+
+def test_exempt_paths_are_never_limited(event_loop, redis_client, app) -> None:
+    health_checks = _get(event_loop, app, "/health", LIMIT + 1)
+
+    assert [response.status_code for response in health_checks] == [200] * (LIMIT + 1)
+    assert event_loop.run_until_complete(redis_client.keys("*")) == []
+
+
+def test_requests_pass_without_redis(event_loop, app, monkeypatch) -> None:
+    monkeypatch.setattr(rate_limit, "client", None)
+
+    assert [response.status_code for response in _get(event_loop, app, "/items", LIMIT + 1)] == [200] * (LIMIT + 1)
+
+
+def test_rejected_requests_are_logged(event_loop, redis_client, app) -> None:
+    # The order of `app.setup.create_application`: request logging wraps the rate limit
+    app.add_middleware(RequestLoggingMiddleware)
+    messages: list[str] = []
+    handler_id = logger.add(
+        lambda message: messages.append(message.record["message"]),
+        level="INFO",
+        filter=lambda record: record["extra"].get("access", False),
+    )
+    try:
+        _get(event_loop, app, "/items", LIMIT + 1)
+    finally:
+        logger.remove(handler_id)
+
+    assert [message.split(" - ")[1] for message in messages] == ["Status: 200"] * LIMIT + ["Status: 429"]
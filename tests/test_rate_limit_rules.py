@@ -0,0 +1,109 @@
+import asyncio
+import contextlib
+import importlib
+import sys
+from types import ModuleType
+
+import pytest
+
+from src.app.models.rate_limit import RateLimitAlgorithm
+
+# The CRUD objects of tiers and rate limits cannot be built against the installed FastCRUD, so they are replaced by
+# in-memory tables that count their queries
+CRUD_MODULES = {"src.app.crud.crud_tier": "crud_tiers", "src.app.crud.crud_rate_limit": "crud_rate_limits"}
+
+
+class FakeCRUD:
+    def __init__(self) -> None:
+        self.rows: list[dict] = []
+        self.queries = 0
+        self.on_query = lambda: None
+
+    async def get_multi(self, db, limit, schema_to_select) -> dict:
+        self.queries += 1
+        self.on_query()
+        return {"data": list(self.rows)}
+
+
+@pytest.fixture
+def event_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def rate_limit_rules(monkeypatch):
+    for module_name, crud_name in CRUD_MODULES.items():
+        module = ModuleType(module_name)
+        setattr(module, crud_name, FakeCRUD())
+        monkeypatch.setitem(sys.modules, module_name, module)
+    monkeypatch.delitem(sys.modules, "src.app.core.utils.rate_limit_rules", raising=False)
+
+    rate_limit_rules = importlib.import_module("src.app.core.utils.rate_limit_rules")
+    monkeypatch.setattr(rate_limit_rules.rate_limit, "client", None)
+    rate_limit_rules.crud_tiers.rows = [{"id": 1, "name": "free"}]
+    rate_limit_rules.crud_rate_limits.rows = [_row("/api/v1/**", 100)]
+    return rate_limit_rules
+
+
+def _row(path: str, limit: int) -> dict:
+    return {
+        "name": path,
+        "tier_id": 1,
+        "path": path,
+        "limit": limit,
+        "period": 60,
+        "algorithm": RateLimitAlgorithm.FIXED_WINDOW.value,
+    }
+
+
+@contextlib.asynccontextmanager
+async def _session():
+    yield None
+
+
+def test_rules_are_served_without_queries(event_loop, rate_limit_rules) -> None:
+    event_loop.run_until_complete(rate_limit_rules.reload_snapshot(_session))
+    queries = rate_limit_rules.crud_tiers.queries, rate_limit_rules.crud_rate_limits.queries
+
+    for _ in range(3):
+        rule = rate_limit_rules.snapshot.match(1, "/api/v1/user/{username}/posts")
+        assert (rule.limit, rule.path) == (100, "/api/v1/**")
+    assert rate_limit_rules.snapshot.match(2, "/api/v1/tiers") is None
+    assert rate_limit_rules.snapshot.tiers == {1: "free"}
+
+    assert (rate_limit_rules.crud_tiers.queries, rate_limit_rules.crud_rate_limits.queries) == queries == (1, 1)
+
+
+def test_refresh_swaps_the_whole_snapshot(event_loop, rate_limit_rules) -> None:
+    event_loop.run_until_complete(rate_limit_rules.reload_snapshot(_session))
+    old_snapshot = rate_limit_rules.snapshot
+    assert old_snapshot.match(1, "/api/v1/tiers").limit == 100
+
+    rate_limit_rules.crud_tiers.rows.append({"id": 2, "name": "pro"})
+    rate_limit_rules.crud_rate_limits.rows = [_row("/api/v1/**", 10), _row("/api/v1/tiers", 5)]
+    seen_while_loading = []
+    rate_limit_rules.crud_rate_limits.on_query = lambda: seen_while_loading.append(rate_limit_rules.snapshot)
+    event_loop.run_until_complete(rate_limit_rules.reload_snapshot(_session))
+
+    # Requests served during the reload kept seeing the complete old snapshot, which is never modified
+    assert seen_while_loading == [old_snapshot]
+    assert old_snapshot.match(1, "/api/v1/tiers").limit == 100
+    assert old_snapshot.tiers == {1: "free"}
+
+    new_snapshot = rate_limit_rules.snapshot
+    assert new_snapshot is not old_snapshot
+    assert new_snapshot.match(1, "/api/v1/tiers").limit == 5
+    assert new_snapshot.match(1, "/api/v1/posts").limit == 10
+    assert new_snapshot.tiers == {1: "free", 2: "pro"}
+
+
+def test_reload_is_skipped_when_already_at_version(event_loop, rate_limit_rules) -> None:
+    event_loop.run_until_complete(rate_limit_rules.reload_snapshot(_session))
+    snapshot = rate_limit_rules.snapshot
+
+    event_loop.run_until_complete(rate_limit_rules.reload_snapshot(_session, min_version=snapshot.version))
+
+    assert rate_limit_rules.snapshot is snapshot
+    assert rate_limit_rules.crud_rate_limits.queries == 1
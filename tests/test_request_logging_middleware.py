@@ -0,0 +1,61 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+
+from src.app.middleware.request_logging_middleware import RequestLoggingMiddleware
+from src.core.logger import logger
+
+
+@pytest.fixture
+def event_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def messages():
+    messages: list[str] = []
+    handler_id = logger.add(lambda message: messages.append(message.record["message"]), level="DEBUG")
+    yield messages
+    logger.remove(handler_id)
+
+
+@pytest.fixture
+def app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestLoggingMiddleware)
+
+    @app.get("/items")
+    async def read_items() -> list[int]:
+        return [1, 2, 3]
+
+    @app.get("/missing")
+    async def read_missing() -> None:
+        raise HTTPException(status_code=404)
+
+    @app.get("/broken")
+    async def read_broken() -> None:
+        raise RuntimeError("broken")
+
+    return app
+
+
+def _get(event_loop, app: FastAPI, path: str) -> None:
+    async def send() -> None:
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.get(path)
+
+    event_loop.run_until_complete(send())
+
+
+@pytest.mark.parametrize("path, status_code", [("/items", 200), ("/missing", 404), ("/broken", 500)])
+def test_status_and_duration_are_logged(event_loop, app, messages, path, status_code) -> None:
+    _get(event_loop, app, path)
+
+    assert messages[0].startswith(f"GET {path} - Status: {status_code} - ")
+    assert messages[1].startswith("Request processed in ")
+    assert messages[1].endswith(" seconds")
@@ -0,0 +1,82 @@
+import asyncio
+import importlib
+import sys
+from datetime import timedelta
+from time import time
+from types import ModuleType, SimpleNamespace
+
+import fakeredis
+import pytest
+
+from src.app.core.utils import token_blacklist
+from src.app.core.utils.token_cache import verified_tokens
+
+# `app.core.security` imports the CRUD objects of users and blacklisted tokens, which cannot be built against the
+# installed FastCRUD. With a Redis blacklist these tests never reach them, so they are replaced by empty stand-ins
+CRUD_MODULES = {"src.app.crud.crud_users": "crud_users", "src.app.core.db.crud_token_blacklist": "crud_token_blacklist"}
+
+ALICE = {"id": 1, "username": "alice", "tier_id": 2, "is_superuser": True}
+
+
+@pytest.fixture(scope="module")
+def security():
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        for module_name, crud_name in CRUD_MODULES.items():
+            module = ModuleType(module_name)
+            setattr(module, crud_name, SimpleNamespace())
+            monkeypatch.setitem(sys.modules, module_name, module)
+        monkeypatch.delitem(sys.modules, "src.app.core.security", raising=False)
+
+        yield importlib.import_module("src.app.core.security")
+
+
+@pytest.fixture
+def event_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def redis_client(monkeypatch, event_loop):
+    client = fakeredis.aioredis.FakeRedis()
+    monkeypatch.setattr(token_blacklist, "client", client)
+    monkeypatch.setattr(token_blacklist, "revoked_filter", None)
+    verified_tokens.clear()
+    yield client
+    verified_tokens.clear()
+    event_loop.run_until_complete(client.aclose())
+
+
+def test_settings_come_from_base_config(security) -> None:
+    assert security.ALGORITHM == security.settings.ALGORITHM
+    assert security.ACCESS_TOKEN_EXPIRE_MINUTES == security.settings.ACCESS_TOKEN_EXPIRE_MINUTES
+
+
+def test_revocation_applies_to_cached_tokens(security, event_loop, redis_client) -> None:
+    token = event_loop.run_until_complete(security.create_access_token({"sub": "alice"}))
+
+    assert event_loop.run_until_complete(security.verify_token(token, db=None)).username_or_email == "alice"
+    hits = verified_tokens.stats.hits
+    assert event_loop.run_until_complete(security.verify_token(token, db=None)) is not None
+    assert verified_tokens.stats.hits == hits + 1
+
+    event_loop.run_until_complete(security.blacklist_token(token, db=None))
+    assert verified_tokens.get(token) is not None
+    assert event_loop.run_until_complete(security.verify_token(token, db=None)) is None
+
+
+def test_claims_are_kept_until_max_staleness(security, monkeypatch) -> None:
+    monkeypatch.setattr(security, "ACCESS_TOKEN_CLAIMS", True)
+    monkeypatch.setattr(security, "ACCESS_TOKEN_MAX_STALENESS", timedelta(minutes=5))
+    now = time()
+    payload = {**security.access_token_data(ALICE), "exp": now + 3600, "jti": "abc"}
+
+    token_data, expires_at = security._token_data({**payload, "iat": now - 60})
+    assert (token_data.uid, token_data.tier_id, token_data.is_superuser) == (1, 2, True)
+    assert expires_at == now - 60 + 300
+
+    token_data, expires_at = security._token_data({**payload, "iat": now - 301})
+    assert (token_data.username_or_email, token_data.jti) == ("alice", "abc")
+    assert (token_data.uid, token_data.tier_id, token_data.is_superuser) == (None, None, None)
+    assert expires_at == now + 3600
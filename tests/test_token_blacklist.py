@@ -0,0 +1,165 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from time import time
+
+import fakeredis
+import pytest
+from jose import jwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.app.core.db.token_blacklist import TokenBlacklist
+from src.app.core.utils import token_blacklist
+from src.app.core.utils.bloom_filter import BloomFilter
+
+
+@pytest.fixture
+def event_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def redis_client(monkeypatch, event_loop):
+    client = fakeredis.aioredis.FakeRedis()
+    monkeypatch.setattr(token_blacklist, "client", client)
+    monkeypatch.setattr(token_blacklist, "revoked_filter", None)
+    monkeypatch.setattr(token_blacklist, "_write_behind_queue", [])
+    yield client
+    event_loop.run_until_complete(client.aclose())
+
+
+@pytest.fixture
+def session_factory(event_loop):
+    engine = create_async_engine("sqlite+aiosqlite://")
+
+    async def create_table() -> None:
+        async with engine.begin() as conn:
+            await conn.run_sync(TokenBlacklist.__table__.create)
+
+    event_loop.run_until_complete(create_table())
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    event_loop.run_until_complete(engine.dispose())
+
+
+def test_import_script_copies_unexpired_rows(event_loop, redis_client, session_factory) -> None:
+    from src.scripts.import_token_blacklist import import_token_blacklist
+
+    now = datetime.now(UTC)
+
+    async def run() -> None:
+        async with session_factory() as db:
+            db.add(TokenBlacklist(token="header.payload.signature", expires_at=now + timedelta(minutes=5)))
+            db.add(TokenBlacklist(token="expired.payload.signature", expires_at=now - timedelta(minutes=5)))
+            await db.commit()
+            await import_token_blacklist(db)
+
+    event_loop.run_until_complete(run())
+
+    assert event_loop.run_until_complete(token_blacklist.is_revoked("header.payload.signature"))
+    assert not event_loop.run_until_complete(token_blacklist.is_revoked("expired.payload.signature"))
+
+
+def _token(jti: str | None = None) -> str:
+    claims = {"sub": "alice", "exp": int(time()) + 600}
+    if jti is not None:
+        claims["jti"] = jti
+    return jwt.encode(claims, "secret", algorithm="HS256")
+
+
+def test_bloom_filter_has_no_false_negatives_past_capacity() -> None:
+    bloom_filter = BloomFilter(capacity=100, false_positive_rate=0.01)
+    items = [f"jti:{i}" for i in range(1000)]
+    for item in items:
+        bloom_filter.add(item)
+
+    assert all(item in bloom_filter for item in items)
+
+
+def test_revoke_stores_fingerprint_until_expiry(event_loop, redis_client) -> None:
+    token = _token("abc")
+    event_loop.run_until_complete(token_blacklist.revoke(token, time() + 60, jti="abc"))
+
+    assert 0 < event_loop.run_until_complete(redis_client.ttl("blacklist:jti:abc")) <= 60
+    assert event_loop.run_until_complete(token_blacklist.is_revoked(token, jti="abc"))
+    assert not event_loop.run_until_complete(token_blacklist.is_revoked(_token("other"), jti="other"))
+
+    event_loop.run_until_complete(token_blacklist.revoke(_token("expired"), time() - 1, jti="expired"))
+    assert not event_loop.run_until_complete(redis_client.exists("blacklist:jti:expired"))
+
+
+def test_filter_never_hides_revoked_tokens(event_loop, redis_client, monkeypatch) -> None:
+    monkeypatch.setattr(token_blacklist.settings, "TOKEN_BLACKLIST_FILTER_CAPACITY", 10)
+    jtis = [f"jti-{i}" for i in range(50)]
+
+    async def revoke_and_rebuild() -> None:
+        for jti in jtis[:25]:
+            await token_blacklist.revoke(_token(jti), time() + 60, jti=jti)
+        await token_blacklist.rebuild_filter()
+        # Revoked after the rebuild, so only known to the filter through `_remember`
+        for jti in jtis[25:]:
+            await token_blacklist.revoke(_token(jti), time() + 60, jti=jti)
+
+    event_loop.run_until_complete(revoke_and_rebuild())
+
+    assert token_blacklist.filter_info()["count"] == len(jtis)
+    for jti in jtis:
+        assert event_loop.run_until_complete(token_blacklist.is_revoked(_token(jti), jti=jti))
+
+
+def test_write_behind_lets_the_database_restore_redis(event_loop, redis_client, session_factory, monkeypatch) -> None:
+    monkeypatch.setattr(token_blacklist.settings, "TOKEN_BLACKLIST_WRITE_BEHIND", True)
+    token = _token()
+
+    async def revoke_flush_and_restore() -> int:
+        await token_blacklist.revoke(token, time() + 60)
+        await token_blacklist.flush_write_behind(session_factory)
+        await redis_client.flushall()
+        async with session_factory() as db:
+            return await token_blacklist.import_from_database(db)
+
+    assert event_loop.run_until_complete(revoke_flush_and_restore()) == 1
+    assert token_blacklist._write_behind_queue == []
+    assert event_loop.run_until_complete(token_blacklist.is_revoked(token))
+
+
+def test_failed_write_behind_keeps_the_batch(event_loop, redis_client, monkeypatch) -> None:
+    monkeypatch.setattr(token_blacklist.settings, "TOKEN_BLACKLIST_WRITE_BEHIND", True)
+    event_loop.run_until_complete(token_blacklist.revoke(_token(), time() + 60))
+
+    def broken_session_factory():
+        raise ConnectionError("database is down")
+
+    with pytest.raises(ConnectionError):
+        event_loop.run_until_complete(token_blacklist.flush_write_behind(broken_session_factory))
+
+    assert len(token_blacklist._write_behind_queue) == 1
+
+
+def test_import_fingerprints_tokens_and_undecodable_rows(event_loop, redis_client, session_factory) -> None:
+    with_jti, undecodable = _token("abc"), "not.a.jwt"
+    fingerprint = token_blacklist.token_fingerprint(_token())
+    expires_at = datetime.now(UTC) + timedelta(minutes=5)
+
+    async def run() -> tuple[int, list[str]]:
+        async with session_factory() as db:
+            db.add_all(
+                TokenBlacklist(token=token, expires_at=expires_at) for token in (with_jti, undecodable, fingerprint)
+            )
+            await db.commit()
+            imported = await token_blacklist.import_from_database(db)
+            rows = list((await db.execute(select(TokenBlacklist.token))).scalars())
+
+        return imported, rows
+
+    imported, rows = event_loop.run_until_complete(run())
+    assert imported == 3
+    assert len(rows) == 3
+
+    keys = {key.decode() for key in event_loop.run_until_complete(redis_client.keys("blacklist:*"))}
+    assert keys == {
+        "blacklist:jti:abc",
+        f"blacklist:{token_blacklist.token_fingerprint(undecodable)}",
+        f"blacklist:{fingerprint}",
+    }